@@ -19,6 +19,7 @@ from app.db.queries.block_queries.create_block_and_embedding import create_block
 from app.db.queries.block_queries.update_block_and_embedding import update_block_and_embedding
 from app.db.queries.block_queries.delete_block_with_embedding import delete_block_with_embedding
 from app.db.queries.block_queries.get_blocks import get_blocks_in_canvas # KITA PERBAIKI AWAIT DI BAWAH
+from app.services.semantic_response_cache import semantic_response_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["blocks"])
@@ -55,6 +56,7 @@ async def create_new_block_endpoint(
         logger.error(f"Failed to create block in canvas {canvas_id}: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+    await semantic_response_cache.invalidate_canvas(canvas_id, editor_id=current_user_id)
     logger.info(f"Successfully created block {created_block.get('block_id')} in canvas {canvas_id}")
     return created_block
 
@@ -112,6 +114,7 @@ async def update_block_content_endpoint(
         logger.error(f"Block {block_id} not found in canvas {canvas_id}.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Block not found.")
 
+    await semantic_response_cache.invalidate_canvas(canvas_id, editor_id=current_user_id)
     logger.info(f"Successfully updated block {block_id}")
     return updated_block
 
@@ -131,5 +134,6 @@ async def delete_a_block_endpoint(
        logger.error(f"Block {block_id} not found or failed to delete from canvas {canvas_id}.")
        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Block not found or failed to delete.")
 
+    await semantic_response_cache.invalidate_canvas(canvas_id, editor_id=access_info["user"].id)
     logger.info(f"Successfully deleted block {block_id}")
     return None
\ No newline at end of file
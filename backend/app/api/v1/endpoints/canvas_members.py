@@ -21,6 +21,7 @@ from app.db.queries.canvas.canvas_member_queries import (
 )
 # Impor exceptions
 from app.core.exceptions import DatabaseError, NotFoundError
+from app.services.access_cache import access_cache, SCOPE_CANVAS
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +108,7 @@ async def invite_member_to_canvas(
             user_id=payload.user_id,
             role=payload.role
         )
+        await access_cache.invalidate(SCOPE_CANVAS, canvas_id, payload.user_id)
         return new_member_access
         
     except NotFoundError as e: #
@@ -6,7 +6,6 @@ import json
 import uuid
 from uuid   import UUID, uuid4
 from xmlrpc import client
-import tiktoken
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
 from fastapi.responses import StreamingResponse
@@ -26,6 +25,7 @@ from app.core.dependencies import (
     LangGraphAgentDep 
 )
 from app.services.chat_engine.chat_service import ChatService
+from app.services.chat_engine.helpers import TokenCounter
 
 from app.models.user import User, SubscriptionTier
 from app.services.chat_engine.agent_state import AgentState 
@@ -40,17 +40,9 @@ from app.core.exceptions import DatabaseError, NotFoundError
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Inisialisasi Tokenizer
-try:
-    TOKENIZER = tiktoken.get_encoding("cl100k_base")
-    def _count_tokens(text: str) -> int:
-        if not text: return 0
-        return len(TOKENIZER.encode(text))
-except Exception:
-    logger.warning("Tiktoken (cl100k_base) tidak ditemukan. Estimasi token tidak akan akurat.")
-    def _count_tokens(text: str) -> int:
-        if not text: return 0
-        return len(text) // 4
+# Token counting lewat TokenCounter bersama (tokenizer tunggal + cache per konten)
+def _count_tokens(text: str) -> int:
+    return TokenCounter.count_tokens(text)
 
 # --- Helper Pemuat Riwayat (v3.2) ---
 async def get_chat_history(client, user_id, conversation_id) -> List[BaseMessage]:
@@ -17,6 +17,7 @@ from app.core.dependencies import AuthInfoDep
 from app.db.queries.workspace import respond_to_workspace_invitation
 # Impor exceptions
 from app.core.exceptions import DatabaseError, NotFoundError
+from app.services.access_cache import access_cache
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +64,10 @@ async def respond_to_workspace_invite(
         # Fallback jika logika tidak mengembalikan hasil
         if not result:
              raise HTTPException(status_code=500, detail="Gagal memproses undangan.")
+
+        # [BARU] Undangan diterima -> buang keputusan akses (termasuk negatif) user ini
+        if result.get("workspace_id"):
+            await access_cache.invalidate_workspace_member(result["workspace_id"], user.id)
              
         # Jika berhasil 'accept', result berisi data member baru
         # Jika berhasil 'reject', result berisi {"status": "rejected"}
@@ -4,11 +4,11 @@
 import logging
 import asyncio
 from uuid import UUID
-import json
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sse_starlette.sse import EventSourceResponse # Perlu 'pip install sse-starlette'
 
 from app.models.user import User
+from app.core.utils import serialization
 from app.core.dependencies import get_current_user
 from app.services.notification_service import send_notification_to_user #
 
@@ -54,7 +54,7 @@ async def notifications_stream(
                 # Format pesan sebagai event SSE
                 yield {
                     "event": message.get("type", "notification"),
-                    "data": json.dumps(message.get("payload", {}))
+                    "data": serialization.dumps(message.get("payload", {}))
                 }
         except asyncio.CancelledError:
             logger.info(f"SSE stream untuk user {user_id} dibatalkan.")
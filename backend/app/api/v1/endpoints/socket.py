@@ -1,22 +1,26 @@
 # File: backend/app/api/v1/endpoints/socket.py
 # (DIREFACTOR untuk Redis Pub/Sub)
 
-import json
+import functools
 import logging
 from typing import Dict, Any, List, Optional
 from uuid import UUID
 import asyncio
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 
+from app.core.config import settings
+from app.core.utils import serialization
 from app.core.dependencies import get_current_user_and_client
 from app.models.user import User
 from app.db.supabase_client import get_supabase_admin_async_client
 from app.services.canvas.sync_manager import CanvasSyncManager
 from app.services.canvas.lexorank_service import LexoRankService
+from app.services.canvas.mutation_batcher import MutationBatcher, MutationRequest
+from app.services.canvas.embedding_debouncer import embedding_job_debouncer
+from app.services.broadcast import broadcast_to_canvas
 from app.services.redis_rate_limiter import rate_limiter #
 from app.services.redis_pubsub import redis_pubsub_manager
 from app.core.exceptions import DatabaseError
-from app.db.queries.canvas import block_queries
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -63,98 +67,149 @@ async def _validate_canvas_access(canvas_id: UUID, user: User) -> bool:
         return False
 
 async def _pubsub_listener(websocket: WebSocket, canvas_id: UUID, user_id: UUID):
-    # (Fungsi ini tidak berubah dari refactor sebelumnya)
     channel = f"canvas:{str(canvas_id)}"
     try:
-        async for message in redis_pubsub_manager.subscribe(channel):
-            exclude_user_id = message.pop("_exclude_user_id", None)
-            if exclude_user_id and str(user_id) == exclude_user_id:
+        # Frame sudah di-serialize sekali oleh publisher; payload dikirim apa adanya
+        async for frame in redis_pubsub_manager.subscribe_frames(channel):
+            if frame.is_excluded(user_id):
                 continue
-            await websocket.send_text(json.dumps(message))
+            await websocket.send_text(frame.payload)
     except WebSocketDisconnect:
         logger.info(f"PubSub listener: WebSocket disconnected for user {user_id}")
     except Exception as e:
         logger.error(f"Error di PubSub listener: {e}", exc_info=True)
         
+async def _process_mutation_requests(
+    websocket: WebSocket,
+    canvas_id: UUID,
+    user_id: UUID,
+    requests: List[MutationRequest]
+):
+    """
+    Handler batch untuk MutationBatcher: semua op yang terkumpul dalam satu
+    jendela waktu dieksekusi dengan 1 RPC (yang juga mengembalikan baris
+    block untuk broadcast), lalu job embedding diantrikan dengan 1 insert.
+    """
+    payloads = [p for r in requests for p in r.payloads]
+    try:
+        results = await canvas_sync_manager.handle_block_mutation_batch(
+            canvas_id, user_id, payloads
+        )
+    except Exception as e:
+        logger.error(f"Gagal memproses batch mutasi ({len(payloads)} op): {e}", exc_info=True)
+        await canvas_sync_manager._send_error_to_user(canvas_id, user_id, f"Error: {e}")
+        return
+
+    applied = [
+        (payload, result) for payload, result in zip(payloads, results)
+        if result.get("status") == "success" and not result.get("reason")
+    ]
+
+    if applied:
+        for payload, result in applied:
+            await broadcast_to_canvas(canvas_id, {
+                "type": "mutation",
+                "payload": {
+                    "action": payload.get("action"),
+                    "block_id": result["block_id"],
+                    "block": result.get("block"),
+                    "server_seq": result.get("server_seq"),
+                    "client_op_id": payload.get("client_op_id")
+                }
+            })
+
+        # Job embedding di-debounce per block (live typing -> 1 job setelah diam)
+        embed_contents = {
+            str(r["block_id"]): p["update_data"]["content"] for p, r in applied
+            if p.get("action") in ["create", "update"] and "content" in (p.get("update_data") or {})
+        }
+        if embed_contents:
+            await embedding_job_debouncer.schedule(canvas_id, user_id, embed_contents)
+
+        if any(
+            p.get("action") in ["create", "update"] and "y_order" in (p.get("update_data") or {})
+            for p, _ in applied
+        ):
+            await canvas_sync_manager.lexorank_service.check_rebalance_needed(canvas_id)
+
+    # Kirim hasil ke pengirim: per-op untuk 'mutation_batch',
+    # error konflik/gagal untuk 'mutation' tunggal (perilaku lama).
+    offset = 0
+    for request in requests:
+        request_results = results[offset:offset + len(request.payloads)]
+        offset += len(request.payloads)
+
+        if request.is_batch:
+            await websocket.send_text(serialization.dumps({
+                "type": "mutation_batch_result",
+                "payload": {"batch_id": request.batch_id, "results": request_results}
+            }))
+            continue
+
+        for result in request_results:
+            if result.get("status") in ("conflict", "failed"):
+                await canvas_sync_manager._send_error_to_user(
+                    canvas_id, user_id, canvas_sync_manager.single_mutation_result(result)
+                )
+        
 async def _client_listener(websocket: WebSocket, canvas_id: UUID, user: User):
     """
     Tugas yang mendengarkan pesan dari Klien WebSocket.
-    (DIREFACTOR untuk menangani return value)
+    [BARU] Mutasi ('mutation' & 'mutation_batch') tidak lagi diproses satu
+    per satu, tetapi dikumpulkan oleh MutationBatcher dan dieksekusi per batch.
     """
     user_id = user.id
+    batcher = MutationBatcher(
+        functools.partial(_process_mutation_requests, websocket, canvas_id, user_id),
+        window_ms=settings.CANVAS_MUTATION_BATCH_WINDOW_MS,
+        max_ops=settings.CANVAS_MUTATION_BATCH_MAX_OPS,
+    )
+    batcher_task = asyncio.create_task(batcher.run())
     try:
         while True:
-            if not await rate_limiter.check_user_limit(user_id, limit=10, window_seconds=60):
-                await websocket.send_text(json.dumps({"type": "error", "message": "Rate limit exceeded"}))
-                continue
-                
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = serialization.loads(data)
             
             payload = message.get("payload", {})
+            ops = (payload.get("ops") or []) if message.get("type") == "mutation_batch" else None
+
+            if ops is not None and len(ops) > settings.CANVAS_MUTATION_BATCH_MAX_OPS:
+                await websocket.send_text(serialization.dumps({
+                    "type": "error",
+                    "message": f"mutation_batch maksimal {settings.CANVAS_MUTATION_BATCH_MAX_OPS} op"
+                }))
+                continue
+
+            # Biaya rate limit per op: satu mutation_batch berisi N op = N pesan
+            if not await rate_limiter.check_socket_limit(user_id, cost=len(ops) if ops is not None else 1):
+                await websocket.send_text(serialization.dumps({
+                    "type": "error",
+                    "message": "Rate limit exceeded",
+                    "batch_id": payload.get("batch_id") if ops is not None else None
+                }))
+                continue
             
             if message.get("type") == "mutation":
-                # [REFACTOR] Tangani return value dari service
-                try:
-                    result = await canvas_sync_manager.handle_block_mutation(
-                        canvas_id, user_id, payload
-                    )
-                    
-                    if result.get("status") == "success":
-                        # Jika sukses, WebSocket bertanggung jawab untuk broadcast
-                        block_id = UUID(payload.get("block_id") or result.get("block_id"))
-                        action = payload.get("action")
-                        
-                        block = None
-                        if action != "delete":
-                            admin_client = await get_supabase_admin_async_client()
-                            block = await block_queries.get_block_by_id_rpc(admin_client, block_id)
-
-                        await broadcast_to_canvas(canvas_id, {
-                            "type": "mutation",
-                            "payload": {
-                                "action": action,
-                                "block_id": str(block_id),
-                                "block": block,
-                                "server_seq": result.get("server_seq"),
-                                "client_op_id": payload.get("client_op_id")
-                            }
-                        })
-                        
-                        # Antrikan job (logika dipindahkan dari manager)
-                        if action in ["create", "update"] and "content" in payload.get("update_data", {}):
-                            admin_client = await get_supabase_admin_async_client()
-                            await block_queries.queue_embedding_job_db(admin_client, block_id, "blocks")
-                        
-                        if action in ["create", "update"] and "y_order" in payload.get("update_data", {}):
-                            await lexorank_service.check_rebalance_needed(canvas_id)
-                    
-                    elif result.get("status") == "conflict":
-                        # Kirim error konflik HANYA ke user ini
-                        await canvas_sync_manager._send_error_to_user(
-                            canvas_id, user_id, result
-                        )
-                    
-                    # (Status 'duplicate_ignored' tidak perlu melakukan apa-apa)
-
-                except Exception as e:
-                    # Tangani error dari service
-                    logger.error(f"Gagal memproses mutasi: {e}", exc_info=True)
-                    await canvas_sync_manager._send_error_to_user(
-                        canvas_id, user_id, f"Error: {e}"
-                    )
+                batcher.submit(MutationRequest(payloads=[payload]))
+
+            elif message.get("type") == "mutation_batch":
+                batcher.submit(MutationRequest(
+                    payloads=ops, batch_id=payload.get("batch_id"), is_batch=True
+                ))
             
             elif message.get("type") == "presence":
                 await canvas_sync_manager.handle_presence_update(
                     canvas_id, user_id, payload
                 )
             elif message.get("type") == "ping":
-                await websocket.send_text(json.dumps({"type": "pong"}))
+                await websocket.send_text(serialization.dumps({"type": "pong"}))
             
     except WebSocketDisconnect:
         logger.info(f"Client listener: WebSocket disconnected for user {user_id}")
     except Exception as e:
         logger.error(f"Error di client listener: {e}", exc_info=True)
+    finally:
+        batcher_task.cancel()
 
 router.websocket("/ws/canvas/{canvas_id}")
 async def websocket_canvas_sync(
@@ -27,6 +27,7 @@ from app.db.queries.workspace import (
 from app.core.exceptions import DatabaseError, NotFoundError
 # --- [BARU] Impor rate limiter untuk proteksi email ---
 from app.services.redis_rate_limiter import rate_limiter
+from app.services.access_cache import access_cache
 
 logger = logging.getLogger(__name__)
 
@@ -322,6 +323,7 @@ async def update_member_role(
             user_id_to_update=user_id_to_update,
             new_role=payload.role
         )
+        await access_cache.invalidate_workspace_member(workspace_id, user_id_to_update)
         return updated_member
 
     except NotFoundError as e:
@@ -383,6 +385,7 @@ async def remove_member_from_workspace(
             workspace_id=workspace_id,
             user_id_to_remove=user_id_to_remove
         )
+        await access_cache.invalidate_workspace_member(workspace_id, user_id_to_remove)
         # Sukses, kembalikan 204 No Content
         return
 
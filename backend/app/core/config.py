@@ -1,7 +1,7 @@
 # File: backend/app/core/config.py
 # (Disesuaikan untuk arsitektur 'model-dinamis' dari frontend)
 
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from uuid import UUID
@@ -23,8 +23,93 @@ class Settings(BaseSettings):
     SEEDING_ADMIN_KEY: str  
     AI_AGENT_USER_ID: UUID 
     
+    # Auth - verifikasi token
+    # "local": verifikasi JWT in-process (secret/JWKS), fallback ke remote jika ambigu.
+    # "remote": selalu validasi via Supabase /auth/v1/user.
+    AUTH_VERIFICATION_MODE: str = Field(default="local", env="AUTH_VERIFICATION_MODE")
+    AUTH_JWT_AUDIENCE: str = Field(default="authenticated", env="AUTH_JWT_AUDIENCE")
+    AUTH_JWKS_CACHE_TTL_SECONDS: int = Field(default=600, env="AUTH_JWKS_CACHE_TTL_SECONDS")
+    AUTH_JWT_LEEWAY_SECONDS: int = Field(default=10, env="AUTH_JWT_LEEWAY_SECONDS")
+
+    # Pool klien Supabase per-user (lihat app/db/supabase_client_pool.py)
+    SUPABASE_CLIENT_POOL_MAX_SIZE: int = Field(default=1024, env="SUPABASE_CLIENT_POOL_MAX_SIZE")
+    SUPABASE_CLIENT_POOL_MAX_CONNECTIONS: int = Field(default=100, env="SUPABASE_CLIENT_POOL_MAX_CONNECTIONS")
+
+    # Cache profil user (lihat app/services/user/profile_cache.py)
+    USER_PROFILE_CACHE_LOCAL_TTL_SECONDS: int = Field(default=30, env="USER_PROFILE_CACHE_LOCAL_TTL_SECONDS")
+    USER_PROFILE_CACHE_REDIS_TTL_SECONDS: int = Field(default=300, env="USER_PROFILE_CACHE_REDIS_TTL_SECONDS")
+    USER_PROFILE_CACHE_MAX_SIZE: int = Field(default=10000, env="USER_PROFILE_CACHE_MAX_SIZE")
+
+    # Cache keputusan akses workspace/canvas (lihat app/services/access_cache.py)
+    ACCESS_CACHE_TTL_SECONDS: int = Field(default=15, env="ACCESS_CACHE_TTL_SECONDS")
+    ACCESS_CACHE_NEGATIVE_TTL_SECONDS: int = Field(default=5, env="ACCESS_CACHE_NEGATIVE_TTL_SECONDS")
+    ACCESS_CACHE_MAX_SIZE: int = Field(default=20000, env="ACCESS_CACHE_MAX_SIZE")
+    ACCESS_CACHE_NEGATIVE_MAX_SIZE: int = Field(default=2000, env="ACCESS_CACHE_NEGATIVE_MAX_SIZE")
+
+    # Batching mutasi canvas via WebSocket (lihat app/services/canvas/mutation_batcher.py)
+    CANVAS_MUTATION_BATCH_WINDOW_MS: float = Field(default=5.0, env="CANVAS_MUTATION_BATCH_WINDOW_MS")
+    CANVAS_MUTATION_BATCH_MAX_OPS: int = Field(default=50, env="CANVAS_MUTATION_BATCH_MAX_OPS")
+    # Rate limit WebSocket canvas per user, dihitung per op (mutation_batch N op = N)
+    CANVAS_WS_RATE_LIMIT_OPS: int = Field(default=600, env="CANVAS_WS_RATE_LIMIT_OPS")
+    CANVAS_WS_RATE_LIMIT_WINDOW_SECONDS: int = Field(default=60, env="CANVAS_WS_RATE_LIMIT_WINDOW_SECONDS")
+
+    # Cache riwayat percakapan chat (lihat app/services/chat_engine/helpers/history_cache.py)
+    CHAT_HISTORY_CACHE_LOCAL_TTL_SECONDS: int = Field(default=300, env="CHAT_HISTORY_CACHE_LOCAL_TTL_SECONDS")
+    CHAT_HISTORY_CACHE_REDIS_TTL_SECONDS: int = Field(default=3600, env="CHAT_HISTORY_CACHE_REDIS_TTL_SECONDS")
+    CHAT_HISTORY_CACHE_MAX_CONVERSATIONS: int = Field(default=500, env="CHAT_HISTORY_CACHE_MAX_CONVERSATIONS")
+    CHAT_HISTORY_CACHE_MAX_MESSAGES: int = Field(default=1000, env="CHAT_HISTORY_CACHE_MAX_MESSAGES")
+
+    # Cache embedding per (model, task_type, konten) (lihat app/services/embedding_cache.py)
+    EMBEDDING_CACHE_LOCAL_TTL_SECONDS: int = Field(default=3600, env="EMBEDDING_CACHE_LOCAL_TTL_SECONDS")
+    EMBEDDING_CACHE_REDIS_TTL_SECONDS: int = Field(default=604800, env="EMBEDDING_CACHE_REDIS_TTL_SECONDS")
+    EMBEDDING_CACHE_MAX_SIZE: int = Field(default=5000, env="EMBEDDING_CACHE_MAX_SIZE")
+
+    # Worker embedding mode batch (lihat app/workers/embedding.py); 1 = satu job per iterasi
+    EMBEDDING_WORKER_BATCH_MAX_JOBS: int = Field(default=32, env="EMBEDDING_WORKER_BATCH_MAX_JOBS")
+    EMBEDDING_WORKER_BATCH_WAIT_MS: float = Field(default=50.0, env="EMBEDDING_WORKER_BATCH_WAIT_MS")
+    # Interval polling antrian adil Redis saat kosong / mengisi batch
+    EMBEDDING_WORKER_POLL_INTERVAL_MS: float = Field(default=100.0, env="EMBEDDING_WORKER_POLL_INTERVAL_MS")
+    # Pool consumer embedding per proses & batas panggilan provider paralel
+    EMBEDDING_WORKER_CONCURRENCY: int = Field(default=4, env="EMBEDDING_WORKER_CONCURRENCY")
+    EMBEDDING_WORKER_MAX_IN_FLIGHT: int = Field(default=4, env="EMBEDDING_WORKER_MAX_IN_FLIGHT")
+
+    # Debounce job embedding per block (lihat app/services/canvas/embedding_debouncer.py)
+    EMBEDDING_DEBOUNCE_DELAY_SECONDS: float = Field(default=3.0, env="EMBEDDING_DEBOUNCE_DELAY_SECONDS")
+    EMBEDDING_DEBOUNCE_POLL_INTERVAL_SECONDS: float = Field(default=0.5, env="EMBEDDING_DEBOUNCE_POLL_INTERVAL_SECONDS")
+    EMBEDDING_DEBOUNCE_MAX_FLUSH: int = Field(default=200, env="EMBEDDING_DEBOUNCE_MAX_FLUSH")
+    # Lease klaim flush: jika worker mati sebelum job diantrikan, klaim dikembalikan setelah ini
+    EMBEDDING_DEBOUNCE_LEASE_SECONDS: float = Field(default=60.0, env="EMBEDDING_DEBOUNCE_LEASE_SECONDS")
+    EMBEDDING_CONTENT_HASH_TTL_SECONDS: int = Field(default=2592000, env="EMBEDDING_CONTENT_HASH_TTL_SECONDS")
+
+    # Cache token count per konten (lihat app/services/chat_engine/helpers/token_counter.py)
+    TOKEN_COUNT_CACHE_MAX_SIZE: int = Field(default=50000, env="TOKEN_COUNT_CACHE_MAX_SIZE")
+
+    # Reranker RAG (lihat app/services/chat_engine/reranker.py)
+    # "local": NumPy cosine + BM25 (CPU, tanpa jaringan) | "cohere" | "llm": LLM flash (perilaku lama)
+    RERANKER_BACKEND: Literal["local", "cohere", "llm"] = Field(default="local", env="RERANKER_BACKEND")
+    # Bobot skor cosine pada fusi reranker lokal (sisanya BM25)
+    RERANKER_DENSE_WEIGHT: float = Field(default=0.7, env="RERANKER_DENSE_WEIGHT")
+    COHERE_API_KEY: Optional[str] = Field(default=None, env="COHERE_API_KEY")
+
+    # Cache respons semantik di depan agent_node (lihat app/services/semantic_response_cache.py)
+    # Butuh Redis Stack (RediSearch + RedisJSON)
+    CHAT_SEMANTIC_CACHE_ENABLED: bool = Field(default=False, env="CHAT_SEMANTIC_CACHE_ENABLED")
+    CHAT_SEMANTIC_CACHE_VECTOR_DIMS: int = Field(default=768, env="CHAT_SEMANTIC_CACHE_VECTOR_DIMS")
+    CHAT_SEMANTIC_CACHE_DISTANCE_THRESHOLD: float = Field(default=0.08, env="CHAT_SEMANTIC_CACHE_DISTANCE_THRESHOLD")
+    CHAT_SEMANTIC_CACHE_TTL_SIMPLE_CHAT_SECONDS: int = Field(default=3600, env="CHAT_SEMANTIC_CACHE_TTL_SIMPLE_CHAT_SECONDS")
+    CHAT_SEMANTIC_CACHE_TTL_RAG_QUERY_SECONDS: int = Field(default=600, env="CHAT_SEMANTIC_CACHE_TTL_RAG_QUERY_SECONDS")
+    CHAT_SEMANTIC_CACHE_MIN_QUERY_CHARS: int = Field(default=12, env="CHAT_SEMANTIC_CACHE_MIN_QUERY_CHARS")
+    # 'simple_chat': jumlah pesan riwayat sebelum pesan user yang ikut menjadi kunci cache
+    CHAT_SEMANTIC_CACHE_CONTEXT_MESSAGES: int = Field(default=4, env="CHAT_SEMANTIC_CACHE_CONTEXT_MESSAGES")
+    # Daftar user yang dapat membaca canvas (untuk invalidasi) di-cache sesingkat ini
+    CHAT_SEMANTIC_CACHE_CANVAS_MEMBERS_TTL_SECONDS: float = Field(default=30.0, env="CHAT_SEMANTIC_CACHE_CANVAS_MEMBERS_TTL_SECONDS")
+
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
+    # Subscriber Pub/Sub bersama: ukuran queue per consumer & kebijakan consumer lambat
+    # ("drop_oldest" | "disconnect")
+    PUBSUB_CONSUMER_QUEUE_SIZE: int = Field(default=256, env="PUBSUB_CONSUMER_QUEUE_SIZE")
+    PUBSUB_SLOW_CONSUMER_POLICY: str = Field(default="drop_oldest", env="PUBSUB_SLOW_CONSUMER_POLICY")
 
     # Email
     SMTP_HOST: str = ""
@@ -37,6 +122,11 @@ class Settings(BaseSettings):
 
     # Feature Flag
     LANGGRAPH_ROLLOUT_PERCENT: float = Field(default=1.0)
+    # Retrieval RAG dijalankan paralel dengan classify_intent (lihat nodes/speculative.py)
+    CHAT_SPECULATIVE_RETRIEVAL: bool = Field(default=False, env="CHAT_SPECULATIVE_RETRIEVAL")
+    # "split": classify_intent -> query_transform (2 panggilan LLM)
+    # "combined": route_and_transform (1 panggilan LLM untuk intent + kueri RAG)
+    CHAT_ROUTER_MODE: Literal["split", "combined"] = Field(default="split", env="CHAT_ROUTER_MODE")
 
     # Debug mode
     DEBUG: bool = False
@@ -67,6 +157,41 @@ class Settings(BaseSettings):
         env="DEFAULT_TEMPERATURE"
     )
     
+    # Checkpointer LangGraph (Redis async, delta msgpack + TTL); dibutuhkan untuk HiTL resume
+    CHAT_CHECKPOINT_ENABLED: bool = Field(default=False, env="CHAT_CHECKPOINT_ENABLED")
+    CHAT_CHECKPOINT_TTL_SECONDS: int = Field(default=604800, env="CHAT_CHECKPOINT_TTL_SECONDS")
+    CHAT_CHECKPOINT_KEEP_LAST: int = Field(default=50, env="CHAT_CHECKPOINT_KEEP_LAST")
+    # Konsumsi event graph untuk SSE chat: "lean" (stream_mode messages/updates/custom) | "events_v1" (astream_events v1, perilaku lama)
+    CHAT_STREAM_MODE: str = Field(default="lean", env="CHAT_STREAM_MODE")
+    # Fraksi request yang prompt-nya di-log (hanya jika level DEBUG aktif); 0 = mati
+    CHAT_PROMPT_LOG_SAMPLE_RATE: float = Field(default=0.0, env="CHAT_PROMPT_LOG_SAMPLE_RATE")
+    # Frame SSE chat: token digabung per N karakter / M ms; antrean frame per stream dibatasi
+    CHAT_STREAM_FRAME_MAX_CHARS: int = Field(default=64, env="CHAT_STREAM_FRAME_MAX_CHARS")
+    CHAT_STREAM_FRAME_MAX_DELAY_MS: float = Field(default=20.0, env="CHAT_STREAM_FRAME_MAX_DELAY_MS")
+    CHAT_STREAM_MAX_BUFFERED_FRAMES: int = Field(default=32, env="CHAT_STREAM_MAX_BUFFERED_FRAMES")
+
+    # Registry klien LLM (lihat app/services/chat_engine/llm_provider.py)
+    LLM_CLIENT_CACHE_MAX_SIZE: int = Field(default=64, env="LLM_CLIENT_CACHE_MAX_SIZE")
+    LLM_CLIENT_IDLE_TTL_SECONDS: int = Field(default=1800, env="LLM_CLIENT_IDLE_TTL_SECONDS")
+    # Klien fallback Gemini (provider asli gagal init) hanya di-cache selama ini, lalu provider asli dicoba lagi
+    LLM_CLIENT_FALLBACK_TTL_SECONDS: int = Field(default=30, env="LLM_CLIENT_FALLBACK_TTL_SECONDS")
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(default=100, env="LLM_HTTP_MAX_CONNECTIONS")
+    # Model tambahan (dipisah koma) yang kliennya dibuat saat startup, selain DEFAULT_MODEL
+    LLM_WARMUP_MODELS: str = Field(default="", env="LLM_WARMUP_MODELS")
+    
+    # Routing berbasis kesehatan provider (lihat app/services/chat_engine/provider_router.py)
+    # Kandidat tambahan (dipisah koma) setelah DEFAULT_MODEL saat model yang diminta terdegradasi
+    LLM_ROUTER_FALLBACK_MODELS: str = Field(default="", env="LLM_ROUTER_FALLBACK_MODELS")
+    LLM_ROUTER_FAILURE_THRESHOLD: int = Field(default=3, env="LLM_ROUTER_FAILURE_THRESHOLD")
+    LLM_ROUTER_ERROR_RATE_THRESHOLD: float = Field(default=0.5, env="LLM_ROUTER_ERROR_RATE_THRESHOLD")
+    LLM_ROUTER_MIN_SAMPLES: int = Field(default=10, env="LLM_ROUTER_MIN_SAMPLES")
+    LLM_ROUTER_OPEN_SECONDS: float = Field(default=30.0, env="LLM_ROUTER_OPEN_SECONDS")
+    LLM_ROUTER_DEGRADED_TTFT_SECONDS: float = Field(default=15.0, env="LLM_ROUTER_DEGRADED_TTFT_SECONDS")
+    # Hedging: mulai model backup jika first token belum datang setelah p95 TTFT (dibatasi min/max)
+    LLM_HEDGE_ENABLED: bool = Field(default=False, env="LLM_HEDGE_ENABLED")
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = Field(default=1.0, env="LLM_HEDGE_MIN_DELAY_SECONDS")
+    LLM_HEDGE_MAX_DELAY_SECONDS: float = Field(default=6.0, env="LLM_HEDGE_MAX_DELAY_SECONDS")
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding='utf-8'
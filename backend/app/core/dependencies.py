@@ -1,6 +1,7 @@
 # File: backend/app/core/dependencies.py
 # (PERBAIKAN v3.2 - Menghapus semua impor v1)
 
+import copy
 import logging
 import asyncio
 from fastapi import Depends, HTTPException, status, Request
@@ -11,10 +12,13 @@ from fastapi import Path
 from supabase.client import AsyncClient, create_async_client
 from postgrest.exceptions import APIError
 import httpx
+from jose import jwt
+from jose.exceptions import JWTError
 
 from app.core.config import settings
 from langchain_core.runnables import Runnable
-from app.core.exceptions import DatabaseError, NotFoundError, PermissionError
+from app.core.exceptions import DatabaseError, NotFoundError, PermissionError, TokenVerificationError
+from app.core.jwt_verifier import SupabaseJWTVerifier
 # [MODIFIKASI v3.2] Impor agent v3.2
 from app.services.chat_engine.langgraph_agent import compiled_langgraph_agent 
 from app.models.user import User, SubscriptionTier
@@ -27,6 +31,7 @@ from app.db.queries.canvas import canvas_queries, canvas_member_queries
 from app.db.queries.workspace import workspace_queries
 from app.db.queries.calendar import calendar_queries
 from app.db.supabase_client import get_supabase_admin_async_client
+from app.db.supabase_client_pool import supabase_client_pool
 
 # --- Impor Service ---
 from app.services.interfaces import IEmbeddingService
@@ -37,6 +42,8 @@ from app.services.conversations_list_service import ConversationListService
 from app.services.conversation_messages_service import ConversationMessagesService
 from app.services.title_stream_service import TitleStreamService
 from app.services.user.user_service import UserService
+from app.services.user.profile_cache import user_profile_cache
+from app.services.access_cache import access_cache, SCOPE_WORKSPACE, SCOPE_CANVAS
 from app.services.workspace.workspace_service import WorkspaceService
 from app.services.calendar.freebusy_service import FreeBusyService
 from app.services.calendar.calendar_service import CalendarService
@@ -58,6 +65,15 @@ validation_client = httpx.Client(
     headers={"apikey": settings.SUPABASE_ANON_KEY}
 )
 
+# [BARU] Verifier JWT lokal (secret & JWKS di-cache di memori)
+jwt_verifier = SupabaseJWTVerifier(
+    jwt_secret=settings.SUPABASE_JWT_SECRET,
+    jwks_url=f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json",
+    audience=settings.AUTH_JWT_AUDIENCE,
+    jwks_cache_ttl_seconds=settings.AUTH_JWKS_CACHE_TTL_SECONDS,
+    leeway_seconds=settings.AUTH_JWT_LEEWAY_SECONDS,
+)
+
 # Klien Anonim Asinkron (Singleton)
 supabase_anon_client: Optional[AsyncClient] = None
 
@@ -83,6 +99,47 @@ class GuestUser:
 # === FUNGSI DEPENDENSI (Diperbarui untuk Async) ===
 # =======================================================================
 
+def _validate_token_remote_sync(token: str) -> dict:
+    """Validasi token ke Supabase /auth/v1/user (dijalankan di thread)."""
+    headers = {"Authorization": f"Bearer {token}"}
+    response = validation_client.get("/user", headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+def _get_token_expiry(token: str) -> Optional[float]:
+    """Membaca claim 'exp' dari token yang SUDAH tervalidasi."""
+    try:
+        return jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return None
+
+async def _resolve_user_id_from_token(token: str) -> Tuple[str, Optional[float]]:
+    """
+    Mengembalikan (user_id, exp) dari token.
+    Mode 'local' memverifikasi JWT in-process dan hanya fallback ke
+    validasi remote jika hasil verifikasi lokal ambigu.
+    """
+    if settings.AUTH_VERIFICATION_MODE == "local":
+        try:
+            claims = await jwt_verifier.verify(token)
+        except TokenVerificationError as e:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Token validation failed: {e.message}")
+        if claims:
+            return claims["sub"], claims.get("exp")
+        logger.debug("Verifikasi JWT lokal ambigu, fallback ke validasi remote.")
+
+    try:
+        user_response_json = await asyncio.to_thread(_validate_token_remote_sync, token)
+    except httpx.HTTPStatusError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token validation failed")
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Could not validate token: {str(e)}")
+
+    user_id = user_response_json.get("id")
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token data")
+    return user_id, _get_token_expiry(token)
+
 async def get_current_user_and_client(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Dict[str, Any]:
@@ -91,46 +148,28 @@ async def get_current_user_and_client(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
         
     token = credentials.credentials
-    user_id: Optional[str] = None
-    user_response_json: Optional[dict] = None 
-    
-    try:
-        def sync_validate_token():
-            headers = {"Authorization": f"Bearer {token}"}
-            response = validation_client.get("/user", headers=headers)
-            response.raise_for_status()
-            return response.json()
-
-        user_response_json = await asyncio.to_thread(sync_validate_token)
-        
-        user_id = user_response_json.get("id")
-        if not user_id:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token data")
-        logger.debug(f"Token valid untuk user_id: {user_id}")
-        
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token validation failed")
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Could not validate token: {str(e)}")
+    user_id, token_expires_at = await _resolve_user_id_from_token(token)
+    logger.debug(f"Token valid untuk user_id: {user_id}")
         
     try:
-        authed_client: AsyncClient = await create_async_client(
-            supabase_url=settings.SUPABASE_URL, 
-            supabase_key=settings.SUPABASE_ANON_KEY
-        )
-        
-        await authed_client.auth.set_session(access_token=token, refresh_token="dummy_refresh_token")
+        # [BARU] Klien per-user diambil dari pool (transport httpx bersama)
+        authed_client: AsyncClient = await supabase_client_pool.get_client(token, token_expires_at)
+
+        # [BARU] Cek cache profil (lokal -> Redis) sebelum query tabel users
+        profile_data = await user_profile_cache.get(user_id)
+        if profile_data is None:
+            profile_response = await authed_client.table("users") \
+                .select("*") \
+                .eq("user_id", user_id) \
+                .single() \
+                .execute()
+                
+            if not profile_response.data:
+                raise HTTPException(status_code=404, detail="User profile not found in internal database.")
+                
+            profile_data = profile_response.data
+            await user_profile_cache.set(user_id, profile_data)
 
-        profile_response = await authed_client.table("users") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .single() \
-            .execute()
-            
-        if not profile_response.data:
-            raise HTTPException(status_code=404, detail="User profile not found in internal database.")
-            
-        profile_data = profile_response.data
         user_model = User.model_validate(profile_data)
         
         logger.debug("Otentikasi async dan pengambilan profil berhasil.")
@@ -191,10 +230,14 @@ async def get_current_workspace_member(
 ):
     current_user: User = auth_info["user"]
     authed_client: AsyncClient = auth_info["client"]
-    # [REFACTOR] Menggunakan fungsi query
-    membership = await workspace_queries.check_user_membership(
-        authed_client, workspace_id, current_user.id
-    )
+    # [BARU] Cek cache keputusan akses sebelum query keanggotaan
+    hit, membership = access_cache.get(SCOPE_WORKSPACE, workspace_id, current_user.id)
+    if not hit:
+        # [REFACTOR] Menggunakan fungsi query
+        membership = await workspace_queries.check_user_membership(
+            authed_client, workspace_id, current_user.id
+        )
+        access_cache.set(SCOPE_WORKSPACE, workspace_id, current_user.id, membership)
     if not membership:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this workspace.")
     return {
@@ -227,9 +270,35 @@ async def get_canvas_access(
     NotFoundError dan PermissionError.
     """
     service = CanvasListService(auth_info)
+    user_id = getattr(auth_info["user"], "id", None)
     
     try:
-        access_info = await service.get_canvas_with_access(canvas_id)
+        # [BARU] Cache keputusan akses (tamu tidak di-cache)
+        # Penolakan ikut di-cache (TTL negatif): pesan PermissionError disimpan
+        # sebagai `denial`, canvas tidak ditemukan disimpan sebagai True.
+        hit, cached_access, denial = (
+            access_cache.lookup(SCOPE_CANVAS, canvas_id, user_id) if user_id else (False, None, None)
+        )
+        if hit:
+            if cached_access is None:
+                if isinstance(denial, str):
+                    raise PermissionError(denial)
+                raise NotFoundError("canvas", str(canvas_id))
+            # Deep copy: dict `canvas` di dalamnya tidak boleh dibagi antar request
+            access_info = copy.deepcopy(cached_access)
+        else:
+            try:
+                access_info = await service.get_canvas_with_access(canvas_id)
+            except NotFoundError:
+                if user_id:
+                    access_cache.set(SCOPE_CANVAS, canvas_id, user_id, None)
+                raise
+            except PermissionError as e:
+                if user_id:
+                    access_cache.set(SCOPE_CANVAS, canvas_id, user_id, None, denial=e.message)
+                raise
+            if user_id:
+                access_cache.set(SCOPE_CANVAS, canvas_id, user_id, copy.deepcopy(access_info))
         access_info["client"] = auth_info["client"]
         access_info["user"] = auth_info["user"]
         return access_info
@@ -49,4 +49,13 @@ class PermissionError(Exception):
     """
     def __init__(self, message: str):
         self.message = message
-        super().__init__(message)
\ No newline at end of file
+        super().__init__(message)
+
+class TokenVerificationError(Exception):
+    """
+    Dilempar ketika access token pasti tidak valid
+    (signature salah, expired, atau claims tidak cocok).
+    """
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
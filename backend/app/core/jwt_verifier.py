@@ -0,0 +1,165 @@
+# File: backend/app/core/jwt_verifier.py
+# (FILE BARU - Verifikasi JWT lokal dengan cache secret/JWKS)
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+
+from app.core.exceptions import TokenVerificationError
+
+logger = logging.getLogger(__name__)
+
+# Algoritma simetris diverifikasi dengan JWT secret proyek Supabase,
+# algoritma asimetris diverifikasi dengan public key dari endpoint JWKS.
+SYMMETRIC_ALGORITHMS = {"HS256"}
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+
+
+class SupabaseJWTVerifier:
+    """
+    Memverifikasi access token Supabase secara lokal (in-process) tanpa
+    round trip ke `/auth/v1/user`.
+
+    - Token HS256 diverifikasi dengan JWT secret yang di-cache di memori.
+    - Token RS256/ES256 diverifikasi dengan JWKS yang di-cache (TTL) dan
+      di-refresh otomatis saat ditemukan `kid` baru (rotasi key).
+
+    `verify()` mengembalikan:
+    - dict claims  -> token valid.
+    - None         -> hasil ambigu (kid tidak dikenal, JWKS tidak bisa
+                      diambil, algoritma tidak didukung). Pemanggil harus
+                      fallback ke validasi remote.
+    Dan melempar `TokenVerificationError` jika token pasti tidak valid
+    (signature salah, expired, audience salah).
+    """
+
+    def __init__(
+        self,
+        jwt_secret: Optional[str],
+        jwks_url: Optional[str] = None,
+        audience: Optional[str] = "authenticated",
+        jwks_cache_ttl_seconds: int = 600,
+        jwks_min_refresh_interval_seconds: int = 30,
+        leeway_seconds: int = 10,
+        http_timeout_seconds: float = 5.0,
+    ):
+        self.jwt_secret = jwt_secret or None
+        self.jwks_url = jwks_url
+        self.audience = audience or None
+        self.jwks_cache_ttl_seconds = jwks_cache_ttl_seconds
+        self.jwks_min_refresh_interval_seconds = jwks_min_refresh_interval_seconds
+        self.leeway_seconds = leeway_seconds
+        self.http_timeout_seconds = http_timeout_seconds
+
+        # Cache JWKS: {kid: jwk_dict}
+        self._jwks: Dict[str, Dict[str, Any]] = {}
+        self._jwks_fetched_at: float = 0.0
+        self._jwks_lock = asyncio.Lock()
+
+    # --- JWKS Cache ---
+
+    def _jwks_is_stale(self) -> bool:
+        return (time.monotonic() - self._jwks_fetched_at) > self.jwks_cache_ttl_seconds
+
+    async def _refresh_jwks(self, force: bool = False) -> None:
+        """
+        Mengambil ulang JWKS. Hanya satu coroutine yang melakukan fetch
+        (single-flight), dan refresh paksa dibatasi oleh interval minimum
+        agar token dengan `kid` palsu tidak membanjiri endpoint JWKS.
+        """
+        if not self.jwks_url:
+            return
+
+        async with self._jwks_lock:
+            elapsed = time.monotonic() - self._jwks_fetched_at
+            if force and elapsed < self.jwks_min_refresh_interval_seconds:
+                return
+            if not force and not self._jwks_is_stale():
+                # Coroutine lain sudah me-refresh saat kita menunggu lock
+                return
+
+            try:
+                async with httpx.AsyncClient(timeout=self.http_timeout_seconds) as client:
+                    response = await client.get(self.jwks_url)
+                    response.raise_for_status()
+                    keys = response.json().get("keys", [])
+            except Exception as e:
+                logger.warning(f"Gagal mengambil JWKS dari {self.jwks_url}: {e}")
+                # Tandai waktu fetch agar tidak retry di setiap request
+                self._jwks_fetched_at = time.monotonic()
+                return
+
+            self._jwks = {k["kid"]: k for k in keys if k.get("kid")}
+            self._jwks_fetched_at = time.monotonic()
+            logger.info(f"JWKS diperbarui: {len(self._jwks)} key aktif.")
+
+    async def _get_jwk(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Mencari JWK berdasarkan `kid`, me-refresh cache jika perlu."""
+        if not kid:
+            return None
+        if self._jwks_is_stale():
+            await self._refresh_jwks()
+        jwk = self._jwks.get(kid)
+        if jwk is None:
+            # Kemungkinan key baru saja dirotasi
+            await self._refresh_jwks(force=True)
+            jwk = self._jwks.get(kid)
+        return jwk
+
+    # --- Verifikasi ---
+
+    def _decode(self, token: str, key: Any, algorithm: str) -> Dict[str, Any]:
+        options = {
+            "verify_aud": self.audience is not None,
+            "leeway": self.leeway_seconds,
+        }
+        try:
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience,
+                options=options,
+            )
+        except ExpiredSignatureError:
+            raise TokenVerificationError("Token expired")
+        except JWTClaimsError as e:
+            raise TokenVerificationError(f"Invalid token claims: {e}")
+        except JWTError as e:
+            raise TokenVerificationError(f"Invalid token signature: {e}")
+
+    async def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Memverifikasi signature dan expiry token secara lokal.
+        Lihat docstring kelas untuk arti nilai kembalian.
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise TokenVerificationError(f"Malformed token: {e}")
+
+        algorithm = header.get("alg")
+
+        if algorithm in SYMMETRIC_ALGORITHMS:
+            if not self.jwt_secret:
+                return None
+            claims = self._decode(token, self.jwt_secret, algorithm)
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            jwk = await self._get_jwk(header.get("kid"))
+            if jwk is None:
+                return None
+            claims = self._decode(token, jwk, algorithm)
+        else:
+            logger.debug(f"Algoritma JWT tidak didukung untuk verifikasi lokal: {algorithm}")
+            return None
+
+        if not claims.get("sub"):
+            # Token valid secara kriptografis tapi bukan token user
+            # (mis. anon/service key) -> biarkan validasi remote yang memutuskan.
+            return None
+        return claims
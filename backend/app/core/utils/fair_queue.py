@@ -0,0 +1,68 @@
+# File: backend/app/core/utils/fair_queue.py
+# (FILE BARU - Antrian in-process round-robin per kunci, untuk penjadwalan adil)
+
+import asyncio
+from collections import OrderedDict, deque
+from typing import Deque, Generic, Hashable, List, TypeVar
+
+T = TypeVar("T")
+
+
+class FairQueue(Generic[T]):
+    """
+    Antrian asyncio dengan satu sub-antrian FIFO per kunci (mis. canvas_id).
+    `get_many` mengambil item bergiliran antar kunci (round-robin), sehingga
+    satu kunci dengan ribuan item tidak menahan kunci lain.
+
+    Tidak thread-safe; dipakai dari satu event loop.
+    """
+
+    def __init__(self):
+        self._queues: "OrderedDict[Hashable, Deque[T]]" = OrderedDict()
+        self._size = 0
+        self._changed = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def key_count(self) -> int:
+        return len(self._queues)
+
+    async def put(self, key: Hashable, item: T) -> None:
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+        queue.append(item)
+        self._size += 1
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _pop_round_robin(self, max_items: int) -> List[T]:
+        items: List[T] = []
+        while self._queues and len(items) < max_items:
+            key, queue = next(iter(self._queues.items()))
+            items.append(queue.popleft())
+            self._size -= 1
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+        return items
+
+    async def get_many(self, max_items: int) -> List[T]:
+        """Menunggu sampai ada item, lalu mengambil hingga `max_items` secara round-robin."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._size > 0)
+            items = self._pop_round_robin(max_items)
+            self._changed.notify_all()
+        return items
+
+    async def wait_for_space(self, capacity: int) -> None:
+        """Menunggu sampai jumlah item < `capacity` (backpressure untuk produsen)."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._size < capacity)
+
+    def drain(self) -> List[T]:
+        """Mengambil semua item tersisa (urutan round-robin), mis. saat shutdown."""
+        return self._pop_round_robin(self._size)
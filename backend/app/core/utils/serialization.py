@@ -0,0 +1,71 @@
+# File: backend/app/core/utils/serialization.py
+# (FILE BARU - Encoder/decoder JSON cepat untuk jalur panas: WebSocket, Pub/Sub, SSE)
+
+import json
+import logging
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Union
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fallback jika orjson belum terpasang
+    orjson = None
+    logger.warning("orjson tidak tersedia, serialisasi memakai modul json bawaan (lebih lambat).")
+
+
+def _default(obj: Any) -> Any:
+    """
+    Tipe yang tidak di-handle encoder secara native. orjson sudah menangani
+    UUID/datetime/date/time sendiri; fallback json bawaan butuh semuanya.
+    """
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        # Pydantic v2
+        return obj.model_dump(mode="json")
+    return str(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Serialize ke bytes UTF-8 (untuk Redis / send_bytes)."""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    def dumps(obj: Any) -> str:
+        """Serialize ke str (untuk send_text / event SSE)."""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode("utf-8")
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return orjson.loads(data)
+
+    JSONDecodeError = orjson.JSONDecodeError
+
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Serialize ke bytes UTF-8 (untuk Redis / send_bytes)."""
+        return _encoder.encode(obj).encode("utf-8")
+
+    def dumps(obj: Any) -> str:
+        """Serialize ke str (untuk send_text / event SSE)."""
+        return _encoder.encode(obj)
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    JSONDecodeError = json.JSONDecodeError
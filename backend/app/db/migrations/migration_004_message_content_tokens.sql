@@ -0,0 +1,15 @@
+-- File: backend/app/db/migrations/migration_004_message_content_tokens.sql
+-- (File Baru - Token count isi pesan dipersist saat insert)
+
+BEGIN;
+
+-- Token count dari KONTEN pesan itu sendiri (berbeda dari input_tokens /
+-- token_count yang mencatat total prompt). Diisi ChatService saat insert
+-- dan dibaca oleh cache riwayat percakapan agar pesan lama tidak
+-- di-tokenisasi ulang di setiap giliran.
+ALTER TABLE public.messages
+  ADD COLUMN IF NOT EXISTS content_tokens INTEGER;
+
+COMMENT ON COLUMN public.messages.content_tokens IS 'Jumlah token (cl100k_base) dari konten pesan ini.';
+
+COMMIT;
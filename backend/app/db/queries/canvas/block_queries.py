@@ -115,6 +115,8 @@ async def execute_mutation_rpc(
 ) -> Dict[str, Any]:
     """
     Mengeksekusi mutasi block menggunakan RPC rpc_upsert_block_atomic.
+    Hasil berisi 'status', 'server_seq', 'version' dan 'block' (baris block
+    terbaru, None untuk delete) sehingga tidak perlu membaca ulang block.
     Sumber:
     """
     try:
@@ -122,8 +124,11 @@ async def execute_mutation_rpc(
             "rpc_upsert_block_atomic", params
         ).execute()
         
-        if response.data:
-            return response.data[0]
+        data = response.data
+        if isinstance(data, list):
+            data = data[0] if data else None
+        if data:
+            return data
         
         raise DatabaseError("execute_mutation_rpc", "Tidak ada data dikembalikan dari RPC rpc_upsert_block_atomic.")
         
@@ -131,6 +136,38 @@ async def execute_mutation_rpc(
         logger.error(f"Error di execute_mutation_rpc: {e}", exc_info=True)
         raise DatabaseError("execute_mutation_rpc", str(e))
 
+async def execute_mutation_batch_rpc(
+    admin_client: AsyncClient, 
+    canvas_id: UUID,
+    user_id: UUID,
+    ops: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Mengeksekusi beberapa mutasi block dalam 1 panggilan RPC
+    (rpc_upsert_blocks_batch). Mengembalikan hasil per operasi
+    dengan urutan yang sama dengan `ops`.
+    """
+    try:
+        response: APIResponse = await admin_client.rpc(
+            "rpc_upsert_blocks_batch",
+            {
+                "p_canvas_id": str(canvas_id),
+                "p_user_id": str(user_id),
+                "p_ops": ops
+            }
+        ).execute()
+        
+        if response.data is not None and len(response.data) == len(ops):
+            return response.data
+        
+        raise DatabaseError("execute_mutation_batch_rpc", "Jumlah hasil RPC rpc_upsert_blocks_batch tidak sesuai jumlah operasi.")
+        
+    except DatabaseError:
+        raise
+    except Exception as e:
+        logger.error(f"Error di execute_mutation_batch_rpc: {e}", exc_info=True)
+        raise DatabaseError("execute_mutation_batch_rpc", str(e))
+
 async def queue_embedding_job_db(
     admin_client: AsyncClient, 
     block_id: UUID, 
@@ -157,6 +194,100 @@ async def queue_embedding_job_db(
         logger.error(f"Error di queue_embedding_job_db: {e}", exc_info=True)
         raise DatabaseError("queue_embedding_job_db", str(e))
 
+async def queue_embedding_jobs_bulk_db(
+    admin_client: AsyncClient, 
+    block_ids: List[UUID], 
+    table_name: str,
+    user_ids: Optional[List[UUID]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Menambahkan banyak job embedding dalam 1 insert.
+    Mengembalikan baris job yang dibuat (queue_id, fk_id, ...).
+    """
+    if not block_ids:
+        return []
+    try:
+        payload = [
+            {"fk_id": str(block_id), "table_destination": table_name, "status": "pending"}
+            for block_id in block_ids
+        ]
+        if user_ids:
+            for row, user_id in zip(payload, user_ids):
+                row["user_id"] = str(user_id)
+        response: APIResponse = await admin_client.table("embedding_job_queue") \
+            .insert(payload) \
+            .execute()
+        
+        if not response.data:
+            raise DatabaseError("queue_embedding_jobs_bulk_db", "Gagal mengantri embedding job.")
+        return response.data
+            
+    except Exception as e:
+        logger.error(f"Error di queue_embedding_jobs_bulk_db: {e}", exc_info=True)
+        raise DatabaseError("queue_embedding_jobs_bulk_db", str(e))
+
+async def get_block_contents_db(
+    admin_client: AsyncClient,
+    block_ids: List[str]
+) -> Dict[str, Optional[str]]:
+    """
+    Mengambil konten banyak block dalam 1 query `in_` (worker embedding batch).
+    Mengembalikan {block_id: content}; block yang tidak ada tidak ikut.
+    """
+    if not block_ids:
+        return {}
+    try:
+        response: APIResponse = await admin_client.table("blocks") \
+            .select("block_id, content") \
+            .in_("block_id", [str(b) for b in block_ids]) \
+            .execute()
+        return {str(row["block_id"]): row.get("content") for row in (response.data or [])}
+    except Exception as e:
+        logger.error(f"Error di get_block_contents_db: {e}", exc_info=True)
+        raise DatabaseError("get_block_contents_db", str(e))
+
+async def update_block_vectors_bulk_db(
+    admin_client: AsyncClient,
+    vectors: Dict[str, List[float]]
+) -> int:
+    """
+    Menulis banyak vektor block dalam 1 panggilan RPC
+    (rpc_bulk_update_block_vectors). Mengembalikan jumlah baris ter-update.
+    """
+    if not vectors:
+        return 0
+    try:
+        response: APIResponse = await admin_client.rpc(
+            "rpc_bulk_update_block_vectors",
+            {"p_items": [{"block_id": block_id, "vector": vector} for block_id, vector in vectors.items()]}
+        ).execute()
+        return int(response.data or 0)
+    except Exception as e:
+        logger.error(f"Error di update_block_vectors_bulk_db: {e}", exc_info=True)
+        raise DatabaseError("update_block_vectors_bulk_db", str(e))
+
+async def update_embedding_jobs_status_db(
+    admin_client: AsyncClient,
+    job_ids: List[str],
+    status: str,
+    error_message: Optional[str] = None
+):
+    """Update status banyak job di 'embedding_job_queue' dalam 1 query `in_`."""
+    if not job_ids:
+        return
+    try:
+        await admin_client.table("embedding_job_queue") \
+            .update({
+                "status": status,
+                "error_message": error_message,
+                "processed_at": "now()"
+            }) \
+            .in_("queue_id", [str(j) for j in job_ids]) \
+            .execute()
+    except Exception as e:
+        logger.error(f"Error di update_embedding_jobs_status_db: {e}", exc_info=True)
+        raise DatabaseError("update_embedding_jobs_status_db", str(e))
+
 # --- Diekstrak dari lexorank_service ---
 
 async def get_sibling_blocks_db(
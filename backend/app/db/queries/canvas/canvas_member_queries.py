@@ -99,4 +99,48 @@ async def list_canvas_members(
          raise DatabaseError("list_canvas_members_async", str(e))
     except Exception as e:
         logger.error(f"Error saat list_canvas_members (async) {canvas_id}: {e}", exc_info=True)
-        raise DatabaseError("list_canvas_members_async", f"Error tidak terduka: {str(e)}")
\ No newline at end of file
+        raise DatabaseError("list_canvas_members_async", f"Error tidak terduka: {str(e)}")
+
+async def list_canvas_user_ids_db(
+    admin_client: AsyncClient,
+    canvas_id: UUID
+) -> List[str]:
+    """
+    (Async Native) Semua user_id yang dapat membaca canvas: pemilik/pembuat,
+    anggota canvas_access, dan anggota workspace canvas (jika ada).
+    Mengembalikan [] jika canvas tidak ditemukan.
+    """
+    try:
+        canvas_response: Optional[APIResponse] = await admin_client.table("canvas") \
+            .select("user_id, creator_user_id, workspace_id") \
+            .eq("canvas_id", str(canvas_id)) \
+            .maybe_single() \
+            .execute()
+        if not canvas_response or not canvas_response.data:
+            return []
+        canvas = canvas_response.data
+
+        queries = [
+            admin_client.table("canvas_access")
+            .select("user_id")
+            .eq("canvas_id", str(canvas_id))
+            .execute()
+        ]
+        if canvas.get("workspace_id"):
+            queries.append(
+                admin_client.table("workspace_members")
+                .select("user_id")
+                .eq("workspace_id", canvas["workspace_id"])
+                .execute()
+            )
+        responses = await asyncio.gather(*queries)
+
+        user_ids = {canvas.get("user_id"), canvas.get("creator_user_id")}
+        for response in responses:
+            user_ids.update(row.get("user_id") for row in (response.data or []))
+        user_ids.discard(None)
+        return [str(user_id) for user_id in user_ids]
+
+    except Exception as e:
+        logger.error(f"Error saat list_canvas_user_ids_db (async) {canvas_id}: {e}", exc_info=True)
+        raise DatabaseError("list_canvas_user_ids_async", f"Error tidak terduka: {str(e)}")
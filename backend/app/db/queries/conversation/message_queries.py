@@ -145,6 +145,41 @@ async def get_all_conversation_messages(
         logger.error(f"Gagal mengambil semua data pesan (async) untuk convo {conversation_id}: {e}", exc_info=True)
         raise DatabaseError(f"Error mengambil daftar pesan: {str(e)}")
 
+
+async def get_recent_conversation_messages(
+    authed_client: AsyncClient,
+    user_id: UUID,
+    conversation_id: UUID,
+    limit: int = 1000
+) -> List[Dict[str, Any]]:
+    """
+    (Async Native) Mengambil `limit` pesan TERBARU, diurutkan dari yang
+    paling lama. Dipakai untuk mengisi cache riwayat percakapan.
+    """
+    try:
+        response = await authed_client.table("messages") \
+            .select(
+                "message_id",
+                "role",
+                "content",
+                "content_tokens",
+                "created_at"
+            ) \
+            .eq("user_id", str(user_id)) \
+            .eq("conversation_id", str(conversation_id)) \
+            .order("created_at", desc=True) \
+            .limit(limit) \
+            .execute()
+
+        if response.data is None:
+            raise DatabaseError("Gagal mengambil data pesan dari database.")
+
+        return list(reversed(response.data))
+
+    except Exception as e:
+        logger.error(f"Gagal mengambil pesan terbaru (async) untuk convo {conversation_id}: {e}", exc_info=True)
+        raise DatabaseError(f"Error mengambil daftar pesan: {str(e)}")
+
         
 async def get_first_turn_messages(
     authed_client: AsyncClient, # <-- Tipe diubah
@@ -6,6 +6,15 @@ DROP FUNCTION IF EXISTS public.find_relevant_summaries(
     p_match_count integer
 );
 
+-- [BARU] Tipe RETURNS berubah (kolom embedding), CREATE OR REPLACE tidak cukup
+DROP FUNCTION IF EXISTS public.find_relevant_summaries(
+    p_user_id uuid,
+    p_query_embedding vector,
+    p_query_text tsquery,
+    p_match_threshold double precision,
+    p_match_count integer
+);
+
 -- Buat versi baru yang distandarisasi
 CREATE OR REPLACE FUNCTION public.find_relevant_summaries(
     p_user_id uuid,
@@ -19,7 +28,8 @@ RETURNS TABLE (
     context_id uuid,
     summary_text text,
     similarity double precision,
-    rank real -- [BARU]
+    rank real, -- [BARU]
+    embedding vector -- [BARU] Untuk reranker lokal (cosine di backend)
 )
 LANGUAGE plpgsql
 AS $$
@@ -34,7 +44,8 @@ BEGIN
     (
         (0.6 * (1 - (e.embedding_vector <-> p_query_embedding))) +
         (0.4 * ts_rank_cd(to_tsvector('indonesian', s.summary_text), p_query_text))
-    )::real AS rank
+    )::real AS rank,
+    e.embedding_vector AS embedding
   FROM
     public.summary_memory_embeddings AS e
   JOIN
@@ -0,0 +1,29 @@
+-- File: backend/db/rpc/rpc_bulk_update_block_vectors.sql
+-- (BARU - Tulis vektor embedding banyak block dalam 1 panggilan RPC)
+--
+-- Dipakai worker embedding mode batch (app/workers/embedding.py): satu
+-- UPDATE ... FROM untuk seluruh batch, menggantikan satu UPDATE per block.
+--
+-- p_items: JSONB array, setiap elemen:
+--   { "block_id": UUID, "vector": [float, ...] }
+-- Mengembalikan jumlah baris yang ter-update.
+
+CREATE OR REPLACE FUNCTION public.rpc_bulk_update_block_vectors(
+    p_items JSONB
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_updated INTEGER;
+BEGIN
+  UPDATE public.blocks AS b
+  SET vector = (item->>'vector')::vector
+  FROM jsonb_array_elements(p_items) AS item
+  WHERE b.block_id = (item->>'block_id')::uuid;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$;
@@ -1,5 +1,8 @@
 -- File: backend/db/rpc/rpc_upsert_block_atomic.sql
 -- (Implementasi RPC v0.4.3 - Tugas 16)
+-- [v0.4.4] Version check (update & delete) dilakukan di sini dan hasil
+-- mengembalikan baris block terbaru ('block', tanpa kolom vector), sehingga
+-- pemanggil tidak perlu membaca block sebelum/sesudah mutasi.
 
 CREATE OR REPLACE FUNCTION public.rpc_upsert_block_atomic(
     p_block_id UUID,
@@ -26,6 +29,7 @@ DECLARE
   v_server_seq BIGINT;
   v_payload JSONB;
   v_affected_rows INTEGER;
+  v_block JSONB;
 BEGIN
   -- 1. Dapatkan Global Sequence (Wajib per Blueprint)
   v_server_seq := nextval('seq_block_events');
@@ -71,10 +75,13 @@ BEGIN
       SET status = 'conflict', processed_at = NOW(), error_message = 'Version mismatch'
       WHERE client_op_id = p_client_op_id AND block_id = p_block_id;
       
+      SELECT to_jsonb(b) - 'vector' INTO v_block FROM public.Blocks b WHERE b.block_id = p_block_id;
+
       RETURN jsonb_build_object(
         'status', 'conflict', 
         'server_seq', v_server_seq, 
-        'version', v_current_version
+        'version', v_current_version,
+        'current_block', v_block
       );
     END IF;
     
@@ -95,7 +102,24 @@ BEGIN
     v_affected_rows := 1;
 
   ELSIF p_action = 'delete' THEN
-    -- (Optimistic locking juga bisa diterapkan di sini jika perlu)
+    SELECT version INTO v_current_version FROM public.Blocks WHERE block_id = p_block_id FOR UPDATE;
+
+    IF v_current_version IS NOT NULL AND p_expected_version IS NOT NULL
+       AND v_current_version != p_expected_version THEN
+      UPDATE public.BlockOperations
+      SET status = 'conflict', processed_at = NOW(), error_message = 'Version mismatch'
+      WHERE client_op_id = p_client_op_id AND block_id = p_block_id;
+
+      SELECT to_jsonb(b) - 'vector' INTO v_block FROM public.Blocks b WHERE b.block_id = p_block_id;
+
+      RETURN jsonb_build_object(
+        'status', 'conflict',
+        'server_seq', v_server_seq,
+        'version', v_current_version,
+        'current_block', v_block
+      );
+    END IF;
+
     DELETE FROM public.Blocks
     WHERE block_id = p_block_id;
     
@@ -117,12 +141,22 @@ BEGIN
   VALUES
     (p_user_id, p_action, 'Block', p_block_id, 'success', v_server_seq, p_client_op_id, v_affected_rows, v_payload);
 
-  -- 7. Kembalikan hasil
+  -- 7. Kembalikan hasil (termasuk baris block terbaru untuk broadcast)
+  IF p_action <> 'delete' THEN
+    SELECT to_jsonb(b) - 'vector' INTO v_block FROM public.Blocks b WHERE b.block_id = p_block_id;
+  END IF;
+
   RETURN jsonb_build_object(
     'status', 'success', 
     'server_seq', v_server_seq, 
-    'version', v_new_version
-  );
+    'version', v_new_version,
+    'block_id', p_block_id,
+    'block', v_block
+  ) || CASE
+    WHEN p_action = 'delete' AND v_affected_rows = 0
+      THEN jsonb_build_object('reason', 'already_deleted')
+    ELSE '{}'::jsonb
+  END;
 
 EXCEPTION
   WHEN OTHERS THEN
@@ -0,0 +1,69 @@
+-- File: backend/db/rpc/rpc_upsert_blocks_batch.sql
+-- (BARU - Batch mutasi block dari WebSocket dalam 1 panggilan RPC)
+--
+-- Menjalankan beberapa operasi block (create/update/delete) dalam SATU
+-- round trip dan SATU transaksi. Setiap operasi tetap diproses oleh
+-- rpc_upsert_block_atomic sehingga logging BlockOperations, optimistic
+-- locking dan audit tidak berubah. Hasil dikembalikan per operasi, dengan
+-- urutan yang sama dengan p_ops.
+--
+-- p_ops: JSONB array, setiap elemen:
+--   { "client_op_id", "block_id", "action", "parent_id", "y_order", "type",
+--     "content", "properties", "ai_metadata", "expected_version" }
+
+CREATE OR REPLACE FUNCTION public.rpc_upsert_blocks_batch(
+    p_canvas_id UUID,
+    p_user_id UUID,
+    p_ops JSONB
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_op JSONB;
+  v_block_id UUID;
+  v_client_op_id TEXT;
+  v_result JSONB;
+  v_results JSONB := '[]'::jsonb;
+BEGIN
+  FOR v_op IN SELECT value FROM jsonb_array_elements(p_ops)
+  LOOP
+    v_block_id := (v_op->>'block_id')::uuid;
+    v_client_op_id := v_op->>'client_op_id';
+
+    -- 1. Idempotency (menggantikan check_duplicate_operation_db di Python)
+    IF EXISTS (
+      SELECT 1 FROM public.block_operations
+      WHERE client_op_id = v_client_op_id AND block_id = v_block_id
+    ) THEN
+      v_result := jsonb_build_object('status', 'success', 'reason', 'duplicate_ignored');
+    ELSE
+      -- 2. Mutasi atomik per operasi (konflik/gagal tidak membatalkan op lain)
+      v_result := public.rpc_upsert_block_atomic(
+        p_block_id         => v_block_id,
+        p_canvas_id        => p_canvas_id,
+        p_client_op_id     => v_client_op_id,
+        p_user_id          => p_user_id,
+        p_action           => v_op->>'action',
+        p_parent_id        => (v_op->>'parent_id')::uuid,
+        p_y_order          => v_op->>'y_order',
+        p_type             => v_op->>'type',
+        p_content          => v_op->>'content',
+        p_properties       => v_op->'properties',
+        p_ai_metadata      => v_op->'ai_metadata',
+        p_expected_version => (v_op->>'expected_version')::integer
+      );
+    END IF;
+
+    v_results := v_results || jsonb_build_array(
+      v_result || jsonb_build_object(
+        'client_op_id', v_client_op_id,
+        'block_id', v_block_id
+      )
+    );
+  END LOOP;
+
+  RETURN v_results;
+END;
+$$;
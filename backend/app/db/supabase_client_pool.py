@@ -0,0 +1,161 @@
+# File: backend/app/db/supabase_client_pool.py
+# (FILE BARU - Pool klien Supabase per-user dengan transport httpx bersama)
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+from supabase.client import AsyncClient, AsyncClientOptions, create_async_client
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PooledClient:
+    client: AsyncClient
+    expires_at: Optional[float]
+
+
+class SupabaseClientPool:
+    """
+    Pool AsyncClient Supabase yang di-key berdasarkan access token.
+
+    Sebelumnya setiap request memanggil `create_async_client` + `set_session`,
+    sehingga setiap request membuat connection pool HTTP/2 baru (dan TLS
+    handshake baru) ke PostgREST. Pool ini:
+    - Menggunakan SATU `httpx.AsyncHTTPTransport` untuk semua klien, sehingga
+      koneksi ke PostgREST di-reuse lintas user. Tiap klien hanya membawa
+      header Authorization miliknya sendiri.
+    - Ukurannya dibatasi (LRU eviction).
+    - Meng-invalidate entri saat token (hampir) kedaluwarsa.
+    """
+
+    def __init__(
+        self,
+        supabase_url: str,
+        supabase_key: str,
+        max_size: int = 1024,
+        max_connections: int = 100,
+        expiry_skew_seconds: int = 30,
+    ):
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+        self.max_size = max_size
+        self.expiry_skew_seconds = expiry_skew_seconds
+        self._max_connections = max_connections
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+        self._clients: "OrderedDict[str, _PooledClient]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        # Jangan simpan token mentah sebagai key dictionary
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _get_transport(self) -> httpx.AsyncHTTPTransport:
+        if self._transport is None:
+            self._transport = httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                ),
+            )
+        return self._transport
+
+    def _is_expired(self, entry: _PooledClient) -> bool:
+        if entry.expires_at is None:
+            return False
+        return time.time() >= entry.expires_at - self.expiry_skew_seconds
+
+    async def _build_client(self, token: str) -> AsyncClient:
+        """
+        Membuat AsyncClient yang bertindak sebagai user (header Authorization
+        berisi access token user) lalu mengganti session PostgREST-nya dengan
+        session tipis yang memakai transport bersama.
+        """
+        client = await create_async_client(
+            self.supabase_url,
+            self.supabase_key,
+            options=AsyncClientOptions(headers={"Authorization": f"Bearer {token}"}),
+        )
+        postgrest = client.postgrest
+        old_session = postgrest.session
+        postgrest.session = httpx.AsyncClient(
+            base_url=old_session.base_url,
+            headers=old_session.headers,
+            timeout=old_session.timeout,
+            transport=self._get_transport(),
+        )
+        await old_session.aclose()
+        return client
+
+    async def get_client(self, token: str, expires_at: Optional[float] = None) -> AsyncClient:
+        """
+        Mengembalikan klien untuk token ini dari pool, atau membuat yang baru.
+        `expires_at` adalah claim `exp` token (epoch detik).
+        """
+        key = self._key(token)
+
+        entry = self._clients.get(key)
+        if entry is not None and not self._is_expired(entry):
+            self._clients.move_to_end(key)
+            return entry.client
+
+        client = await self._build_client(token)
+
+        async with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and not self._is_expired(entry):
+                # Request lain sudah membuat klien untuk token yang sama
+                self._clients.move_to_end(key)
+                return entry.client
+
+            self._clients[key] = _PooledClient(client=client, expires_at=expires_at)
+            self._clients.move_to_end(key)
+            self._evict()
+        return client
+
+    def _evict(self) -> None:
+        """Buang entri yang kedaluwarsa, lalu entri LRU jika melebihi kapasitas."""
+        expired = [k for k, e in self._clients.items() if self._is_expired(e)]
+        for k in expired:
+            del self._clients[k]
+        while len(self._clients) > self.max_size:
+            self._clients.popitem(last=False)
+        # Catatan: session klien yang dibuang TIDAK di-aclose(), karena
+        # aclose() pada httpx.AsyncClient juga menutup transport bersama.
+
+    def invalidate(self, token: str) -> None:
+        """Menghapus klien milik token tertentu (mis. saat logout)."""
+        self._clients.pop(self._key(token), None)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def close(self) -> None:
+        self._clients.clear()
+        if self._transport is not None:
+            await self._transport.aclose()
+            self._transport = None
+        logger.info("Pool klien Supabase ditutup.")
+
+
+# Instance singleton untuk klien per-user (anon key + JWT user)
+supabase_client_pool = SupabaseClientPool(
+    settings.SUPABASE_URL,
+    settings.SUPABASE_ANON_KEY,
+    max_size=settings.SUPABASE_CLIENT_POOL_MAX_SIZE,
+    max_connections=settings.SUPABASE_CLIENT_POOL_MAX_CONNECTIONS,
+)
+
+
+async def close_supabase_client_pool():
+    await supabase_client_pool.close()
@@ -14,8 +14,14 @@ from app.core.scheduler import scheduler, setup_scheduler_jobs #
 
 # --- [TAMBAHAN] Impor Handler Startup/Shutdown ---
 from app.db.asyncpg_pool import create_asyncpg_pool, close_asyncpg_pool
+from app.db.supabase_client_pool import close_supabase_client_pool
 from app.services.redis_pubsub import connect_redis_pubsub, disconnect_redis_pubsub
+from app.services.user.profile_cache import user_profile_cache
+from app.services.access_cache import access_cache
+from app.services.chat_engine.helpers.history_cache import conversation_history_cache
 from app.workers.embedding import stop_embedding_worker
+from app.services.canvas.embedding_debouncer import embedding_job_debouncer
+from app.services.chat_engine.llm_provider import warmup_chat_models, close_chat_models
 from app.workers.rebalance import stop_rebalance_worker
 from app.workers.cleanup import stop_cleanup_worker
 
@@ -143,6 +149,11 @@ async def lifespan(app: FastAPI):
         # 1. Hubungkan Koneksi Eksternal
         await connect_redis_pubsub()  # Untuk WebSocket & SSE scaling
         await create_asyncpg_pool()   # Untuk RebalanceWorker (pg_notify)
+        user_profile_cache.start_invalidation_listener()  # Invalidasi cache profil lintas worker
+        access_cache.start_invalidation_listener()        # Invalidasi cache akses lintas worker
+        conversation_history_cache.start_invalidation_listener()  # Invalidasi cache riwayat chat lintas worker
+        embedding_job_debouncer.start()  # Flush job embedding yang sudah di-debounce
+        await warmup_chat_models()  # Klien LLM siap sebelum request chat pertama
         
         # 2. Rebuild Model (dari file asli Anda)
         PaginatedConversationListResponse.model_rebuild()
@@ -171,12 +182,18 @@ async def lifespan(app: FastAPI):
     stop_embedding_worker()
     stop_rebalance_worker()
     stop_cleanup_worker()
+    await user_profile_cache.stop_invalidation_listener()
+    await access_cache.stop_invalidation_listener()
+    await conversation_history_cache.stop_invalidation_listener()
+    await embedding_job_debouncer.stop()
     logger.info("Semua worker dihentikan.")
 
     # 2. Tutup Koneksi Eksternal
     await disconnect_redis_pubsub()
     await close_asyncpg_pool()
-    logger.info("Semua koneksi (Redis Pub/Sub, AsyncPG) ditutup.")
+    await close_supabase_client_pool()
+    await close_chat_models()
+    logger.info("Semua koneksi (Redis Pub/Sub, AsyncPG, Supabase pool, klien LLM) ditutup.")
     logger.info("Aplikasi FastAPI shutdown selesai.")
 
 
@@ -0,0 +1,182 @@
+# File: backend/app/services/access_cache.py
+# (FILE BARU - Cache keputusan akses workspace/canvas untuk dependency keamanan)
+
+import asyncio
+import logging
+from typing import Any, Optional, Tuple, Union
+from uuid import UUID
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.core.utils.ttl_cache import TTLCache
+from app.services.redis_pubsub import redis_pubsub_manager
+
+logger = logging.getLogger(__name__)
+
+ACCESS_INVALIDATION_CHANNEL = "access_cache:invalidate"
+
+SCOPE_WORKSPACE = "workspace"
+SCOPE_CANVAS = "canvas"
+
+ACCESS_CACHE_LOOKUPS = Counter(
+    "access_cache_lookups_total",
+    "Total lookup cache keputusan akses",
+    ["scope", "outcome"]  # outcome: 'hit' | 'negative_hit' | 'miss'
+)
+
+_MISS = object()
+
+
+class AccessDecisionCache:
+    """
+    Cache keputusan akses per (scope, resource_id, user_id) dengan TTL pendek.
+
+    - Keputusan "diizinkan" disimpan di cache positif.
+    - Keputusan "ditolak / tidak ditemukan" disimpan di cache negatif yang
+      lebih kecil dan TTL-nya lebih pendek, agar request berulang ke resource
+      yang tidak bisa diakses tidak membebani DB, tapi juga tidak bisa
+      dipakai untuk memenuhi memori.
+
+    Setiap penulisan ke `workspace_members`, `canvas_access` dan alur
+    undangan WAJIB memanggil `invalidate()`. Invalidasi disebarkan ke worker
+    lain via Redis Pub/Sub.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        negative_ttl_seconds: int,
+        max_size: int,
+        negative_max_size: int,
+    ):
+        self._positive: TTLCache[Any] = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._negative: TTLCache[Any] = TTLCache(max_size=negative_max_size, ttl_seconds=negative_ttl_seconds)
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(scope: str, resource_id: Union[str, UUID], user_id: Union[str, UUID]) -> Tuple[str, str, str]:
+        return (scope, str(resource_id), str(user_id))
+
+    def get(self, scope: str, resource_id: Union[str, UUID], user_id: Union[str, UUID]) -> Tuple[bool, Any]:
+        """
+        Mengembalikan (hit, value). Untuk negative hit, value adalah None.
+        """
+        hit, value, _ = self.lookup(scope, resource_id, user_id)
+        return hit, value
+
+    def lookup(
+        self, scope: str, resource_id: Union[str, UUID], user_id: Union[str, UUID]
+    ) -> Tuple[bool, Any, Any]:
+        """
+        Seperti `get`, ditambah alasan penolakan (`denial` yang diberikan ke
+        `set`) untuk negative hit; None jika bukan negative hit.
+        """
+        key = self._key(scope, resource_id, user_id)
+        value = self._positive.get(key, _MISS)
+        if value is not _MISS:
+            ACCESS_CACHE_LOOKUPS.labels(scope=scope, outcome="hit").inc()
+            return True, value, None
+        denial = self._negative.get(key, None)
+        if denial is not None:
+            ACCESS_CACHE_LOOKUPS.labels(scope=scope, outcome="negative_hit").inc()
+            return True, None, denial
+        ACCESS_CACHE_LOOKUPS.labels(scope=scope, outcome="miss").inc()
+        return False, None, None
+
+    def set(
+        self,
+        scope: str,
+        resource_id: Union[str, UUID],
+        user_id: Union[str, UUID],
+        value: Any,
+        denial: Any = True,
+    ) -> None:
+        """
+        Menyimpan keputusan. `value=None` berarti akses ditolak; `denial`
+        (tidak boleh None) disimpan sebagai alasan penolakan.
+        """
+        key = self._key(scope, resource_id, user_id)
+        if value is None:
+            self._positive.pop(key)
+            self._negative.set(key, denial)
+        else:
+            self._negative.pop(key)
+            self._positive.set(key, value)
+
+    def _drop_local(
+        self,
+        scope: Optional[str],
+        resource_id: Optional[str],
+        user_id: Optional[str],
+    ) -> int:
+        def matches(key: Tuple[str, str, str]) -> bool:
+            k_scope, k_resource, k_user = key
+            return (
+                (scope is None or k_scope == scope)
+                and (resource_id is None or k_resource == resource_id)
+                and (user_id is None or k_user == user_id)
+            )
+        return self._positive.pop_where(matches) + self._negative.pop_where(matches)
+
+    async def invalidate(
+        self,
+        scope: Optional[str] = None,
+        resource_id: Optional[Union[str, UUID]] = None,
+        user_id: Optional[Union[str, UUID]] = None,
+    ) -> None:
+        """
+        Membuang keputusan yang cocok di semua worker. Argumen `None`
+        berarti wildcard (mis. `invalidate(SCOPE_CANVAS, canvas_id)` membuang
+        keputusan semua user untuk canvas tersebut).
+        """
+        scope_s = scope
+        resource_s = str(resource_id) if resource_id is not None else None
+        user_s = str(user_id) if user_id is not None else None
+        self._drop_local(scope_s, resource_s, user_s)
+        await redis_pubsub_manager.publish(ACCESS_INVALIDATION_CHANNEL, {
+            "scope": scope_s,
+            "resource_id": resource_s,
+            "user_id": user_s,
+        })
+
+    async def invalidate_workspace_member(
+        self,
+        workspace_id: Union[str, UUID],
+        user_id: Optional[Union[str, UUID]] = None,
+    ) -> None:
+        """
+        Perubahan keanggotaan workspace juga memengaruhi role user di canvas
+        milik workspace tersebut, jadi keputusan canvas user ikut dibuang.
+        """
+        await self.invalidate(SCOPE_WORKSPACE, workspace_id, user_id)
+        await self.invalidate(SCOPE_CANVAS, None, user_id)
+
+    # --- Listener invalidasi (per worker) ---
+
+    async def _invalidation_listener(self):
+        async for message in redis_pubsub_manager.subscribe(ACCESS_INVALIDATION_CHANNEL):
+            self._drop_local(message.get("scope"), message.get("resource_id"), message.get("user_id"))
+
+    def start_invalidation_listener(self):
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._invalidation_listener())
+            logger.info("Listener invalidasi cache akses dimulai.")
+
+    async def stop_invalidation_listener(self):
+        if self._listener_task and not self._listener_task.done():
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+        self._listener_task = None
+
+
+# Instance singleton
+access_cache = AccessDecisionCache(
+    ttl_seconds=settings.ACCESS_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.ACCESS_CACHE_NEGATIVE_TTL_SECONDS,
+    max_size=settings.ACCESS_CACHE_MAX_SIZE,
+    negative_max_size=settings.ACCESS_CACHE_NEGATIVE_MAX_SIZE,
+)
@@ -15,17 +15,22 @@ logger = logging.getLogger(__name__)
 async def broadcast_to_canvas(
     canvas_id: UUID, 
     message: Dict[str, Any], 
-    exclude_user_id: Optional[UUID] = None
+    exclude_user_id: Optional[UUID] = None,
+    ephemeral: bool = False
 ):
     """
-    Helper function to broadcast a message to all connected users in a canvas
-    via Redis Pub/Sub.
+    Helper function to broadcast a message to all connected users in a canvas.
+    Socket lokal di worker ini menerima pesan langsung; Redis Pub/Sub hanya
+    dipakai untuk worker/node lain. `ephemeral=True` untuk presence/cursor
+    (tidak di-publish ke Redis jika tidak ada node lain di canvas ini).
     """
     channel = f"canvas:{str(canvas_id)}"
     
-    # Tambahkan 'exclude_user_id' ke payload jika ada
+    # 'exclude_user_id' dibawa di header frame, bukan di payload.
     # 'socket.py' (subscriber) akan bertanggung jawab untuk tidak mengirimkannya.
-    if exclude_user_id:
-        message["_exclude_user_id"] = str(exclude_user_id)
-        
-    await redis_pubsub_manager.publish(channel, message)
\ No newline at end of file
+    await redis_pubsub_manager.publish(
+        channel,
+        message,
+        ephemeral=ephemeral,
+        exclude_user_ids=[exclude_user_id] if exclude_user_id else None
+    )
\ No newline at end of file
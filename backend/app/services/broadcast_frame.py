@@ -0,0 +1,85 @@
+# File: backend/app/services/broadcast_frame.py
+# (FILE BARU - Frame broadcast yang di-serialize sekali, dikirim ke banyak socket)
+
+from functools import cached_property
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Union
+from uuid import UUID
+
+from app.core.utils import serialization
+
+# Format wire di Redis:
+#   <header JSON>\n<payload JSON>
+# Header hanya berisi metadata routing (origin node, user yang dikecualikan)
+# dan selalu kecil, jadi reader cukup mem-parse header; payload diteruskan
+# ke socket apa adanya. Encoder JSON tidak pernah menghasilkan newline
+# mentah, sehingga newline pertama selalu pemisah header.
+_SEPARATOR = "\n"
+
+
+class BroadcastFrame:
+    """
+    Satu pesan broadcast yang sudah di-serialize.
+
+    - `payload` adalah teks JSON final yang dikirim ke klien (`send_text`).
+    - `exclude_user_ids` dan `origin` adalah metadata routing; tidak pernah
+      ikut terkirim ke klien.
+    - `data` men-decode payload secara lazy dan hanya SEKALI per frame,
+      untuk consumer yang butuh dict (listener invalidasi, SSE notifikasi).
+
+    Frame dibagi ke semua consumer di channel yang sama; jangan diubah.
+    """
+
+    def __init__(
+        self,
+        payload: str,
+        exclude_user_ids: FrozenSet[str] = frozenset(),
+        origin: Optional[str] = None,
+    ):
+        self.payload = payload
+        self.exclude_user_ids = exclude_user_ids
+        self.origin = origin
+
+    @classmethod
+    def from_message(
+        cls,
+        message: Dict[str, Any],
+        exclude_user_ids: Optional[Iterable[Union[str, UUID]]] = None,
+        origin: Optional[str] = None,
+    ) -> "BroadcastFrame":
+        frame = cls(
+            payload=serialization.dumps(message),
+            exclude_user_ids=frozenset(str(u) for u in exclude_user_ids or ()),
+            origin=origin,
+        )
+        # Pengirim sudah punya dict-nya, tidak perlu decode ulang
+        frame.__dict__["data"] = message
+        return frame
+
+    @classmethod
+    def decode(cls, raw: Union[bytes, str]) -> "BroadcastFrame":
+        """Mem-parse header saja; payload disimpan sebagai teks mentah."""
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        header_raw, sep, payload = raw.partition(_SEPARATOR)
+        if not sep:
+            # Pesan tanpa header (format lama / publisher lain)
+            return cls(payload=header_raw)
+        header = serialization.loads(header_raw)
+        return cls(
+            payload=payload,
+            exclude_user_ids=frozenset(header.get("x") or ()),
+            origin=header.get("o"),
+        )
+
+    def encode(self) -> str:
+        header: Dict[str, Any] = {"o": self.origin}
+        if self.exclude_user_ids:
+            header["x"] = list(self.exclude_user_ids)
+        return serialization.dumps(header) + _SEPARATOR + self.payload
+
+    @cached_property
+    def data(self) -> Dict[str, Any]:
+        return serialization.loads(self.payload)
+
+    def is_excluded(self, user_id: Union[str, UUID]) -> bool:
+        return bool(self.exclude_user_ids) and str(user_id) in self.exclude_user_ids
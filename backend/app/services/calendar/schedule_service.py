@@ -20,6 +20,7 @@ from app.core.exceptions import DatabaseError, NotFoundError
 # Impor Background Job
 from app.jobs.schedule_expander import expand_and_populate_instances
 from app.services.audit_service import log_action
+from app.services.semantic_response_cache import semantic_response_cache
 
 if TYPE_CHECKING:
     from app.core.dependencies import AuthInfoDep
@@ -128,6 +129,7 @@ class ScheduleService:
                     "title": new_schedule["title"],
                 },
             )
+            await semantic_response_cache.invalidate_user(self.user.id)
             return new_schedule
 
         except ValueError:
@@ -211,6 +213,7 @@ class ScheduleService:
                 action="schedule.update",
                 details={"schedule_id": str(schedule_id), "changes": list(payload.keys())},
             )
+            await semantic_response_cache.invalidate_user(self.user.id)
             return updated_schedule
 
         except ValueError:
@@ -243,6 +246,7 @@ class ScheduleService:
                 action="schedule.delete_soft",
                 details={"schedule_id": str(schedule_id)}
             )
+            await semantic_response_cache.invalidate_user(self.user.id)
             
             return True
             
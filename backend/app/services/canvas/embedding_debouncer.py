@@ -0,0 +1,290 @@
+# File: backend/app/services/canvas/embedding_debouncer.py
+# (FILE BARU - Debounce + dedup hash konten sebelum job embedding diantrikan)
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.db.queries.canvas import block_queries
+from app.db.supabase_client import get_supabase_admin_async_client
+from app.services.redis_rate_limiter import redis_client
+from app.workers.embedding import content_hash, embedding_content_hash_key, push_embedding_job
+
+logger = logging.getLogger(__name__)
+
+_DUE_KEY = "embedding:debounce:due"        # ZSET block_id -> waktu jatuh tempo
+_PENDING_KEY = "embedding:debounce:meta"   # HASH block_id -> {canvas_id, user_id, hash}
+
+EMBEDDING_DEBOUNCE_EVENTS = Counter(
+    "embedding_debounce_events_total",
+    "Keputusan debounce job embedding per block",
+    ["outcome"]  # 'scheduled' | 'unchanged' | 'enqueued' | 'skipped_unchanged' | 'released'
+)
+
+_PROCESSING_KEY = "embedding:debounce:processing"       # ZSET block_id -> batas lease
+_PROCESSING_META_KEY = "embedding:debounce:processing_meta"  # HASH block_id -> meta yang diklaim
+
+# Klaim entri jatuh tempo secara atomik (aman multi-worker) ke ZSET
+# processing dengan lease. Entri baru dihapus (ack) setelah job berhasil
+# diantrikan; lease yang kedaluwarsa (worker crash) dikembalikan ke due.
+# KEYS: due, meta, processing, processing_meta | ARGV: now, max, lease_until
+_CLAIM_DUE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(expired) do
+  local meta = redis.call('HGET', KEYS[4], id)
+  redis.call('ZREM', KEYS[3], id)
+  redis.call('HDEL', KEYS[4], id)
+  -- Mutasi yang lebih baru (sudah terjadwal lagi) menang atas klaim lama
+  if meta and redis.call('HSETNX', KEYS[2], id, meta) == 1 then
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[1], id)
+  end
+end
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due == 0 then return {} end
+redis.call('ZREM', KEYS[1], unpack(due))
+local metas = redis.call('HMGET', KEYS[2], unpack(due))
+redis.call('HDEL', KEYS[2], unpack(due))
+local out = {}
+for i, id in ipairs(due) do
+  local meta = metas[i]
+  if meta then
+    redis.call('ZADD', KEYS[3], ARGV[3], id)
+    redis.call('HSET', KEYS[4], id, meta)
+  end
+  out[#out + 1] = id
+  out[#out + 1] = meta or ''
+end
+return out
+"""
+
+# Ack: hapus klaim dari processing, hanya jika masih klaim yang sama
+# (block bisa diklaim ulang oleh flush lain setelah mutasi baru).
+# KEYS: processing, processing_meta | ARGV: block_id, meta, block_id, meta, ...
+_ACK_SCRIPT = """
+for i = 1, #ARGV, 2 do
+  if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[i + 1] then
+    redis.call('ZREM', KEYS[1], ARGV[i])
+    redis.call('HDEL', KEYS[2], ARGV[i])
+  end
+end
+"""
+
+# Release (gagal mengantrikan): kembalikan klaim ke due dengan jatuh tempo
+# ARGV[1], kecuali block sudah dijadwalkan ulang dengan meta yang lebih baru.
+# KEYS: due, meta, processing, processing_meta | ARGV: retry_at, block_id, meta, ...
+_RELEASE_SCRIPT = """
+for i = 2, #ARGV, 2 do
+  if redis.call('HGET', KEYS[4], ARGV[i]) == ARGV[i + 1] then
+    redis.call('ZREM', KEYS[3], ARGV[i])
+    redis.call('HDEL', KEYS[4], ARGV[i])
+    if redis.call('HSETNX', KEYS[2], ARGV[i], ARGV[i + 1]) == 1 then
+      redis.call('ZADD', KEYS[1], 'NX', ARGV[1], ARGV[i])
+    end
+  end
+end
+"""
+
+
+def _flatten(leases: List[Tuple[str, str]]) -> List[str]:
+    return [value for lease in leases for value in lease]
+
+
+class EmbeddingJobDebouncer:
+    """
+    Menggabungkan mutasi konten block yang beruntun (live typing) menjadi
+    satu job embedding.
+
+    - `schedule` menulis block ke ZSET `embedding:debounce:due` dengan skor
+      `now + delay`; setiap mutasi baru menggeser jatuh tempo, sehingga job
+      baru dibuat setelah block diam selama `delay_seconds`.
+    - Loop flush mengklaim entri jatuh tempo (skrip Lua atomik) ke ZSET
+      processing dengan lease `lease_seconds`, membuang
+      yang hash kontennya sama dengan hash konten yang terakhir di-embed
+      (`embedding:content_hash:{block_id}`, ditulis worker embedding dari
+      konten yang benar-benar ia baca), lalu membuat job di
+      `embedding_job_queue` (1 insert) dan mendorongnya ke list Redis
+      `embedding_jobs` untuk worker. Klaim baru dihapus setelah berhasil;
+      jika gagal dikembalikan ke due (dicoba lagi setelah `delay_seconds`),
+      dan jika worker mati lease-nya kedaluwarsa lalu diklaim ulang.
+
+    Tanpa Redis, job langsung diantrikan tanpa debounce (perilaku lama).
+    """
+
+    def __init__(
+        self,
+        delay_seconds: float,
+        poll_interval_seconds: float,
+        max_flush: int,
+        lease_seconds: float,
+    ):
+        self.delay_seconds = delay_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_flush = max_flush
+        self.lease_seconds = lease_seconds
+        self._claim_script = redis_client.register_script(_CLAIM_DUE_SCRIPT) if redis_client is not None else None
+        self._ack_script = redis_client.register_script(_ACK_SCRIPT) if redis_client is not None else None
+        self._release_script = redis_client.register_script(_RELEASE_SCRIPT) if redis_client is not None else None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def schedule(
+        self,
+        canvas_id: Union[str, UUID],
+        user_id: Union[str, UUID],
+        contents: Dict[str, Any],
+    ) -> None:
+        """`contents`: {block_id: konten terbaru} dari mutasi yang berhasil."""
+        if not contents:
+            return
+        if redis_client is None:
+            await self._enqueue(
+                [{"block_id": b, "canvas_id": str(canvas_id), "user_id": str(user_id), "hash": content_hash(c)}
+                 for b, c in contents.items()]
+            )
+            return
+
+        block_ids = [str(b) for b in contents]
+        hashes = [content_hash(c) for c in contents.values()]
+        due_at = time.time() + self.delay_seconds
+        try:
+            embedded = await redis_client.mget([embedding_content_hash_key(b) for b in block_ids])
+            async with redis_client.pipeline(transaction=True) as pipe:
+                for block_id, new_hash, old_hash in zip(block_ids, hashes, embedded):
+                    if new_hash == old_hash:
+                        # Konten kembali ke versi yang sudah di-embed: batalkan job tertunda
+                        pipe.zrem(_DUE_KEY, block_id)
+                        pipe.hdel(_PENDING_KEY, block_id)
+                        EMBEDDING_DEBOUNCE_EVENTS.labels(outcome="unchanged").inc()
+                        continue
+                    pipe.zadd(_DUE_KEY, {block_id: due_at})
+                    pipe.hset(_PENDING_KEY, block_id, json.dumps({
+                        "canvas_id": str(canvas_id),
+                        "user_id": str(user_id),
+                        "hash": new_hash,
+                    }))
+                    EMBEDDING_DEBOUNCE_EVENTS.labels(outcome="scheduled").inc()
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Gagal menjadwalkan debounce embedding, antrikan langsung: {e}", exc_info=True)
+            await self._enqueue(
+                [{"block_id": b, "canvas_id": str(canvas_id), "user_id": str(user_id), "hash": h}
+                 for b, h in zip(block_ids, hashes)]
+            )
+
+    async def flush_due(self) -> int:
+        """Mengantrikan job untuk block yang sudah diam >= delay. Mengembalikan jumlah job."""
+        if self._claim_script is None:
+            return 0
+        now = time.time()
+        claimed = await self._claim_script(
+            keys=[_DUE_KEY, _PENDING_KEY, _PROCESSING_KEY, _PROCESSING_META_KEY],
+            args=[now, self.max_flush, now + self.lease_seconds]
+        )
+        if not claimed:
+            return 0
+
+        # (block_id, meta mentah) yang masuk processing; dipakai ack/release
+        leases = [(b, m) for b, m in zip(claimed[0::2], claimed[1::2]) if m]
+        if not leases:
+            return 0
+
+        try:
+            entries = [{"block_id": block_id, **json.loads(raw_meta)} for block_id, raw_meta in leases]
+            embedded = await redis_client.mget([embedding_content_hash_key(e["block_id"]) for e in entries])
+            changed = [e for e, old_hash in zip(entries, embedded) if e["hash"] != old_hash]
+            skipped = len(entries) - len(changed)
+            if skipped:
+                EMBEDDING_DEBOUNCE_EVENTS.labels(outcome="skipped_unchanged").inc(skipped)
+            enqueued = await self._enqueue(changed)
+        except Exception:
+            await self._release(leases)
+            raise
+
+        await self._ack_script(keys=[_PROCESSING_KEY, _PROCESSING_META_KEY], args=_flatten(leases))
+        return enqueued
+
+    async def _release(self, leases: List[Tuple[str, str]]) -> None:
+        """Mengembalikan klaim yang gagal diantrikan ke due (dicoba lagi setelah delay)."""
+        try:
+            await self._release_script(
+                keys=[_DUE_KEY, _PENDING_KEY, _PROCESSING_KEY, _PROCESSING_META_KEY],
+                args=[time.time() + self.delay_seconds] + _flatten(leases)
+            )
+            EMBEDDING_DEBOUNCE_EVENTS.labels(outcome="released").inc(len(leases))
+        except Exception as e:
+            # Lease tetap di processing dan akan diklaim ulang setelah kedaluwarsa
+            logger.error(f"Gagal mengembalikan {len(leases)} klaim debounce embedding: {e}", exc_info=True)
+
+    async def _enqueue(self, entries: List[Dict[str, str]]) -> int:
+        if not entries:
+            return 0
+        admin_client = await get_supabase_admin_async_client()
+        rows = await block_queries.queue_embedding_jobs_bulk_db(
+            admin_client,
+            [UUID(e["block_id"]) for e in entries],
+            "blocks",
+            user_ids=[UUID(e["user_id"]) for e in entries],
+        )
+        EMBEDDING_DEBOUNCE_EVENTS.labels(outcome="enqueued").inc(len(entries))
+        if redis_client is None:
+            return len(entries)
+
+        by_block = {e["block_id"]: e for e in entries}
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for row in rows:
+                entry = by_block.get(str(row["fk_id"]))
+                push_embedding_job(pipe, {
+                    "job_id": str(row["queue_id"]),
+                    "entity_id": str(row["fk_id"]),
+                    "table_destination": row["table_destination"],
+                    "canvas_id": entry["canvas_id"] if entry else None,
+                    "user_id": entry["user_id"] if entry else None,
+                })
+            await pipe.execute()
+        return len(entries)
+
+    # --- Loop flush (per worker; klaim atomik mencegah job ganda) ---
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                flushed = await self.flush_due()
+                if flushed:
+                    logger.debug(f"Debounce embedding: {flushed} job diantrikan.")
+                    if flushed >= self.max_flush:
+                        continue  # Masih ada antrean jatuh tempo
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error di loop flush debounce embedding: {e}", exc_info=True)
+            await asyncio.sleep(self.poll_interval_seconds)
+
+    def start(self):
+        if self._claim_script is None:
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+            logger.info("Loop flush debounce embedding dimulai.")
+
+    async def stop(self):
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+
+
+# Instance singleton
+embedding_job_debouncer = EmbeddingJobDebouncer(
+    delay_seconds=settings.EMBEDDING_DEBOUNCE_DELAY_SECONDS,
+    poll_interval_seconds=settings.EMBEDDING_DEBOUNCE_POLL_INTERVAL_SECONDS,
+    max_flush=settings.EMBEDDING_DEBOUNCE_MAX_FLUSH,
+    lease_seconds=settings.EMBEDDING_DEBOUNCE_LEASE_SECONDS,
+)
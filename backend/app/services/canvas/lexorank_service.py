@@ -3,7 +3,7 @@
 
 import logging
 import asyncio
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from uuid import UUID
 import json
 import redis.asyncio as redis
@@ -109,6 +109,34 @@ class LexoRankService:
             # yang akan memanggil _increment(sisa_dari_prev)
             return mid_str + self._increment(prev[i+1:] if i + 1 < len(prev) else None)
 
+    def _place(self, siblings: List[dict], position: str) -> Tuple[str, int]:
+        """
+        Menghitung LexoRank untuk `position` di antara `siblings` (urut y_order).
+        Mengembalikan (order, indeks sisip di `siblings`).
+        """
+        if not siblings:
+            return MID_CHAR, 0 # [PERBAIKAN] Gunakan MID_CHAR, bukan 'a0'
+
+        if position == "start":
+            first_order = siblings[0]["y_order"]
+            return self._between(None, first_order), 0
+
+        if position.startswith("after:"):
+            after_block_id = position.split(":", 1)[1]
+
+            for i, block in enumerate(siblings):
+                if str(block["block_id"]) == after_block_id:
+                    after_order = block["y_order"]
+                    next_order = None
+                    if i + 1 < len(siblings):
+                        next_order = siblings[i + 1]["y_order"]
+
+                    return self._between(after_order, next_order), i + 1
+
+        # position == "end" (atau block 'after:' tidak ditemukan)
+        last_order = siblings[-1]["y_order"]
+        return self._between(last_order, None), len(siblings)
+
     async def generate_order(
         self, 
         canvas_id: UUID, 
@@ -125,38 +153,50 @@ class LexoRankService:
             siblings = await block_queries.get_sibling_blocks_db(
                 admin_client, canvas_id, parent_id
             )
-            
-            if not siblings:
-                return MID_CHAR # [PERBAIKAN] Gunakan MID_CHAR, bukan 'a0'
-            
-            if position == "start":
-                first_order = siblings[0]["y_order"]
-                return self._between(None, first_order)
-            
-            elif position.startswith("after:"):
-                after_block_id = position.split(":", 1)[1]
-                
-                after_order = None
-                for i, block in enumerate(siblings):
-                    if str(block["block_id"]) == after_block_id:
-                        after_order = block["y_order"]
-                        next_order = None
-                        if i + 1 < len(siblings):
-                            next_order = siblings[i + 1]["y_order"]
-                        
-                        return self._between(after_order, next_order)
-                
-                last_order = siblings[-1]["y_order"]
-                return self._between(last_order, None)
-            
-            else:  # position == "end"
-                last_order = siblings[-1]["y_order"]
-                return self._between(last_order, None)
+            return self._place(siblings, position)[0]
                 
         except (Exception, DatabaseError) as e:
             logger.error(f"Error generating order: {e}", exc_info=True)
             return f"z{int(asyncio.get_event_loop().time())}" # Fallback
-    
+
+    async def generate_orders(
+        self,
+        canvas_id: UUID,
+        requests: List[Tuple[Optional[UUID], str, str]]
+    ) -> List[str]:
+        """
+        [BARU] Versi batch `generate_order` untuk banyak create sekaligus.
+        `requests`: (parent_id, position, block_id baru), urutan sesuai
+        urutan create. Sibling diambil SATU kali per parent (paralel); setiap
+        order yang dihasilkan disisipkan ke daftar sibling lokal sehingga
+        create berikutnya (mis. dua kali "end", atau "after:<block baru>")
+        mendapat urutan yang benar, tidak sama.
+        """
+        try:
+            admin_client = await self._get_admin_client()
+            parent_ids = list(dict.fromkeys(parent_id for parent_id, _, _ in requests))
+            sibling_lists = await asyncio.gather(*[
+                block_queries.get_sibling_blocks_db(admin_client, canvas_id, parent_id)
+                for parent_id in parent_ids
+            ])
+            siblings_by_parent = {
+                parent_id: list(siblings or [])
+                for parent_id, siblings in zip(parent_ids, sibling_lists)
+            }
+
+            orders = []
+            for parent_id, position, block_id in requests:
+                siblings = siblings_by_parent[parent_id]
+                order, index = self._place(siblings, position)
+                siblings.insert(index, {"block_id": block_id, "y_order": order})
+                orders.append(order)
+            return orders
+
+        except (Exception, DatabaseError) as e:
+            logger.error(f"Error generating orders (batch): {e}", exc_info=True)
+            base = int(asyncio.get_event_loop().time())
+            return [f"z{base}{i:03d}" for i in range(len(requests))] # Fallback
+
     async def check_rebalance_needed(self, canvas_id: UUID):
         """
         Memberi notifikasi ke Redis bahwa rebalancing diperlukan.
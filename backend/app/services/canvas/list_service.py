@@ -13,6 +13,8 @@ from app.core.exceptions import DatabaseError, NotFoundError, PermissionError
 # Impor file query DB yang baru
 from app.db.queries.canvas import canvas_queries
 from app.db.supabase_client import get_supabase_admin_async_client
+from app.services.access_cache import access_cache, SCOPE_CANVAS
+from app.services.semantic_response_cache import semantic_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +69,7 @@ class CanvasListService:
                 canvas_data=canvas_data,
                 creator_id=self.user.id
             )
+            await semantic_response_cache.invalidate_user(self.user.id)
             return new_canvas
         except DatabaseError as e:
             logger.error(f"Gagal membuat canvas di service: {e}", exc_info=True)
@@ -120,6 +123,9 @@ class CanvasListService:
                 canvas_id=canvas_id,
                 update_data=update_data
             )
+            # [BARU] access_info yang di-cache menyimpan data canvas
+            await access_cache.invalidate(SCOPE_CANVAS, canvas_id)
+            await semantic_response_cache.invalidate_canvas(canvas_id, editor_id=self.user.id)
             return updated_canvas
             
         except (NotFoundError, DatabaseError, ValueError) as e:
@@ -132,12 +138,18 @@ class CanvasListService:
         (Akses di-handle oleh dependency di endpoint)
         """
         admin_client = await self._get_admin_client()
+        # Anggota canvas diambil sebelum dihapus (setelahnya tidak bisa lagi)
+        reader_ids = await semantic_response_cache.canvas_user_ids(canvas_id)
         
         try:
             await canvas_queries.delete_canvas_db(
                 admin_client=admin_client,
                 canvas_id=canvas_id
             )
+            await access_cache.invalidate(SCOPE_CANVAS, canvas_id)
+            await semantic_response_cache.invalidate_canvas(
+                canvas_id, editor_id=self.user.id, user_ids=reader_ids
+            )
             # Sukses, tidak mengembalikan apa-apa
             
         except (NotFoundError, DatabaseError) as e:
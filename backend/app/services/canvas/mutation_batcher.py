@@ -0,0 +1,74 @@
+# File: backend/app/services/canvas/mutation_batcher.py
+# (FILE BARU - Tahap batching mutasi per WebSocket)
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MutationRequest:
+    """
+    Satu unit kiriman dari klien: satu pesan `mutation` (1 op) atau satu
+    pesan `mutation_batch` (N op). `batch_id` hanya diisi untuk
+    `mutation_batch` agar hasil per-op bisa dikirim balik ke pengirim.
+    """
+    payloads: List[Dict[str, Any]]
+    batch_id: Any = None
+    is_batch: bool = False
+
+
+BatchHandler = Callable[[List[MutationRequest]], Awaitable[None]]
+
+
+class MutationBatcher:
+    """
+    Mengumpulkan mutasi dari SATU socket selama beberapa milidetik lalu
+    memprosesnya sebagai satu batch (satu panggilan RPC).
+
+    - Urutan operasi per socket dipertahankan (satu consumer per socket).
+    - Flush terjadi saat `window_ms` sejak op pertama terlewati atau saat
+      jumlah op mencapai `max_ops`.
+    """
+
+    def __init__(self, handler: BatchHandler, window_ms: float = 5.0, max_ops: int = 50):
+        self._handler = handler
+        self._window_seconds = window_ms / 1000
+        self._max_ops = max_ops
+        self._queue: "asyncio.Queue[MutationRequest]" = asyncio.Queue()
+
+    def submit(self, request: MutationRequest) -> None:
+        self._queue.put_nowait(request)
+
+    async def _collect(self) -> List[MutationRequest]:
+        first = await self._queue.get()
+        requests = [first]
+        op_count = len(first.payloads)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._window_seconds
+        while op_count < self._max_ops:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                request = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            requests.append(request)
+            op_count += len(request.payloads)
+        return requests
+
+    async def run(self) -> None:
+        """Loop consumer; dijalankan sebagai task selama socket hidup."""
+        while True:
+            requests = await self._collect()
+            try:
+                await self._handler(requests)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Gagal memproses batch mutasi: {e}", exc_info=True)
@@ -3,7 +3,8 @@
 
 import json
 import logging
-from typing import Dict, Any, Optional
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
 from uuid import UUID
 from fastapi import WebSocket
 
@@ -13,6 +14,7 @@ from app.core.exceptions import DatabaseError, NotFoundError
 from app.services.canvas.lexorank_service import LexoRankService #
 from app.services.broadcast import broadcast_to_canvas #
 from app.db.queries.canvas import block_queries
+from app.services.semantic_response_cache import semantic_response_cache
 
 
 logger = logging.getLogger(__name__)
@@ -72,7 +74,7 @@ class CanvasSyncManager:
             admin_client = await self._get_admin_client()
 
             if action == "create" and not block_id:
-                block_id = UUID(str(UUID.uuid4()))
+                block_id = uuid.uuid4()
             
             if await block_queries.check_duplicate_operation_db(
                 admin_client, client_op_id, block_id
@@ -80,25 +82,6 @@ class CanvasSyncManager:
                 logger.debug(f"Operasi duplikat diabaikan: {client_op_id}")
                 return {"status": "success", "reason": "duplicate_ignored"}
             
-            current_block = None
-            if block_id and action in ["update", "delete"]:
-                current_block = await block_queries.get_block_by_id_rpc(
-                    admin_client, block_id
-                )
-                if not current_block and action == "delete":
-                    return {"status": "success", "reason": "already_deleted"}
-                
-                if current_block and expected_version is not None and \
-                   current_block.get("version") != expected_version:
-                    
-                    return {
-                        "status": "conflict",
-                        "block_id": str(block_id),
-                        "current_version": current_block.get("version"),
-                        "current_block": current_block,
-                        "client_op_id": client_op_id
-                    }
-            
             if action == "create" and "y_order" not in update_data:
                 parent_id = update_data.get("parent_id")
                 parent_id = UUID(parent_id) if parent_id else None
@@ -118,19 +101,146 @@ class CanvasSyncManager:
                 "p_type": update_data.get("type"),
                 "p_content": update_data.get("content"),
                 "p_properties": update_data.get("properties"),
-                "p_ai_metadata": update_data.get("ai_metadata")
+                "p_ai_metadata": update_data.get("ai_metadata"),
+                # [v0.4.4] Version check dilakukan di dalam RPC
+                "p_expected_version": expected_version
             }
             
             rpc_params = {k: v for k, v in rpc_params.items() if v is not None}
 
             result = await block_queries.execute_mutation_rpc(admin_client, rpc_params)
-            
+
+            if result.get("status") == "conflict":
+                return self.single_mutation_result(
+                    {**result, "block_id": str(block_id), "client_op_id": client_op_id}
+                )
+
+            if result.get("status") == "success":
+                await semantic_response_cache.invalidate_canvas(canvas_id, editor_id=user_id)
             return result
                 
         except (Exception, DatabaseError) as e:
             logger.error(f"Error handling block mutation: {e}", exc_info=True)
             raise
 
+    @staticmethod
+    def single_mutation_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Bentuk hasil untuk 'mutation' tunggal (kontrak lama ke klien):
+        konflik dikirim sebagai baseline `current_version` + `current_block`,
+        bukan baris mentah hasil RPC batch (`version`, `server_seq`).
+        """
+        if result.get("status") != "conflict":
+            return result
+        return {
+            "status": "conflict",
+            "block_id": str(result.get("block_id")),
+            "current_version": result.get("version"),
+            "current_block": result.get("current_block"),
+            "client_op_id": result.get("client_op_id")
+        }
+
+    def _prepare_batch_op(
+        self,
+        payload: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Memvalidasi satu mutasi dan mengubahnya menjadi elemen `p_ops`
+        untuk RPC rpc_upsert_blocks_batch. `y_order` untuk 'create' tanpa
+        posisi eksplisit diisi kemudian (lihat handle_block_mutation_batch).
+        """
+        client_op_id = payload.get("client_op_id")
+        action = payload.get("action")
+        update_data = dict(payload.get("update_data") or {})
+        block_id_str = payload.get("block_id")
+
+        if not client_op_id or not action:
+            raise ValueError("Mutasi dibatalkan: client_op_id atau action hilang.")
+        if action not in ("create", "update", "delete"):
+            raise ValueError(f"Action tidak valid: {action}")
+
+        if block_id_str:
+            block_id = UUID(block_id_str)
+        elif action == "create":
+            block_id = uuid.uuid4()
+        else:
+            raise ValueError("Mutasi dibatalkan: block_id hilang.")
+
+        op = {
+            "client_op_id": client_op_id,
+            "block_id": str(block_id),
+            "action": action,
+            "parent_id": str(update_data["parent_id"]) if update_data.get("parent_id") else None,
+            "y_order": update_data.get("y_order"),
+            "type": update_data.get("type"),
+            "content": update_data.get("content"),
+            "properties": update_data.get("properties"),
+            "ai_metadata": update_data.get("ai_metadata"),
+            "expected_version": payload.get("expected_version"),
+        }
+        return {k: v for k, v in op.items() if v is not None}
+
+    async def handle_block_mutation_batch(
+        self,
+        canvas_id: UUID,
+        user_id: UUID,
+        payloads: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Menangani beberapa mutasi sekaligus dengan SATU panggilan RPC.
+        Cek duplikat dan optimistic locking dilakukan di dalam RPC.
+        Mengembalikan hasil per operasi, urutannya sama dengan `payloads`.
+        Operasi yang tidak valid mendapat status 'failed' tanpa dikirim ke DB.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(payloads)
+        ops: List[Dict[str, Any]] = []
+        op_positions: List[int] = []
+
+        # (index op, parent_id, position) untuk create tanpa y_order
+        order_requests: List[Tuple[int, Optional[UUID], str]] = []
+
+        for i, payload in enumerate(payloads):
+            try:
+                op = self._prepare_batch_op(payload)
+                if op["action"] == "create" and "y_order" not in op:
+                    parent_id = op.get("parent_id")
+                    order_requests.append((
+                        len(ops),
+                        UUID(parent_id) if parent_id else None,
+                        (payload.get("update_data") or {}).get("position", "end")
+                    ))
+                ops.append(op)
+                op_positions.append(i)
+            except Exception as e:
+                results[i] = {
+                    "status": "failed",
+                    "error": str(e),
+                    "client_op_id": payload.get("client_op_id"),
+                    "block_id": payload.get("block_id"),
+                }
+
+        if order_requests:
+            # Satu query sibling per parent untuk semua create di batch ini;
+            # create beruntun ke posisi yang sama mendapat urutan berbeda
+            orders = await self.lexorank_service.generate_orders(
+                canvas_id,
+                [(parent_id, position, ops[index]["block_id"]) for index, parent_id, position in order_requests]
+            )
+            for (index, _, _), y_order in zip(order_requests, orders):
+                ops[index]["y_order"] = y_order
+
+        if ops:
+            admin_client = await self._get_admin_client()
+            rpc_results = await block_queries.execute_mutation_batch_rpc(
+                admin_client, canvas_id, user_id, ops
+            )
+            for position, rpc_result in zip(op_positions, rpc_results):
+                results[position] = rpc_result
+            if any(r.get("status") == "success" for r in rpc_results):
+                await semantic_response_cache.invalidate_canvas(canvas_id, editor_id=user_id)
+
+        return results
+
     async def handle_presence_update(
         self, 
         canvas_id: UUID, 
@@ -142,7 +252,7 @@ class CanvasSyncManager:
             await broadcast_to_canvas(canvas_id, {
                 "type": "presence",
                 "payload": {"user_id": str(user_id), "data": payload}
-            }, exclude_user_id=user_id)
+            }, exclude_user_id=user_id, ephemeral=True)
         except Exception as e:
             logger.error(f"Error handling presence update: {e}", exc_info=True)
             
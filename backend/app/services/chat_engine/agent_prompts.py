@@ -37,6 +37,32 @@ Pesan Pengguna (Fokus Anda):
 ---
 """
 
+# ===================================================================
+# 2b. [BARU] Prompt untuk Node gabungan: route_and_transform
+#     (classify_intent + query_transform dalam SATU panggilan LLM)
+# ===================================================================
+ROUTE_AND_TRANSFORM_PROMPT = f"""
+Anda adalah Router percakapan. Lakukan DUA tugas sekaligus berdasarkan input berikut.
+Versi Prompt: {AGENT_PROMPT_VERSION}
+
+1. Klasifikasikan niat pengguna sebagai salah satu dari: "simple_chat", "rag_query", "agentic_request".
+   Tentukan juga apakah ada potensi preferensi yang perlu diekstrak (true/false).
+2. HANYA jika niat adalah "rag_query": ubah pesan pengguna menjadi kueri pencarian mandiri
+   (standalone) yang dioptimalkan untuk RAG (Vektor + Keyword):
+   "rag_query" (kueri semantik) dan "ts_query" (kueri keyword tsquery, misal: 'kata1 & kata2').
+   Untuk niat lain, kosongkan "rag_query" dan "ts_query".
+
+Anda WAJIB menghasilkan JSON.
+(Format: "intent": "...", "potential_preference": true/false, "rag_query": "...", "ts_query": "...")
+---
+Riwayat percakapan:
+{{chat_history}}
+---
+Pesan pengguna:
+{{user_message}}
+---
+"""
+
 # ===================================================================
 # 3. [BARU v2.8] Prompt untuk Node: rerank_context (Gemini Flash)
 # ===================================================================
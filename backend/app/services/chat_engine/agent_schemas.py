@@ -33,6 +33,28 @@ class RagQueryTransform(BaseModel):
         description="Kueri pencarian keyword (teks) yang dioptimalkan untuk tsquery (misal: 'kata1 & kata2')."
     )
 
+class RouterDecision(BaseModel):
+    """
+    Skema output terstruktur untuk node gabungan 'route_and_transform'
+    (IntentClassification + RagQueryTransform dalam satu panggilan).
+    """
+    intent: Literal["simple_chat", "agentic_request", "rag_query"] = Field(
+        ...,
+        description="Klasifikasi niat utama pengguna."
+    )
+    potential_preference: bool = Field(
+        default=False,
+        description="Set True jika pesan pengguna kemungkinan mengandung fakta, aturan, atau preferensi baru."
+    )
+    rag_query: Optional[str] = Field(
+        default=None,
+        description="Kueri pencarian semantik (vektor) yang dioptimalkan. Hanya diisi jika intent='rag_query'."
+    )
+    ts_query: Optional[str] = Field(
+        default=None,
+        description="Kueri keyword untuk tsquery (misal: 'kata1 & kata2'). Hanya diisi jika intent='rag_query'."
+    )
+
 class ToolApprovalRequest(BaseModel):
     """
     Skema output terstruktur untuk node 'reflection_node' (HiTL).
@@ -30,16 +30,27 @@ class AgentState(TypedDict, total=False):
     # === 2. Data Inti Percakapan ===
     user_message: str
     chat_history: List[BaseMessage]
+    # [BARU] Token count per pesan di chat_history (sejajar indeks), dari cache riwayat
+    chat_history_token_counts: Optional[List[int]]
 
     # === 3. Hasil Node Klasifikasi & RAG ===
     intent: str
     potential_preference: bool
     rag_query: Optional[str]
     ts_query: Optional[str] # [BARU] Untuk Hybrid Search
+    # [BARU] Embedding rag_query dari retrieval, dipakai ulang reranker lokal
+    rag_query_embedding: Optional[List[float]]
     retrieved_docs: List[Dict[str, Any]]
     provenance: List[Dict[str, Any]]
     reranked_docs: List[Dict[str, Any]]
     compressed_context: str
+    # [BARU] True jika retrieved_docs berasal dari retrieval spekulatif
+    speculative_retrieval_used: bool
+    # [BARU] Cache respons semantik (nodes/semantic_cache.py)
+    semantic_cache_hit: bool
+    semantic_cache_embedding: Optional[List[float]]
+    semantic_cache_generation: Optional[str]
+    semantic_cache_context: Optional[str]
 
     # === 4. Hasil Eksekusi & Status ===
     # [BARU] Menyimpan tool calls yang diusulkan sebelum refleksi
@@ -10,8 +10,8 @@ from langchain_core.messages import HumanMessage
 from datetime import datetime, timezone  # <-- add import
 
 from app.models.user import User
-from app.services.chat_engine.helpers import MessageLoader, PermissionHelper, TokenCounter
-from app.services.chat_engine.streaming_service import StreamingService
+from app.services.chat_engine.helpers import MessageLoader, PermissionHelper, TokenCounter, conversation_history_cache
+from app.services.chat_engine.streaming_service import StreamingService, StreamResult
 from app.db.queries.conversation import conversation_queries
 from app.core.config import settings
 from app.services.chat_engine.agent_prompts import AGENT_SYSTEM_PROMPT  # ensure imported
@@ -98,8 +98,7 @@ class ChatService:
         auth_info = {"user": user, "client": client}
         
         # 6. Stream agent response & capture final state
-        response_chunks = []
-        final_state = None
+        stream_result = StreamResult()
         
         # --- FIX: provide current_time when formatting AGENT_SYSTEM_PROMPT for token estimation ---
         try:
@@ -122,7 +121,7 @@ class ChatService:
                 AGENT_SYSTEM_PROMPT.format(
                     current_time=current_time_str,
                     compressed_context="(Tidak ada konteks RAG)",
-                    chat_history=await MessageLoader.load_history(client, user.id, conversation_id, limit=40),  # minimal safe value
+                    chat_history=chat_history,  # riwayat yang sudah dimuat di langkah 2
                     user_message=message
                 )
             )
@@ -156,32 +155,14 @@ class ChatService:
             auth_info=auth_info,
             embedding_service=embedding_service,
             background_tasks=background_tasks,
-            llm_config=llm_config  # pass-through
+            llm_config=llm_config,  # pass-through
+            result=stream_result  # respons & final_state diisi langsung (tanpa re-parse JSON)
         ):
-            # Capture token chunks
-            if '"type": "token_chunk"' in sse_event:
-                try:
-                    import json
-                    event_data = json.loads(sse_event.strip())
-                    if event_data.get("type") == "token_chunk":
-                        response_chunks.append(event_data.get("payload", "") or "")
-                except Exception:
-                    pass
-
-            # Capture final_state
-            if '"type": "final_state"' in sse_event:
-                try:
-                    import json
-                    event_data = json.loads(sse_event.strip())
-                    final_state = event_data.get("payload", {}) or {}
-                    logger.debug(f"Captured final_state: {final_state}")
-                except Exception as e:
-                    logger.error(f"Failed to parse final_state: {e}")
-
             yield sse_event
 
         # Persist messages with accurate token usage
-        final_response = "".join(response_chunks)
+        final_response = stream_result.response_text
+        final_state = stream_result.final_state
 
         # Parse final_state
         if final_state:
@@ -246,10 +227,12 @@ class ChatService:
                 "token_count": int(total_input_tokens),
                 "input_tokens": int(user_input_tokens),
                 "output_tokens": 0,
+                "content_tokens": int(user_input_tokens),  # Token isi pesan (dipakai cache riwayat)
                 "api_call_count": 0  # NEW: User messages don't make API calls
             }
             
-            await client.table("messages").insert(user_message_data).execute()
+            user_result = await client.table("messages").insert(user_message_data).execute()
+            saved_rows = list(user_result.data or [])
             logger.debug(f"Saved user message for conversation {conversation_id}")
             
             # AI message (with API call count)
@@ -263,13 +246,26 @@ class ChatService:
                     "token_count": int(total_output_tokens),
                     "input_tokens": 0,
                     "output_tokens": int(total_output_tokens),
+                    "content_tokens": TokenCounter.count_tokens(ai_response),
                     "api_call_count": int(api_call_count)  # NEW: Exact count of API calls
                 }
                 
-                await client.table("messages").insert(ai_message_data).execute()
+                ai_result = await client.table("messages").insert(ai_message_data).execute()
+                saved_rows.extend(ai_result.data or [])
                 logger.debug(f"Saved AI response for conversation {conversation_id} ({api_call_count} API calls)")
             
             logger.info(f"Messages saved successfully for conversation {conversation_id}")
+
+            # [BARU] Append inkremental ke cache riwayat (tanpa refetch dari DB)
+            if len(saved_rows) == (2 if ai_response else 1):
+                await conversation_history_cache.append(user_id, conversation_id, saved_rows)
+            else:
+                await conversation_history_cache.invalidate(user_id, conversation_id)
             
         except Exception as e:
             logger.error(f"Failed to save messages for conversation {conversation_id}: {e}", exc_info=True)
+            # Cache mungkin tertinggal dari DB (insert parsial) -> buang
+            try:
+                await conversation_history_cache.invalidate(user_id, conversation_id)
+            except Exception:
+                pass
@@ -3,5 +3,6 @@ Redis checkpoint management untuk LangGraph.
 """
 
 from .redis_saver import LangChainSerializer, AsyncCompatibleRedisSaver
+from .async_redis_saver import AsyncRedisCheckpointSaver
 
-__all__ = ["LangChainSerializer", "AsyncCompatibleRedisSaver"]
+__all__ = ["LangChainSerializer", "AsyncCompatibleRedisSaver", "AsyncRedisCheckpointSaver"]
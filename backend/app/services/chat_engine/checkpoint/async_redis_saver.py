@@ -0,0 +1,301 @@
+# File: backend/app/services/chat_engine/checkpoint/async_redis_saver.py
+# (FILE BARU - Checkpointer LangGraph async-native di atas redis.asyncio)
+
+import logging
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+logger = logging.getLogger(__name__)
+
+_SEP = b"\x00"
+_EMPTY = "empty"
+
+
+def _pack(type_name: str, data: bytes) -> bytes:
+    return type_name.encode("utf-8") + _SEP + data
+
+
+def _unpack(raw: bytes) -> Tuple[str, bytes]:
+    type_name, data = raw.split(_SEP, 1)
+    return type_name.decode("utf-8"), data
+
+
+class AsyncRedisCheckpointSaver(BaseCheckpointSaver):
+    """
+    Checkpointer LangGraph yang sepenuhnya async (redis.asyncio), tanpa
+    `asyncio.to_thread` per operasi seperti `AsyncCompatibleRedisSaver`.
+
+    Layout key (prefix default `lg:ckpt`), per (thread_id, checkpoint_ns):
+    - `{p}:idx:{thread}:{ns}`              ZSET id checkpoint (skor 0, urut leksikal;
+                                           id uuid6 LangGraph monoton naik)
+    - `{p}:cp:{thread}:{ns}:{id}`          HASH checkpoint TANPA channel_values,
+                                           metadata, parent_id
+    - `{p}:blob:{thread}:{ns}:{ch}:{ver}`  nilai satu channel pada satu versi
+    - `{p}:writes:{thread}:{ns}:{id}`      HASH pending writes per task
+
+    Setiap `aput` hanya menulis blob channel yang ada di `new_versions`
+    (delta), bukan snapshot state penuh; channel lain direferensikan lewat
+    `channel_versions`. Semua tulisan satu checkpoint = 1 pipeline. Nilai
+    diserialisasi `JsonPlusSerializer` (msgpack biner; pesan LangChain,
+    pydantic, datetime didukung). Semua key memakai TTL (`ttl_seconds`) yang
+    diperbarui setiap thread ditulis, dan thread dipangkas ke `keep_last`
+    checkpoint terbaru.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        ttl_seconds: int = 7 * 24 * 3600,
+        keep_last: int = 50,
+        key_prefix: str = "lg:ckpt",
+        serde: Optional[Any] = None,
+    ):
+        super().__init__(serde=serde or JsonPlusSerializer())
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.keep_last = keep_last
+        self.key_prefix = key_prefix
+        # Pangkas per batch agar tidak ada round trip tambahan di setiap aput
+        self._trim_slack = max(1, keep_last // 5)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "AsyncRedisCheckpointSaver":
+        # decode_responses=False: nilai checkpoint berupa bytes msgpack
+        return cls(redis.from_url(url, decode_responses=False), **kwargs)
+
+    # --- Key helpers ---
+
+    def _idx_key(self, thread_id: str, ns: str) -> str:
+        return f"{self.key_prefix}:idx:{thread_id}:{ns}"
+
+    def _cp_key(self, thread_id: str, ns: str, checkpoint_id: str) -> str:
+        return f"{self.key_prefix}:cp:{thread_id}:{ns}:{checkpoint_id}"
+
+    def _blob_key(self, thread_id: str, ns: str, channel: str, version: Any) -> str:
+        return f"{self.key_prefix}:blob:{thread_id}:{ns}:{channel}:{version}"
+
+    def _writes_key(self, thread_id: str, ns: str, checkpoint_id: str) -> str:
+        return f"{self.key_prefix}:writes:{thread_id}:{ns}:{checkpoint_id}"
+
+    @staticmethod
+    def _ids(config: RunnableConfig) -> Tuple[str, str, Optional[str]]:
+        configurable = config["configurable"]
+        return (
+            str(configurable["thread_id"]),
+            configurable.get("checkpoint_ns", ""),
+            configurable.get("checkpoint_id"),
+        )
+
+    # --- Tulis ---
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id, ns, parent_id = self._ids(config)
+        checkpoint_id = checkpoint["id"]
+
+        stored = dict(checkpoint)
+        channel_values = stored.pop("channel_values", None) or {}
+        cp_type, cp_data = self.serde.dumps_typed(stored)
+        meta_type, meta_data = self.serde.dumps_typed(metadata)
+
+        idx_key = self._idx_key(thread_id, ns)
+        cp_key = self._cp_key(thread_id, ns, checkpoint_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hset(cp_key, mapping={
+                "checkpoint": _pack(cp_type, cp_data),
+                "metadata": _pack(meta_type, meta_data),
+                "parent_id": parent_id or "",
+            })
+            pipe.expire(cp_key, self.ttl_seconds)
+            pipe.zadd(idx_key, {checkpoint_id: 0})
+            pipe.expire(idx_key, self.ttl_seconds)
+
+            # Delta: hanya channel yang berubah versinya
+            for channel, version in new_versions.items():
+                if channel in channel_values:
+                    blob = _pack(*self.serde.dumps_typed(channel_values[channel]))
+                else:
+                    blob = _pack(_EMPTY, b"")
+                pipe.set(self._blob_key(thread_id, ns, channel, version), blob, ex=self.ttl_seconds)
+            # Blob lama yang masih direferensikan checkpoint ini ikut diperpanjang
+            for channel, version in checkpoint.get("channel_versions", {}).items():
+                if channel not in new_versions:
+                    pipe.expire(self._blob_key(thread_id, ns, channel, version), self.ttl_seconds)
+            pipe.zcard(idx_key)
+            results = await pipe.execute()
+
+        if results[-1] > self.keep_last + self._trim_slack:
+            await self._trim(thread_id, ns)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id, ns, checkpoint_id = self._ids(config)
+        writes_key = self._writes_key(thread_id, ns, checkpoint_id)
+        # Channel khusus (error/interrupt/...) menimpa; write biasa tidak (idempoten saat retry)
+        upsert = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for idx, (channel, value) in enumerate(writes):
+                field = f"{task_id}:{WRITES_IDX_MAP.get(channel, idx):08d}"
+                type_name, data = self.serde.dumps_typed(value)
+                packed = _pack(channel, _pack(type_name, data))
+                if upsert:
+                    pipe.hset(writes_key, field, packed)
+                else:
+                    pipe.hsetnx(writes_key, field, packed)
+            pipe.expire(writes_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def _trim(self, thread_id: str, ns: str) -> None:
+        """Menghapus checkpoint tertua di luar `keep_last` (blob yatim habis oleh TTL)."""
+        idx_key = self._idx_key(thread_id, ns)
+        stale = await self.client.zrange(idx_key, 0, -(self.keep_last + 1))
+        if not stale:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for raw_id in stale:
+                checkpoint_id = raw_id.decode("utf-8")
+                pipe.delete(
+                    self._cp_key(thread_id, ns, checkpoint_id),
+                    self._writes_key(thread_id, ns, checkpoint_id),
+                )
+            pipe.zrem(idx_key, *stale)
+            await pipe.execute()
+
+    # --- Baca ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id, ns, checkpoint_id = self._ids(config)
+        if checkpoint_id is None:
+            latest = await self.client.zrevrange(self._idx_key(thread_id, ns), 0, 0)
+            if not latest:
+                return None
+            checkpoint_id = latest[0].decode("utf-8")
+        return await self._load_tuple(thread_id, ns, checkpoint_id)
+
+    async def _load_tuple(self, thread_id: str, ns: str, checkpoint_id: str) -> Optional[CheckpointTuple]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._cp_key(thread_id, ns, checkpoint_id))
+            pipe.hgetall(self._writes_key(thread_id, ns, checkpoint_id))
+            stored, raw_writes = await pipe.execute()
+        if not stored:
+            return None
+
+        checkpoint = self.serde.loads_typed(_unpack(stored[b"checkpoint"]))
+        metadata = self.serde.loads_typed(_unpack(stored[b"metadata"]))
+        parent_id = stored.get(b"parent_id", b"").decode("utf-8")
+
+        versions: Dict[str, Any] = checkpoint.get("channel_versions", {})
+        channels = list(versions.keys())
+        channel_values: Dict[str, Any] = {}
+        if channels:
+            blobs = await self.client.mget(
+                [self._blob_key(thread_id, ns, ch, versions[ch]) for ch in channels]
+            )
+            for channel, blob in zip(channels, blobs):
+                if blob is None:
+                    logger.warning(f"Blob checkpoint hilang (TTL?): thread={thread_id} channel={channel}")
+                    continue
+                type_name, data = _unpack(blob)
+                if type_name != _EMPTY:
+                    channel_values[channel] = self.serde.loads_typed((type_name, data))
+        checkpoint["channel_values"] = channel_values
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=metadata,
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=self._decode_writes(raw_writes),
+        )
+
+    def _decode_writes(self, raw_writes: Dict[bytes, bytes]) -> List[Tuple[str, str, Any]]:
+        pending = []
+        for field in sorted(raw_writes):
+            task_id = field.decode("utf-8").rsplit(":", 1)[0]
+            channel, typed = _unpack(raw_writes[field])
+            pending.append((task_id, channel, self.serde.loads_typed(_unpack(typed))))
+        return pending
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if config is None:
+            raise ValueError("AsyncRedisCheckpointSaver.alist membutuhkan config dengan thread_id")
+        thread_id, ns, _ = self._ids(config)
+        ids = await self.client.zrevrange(self._idx_key(thread_id, ns), 0, -1)
+        before_id = (before or {}).get("configurable", {}).get("checkpoint_id")
+
+        returned = 0
+        for raw_id in ids:
+            checkpoint_id = raw_id.decode("utf-8")
+            if before_id and checkpoint_id >= before_id:
+                continue
+            item = await self._load_tuple(thread_id, ns, checkpoint_id)
+            if item is None:
+                continue
+            if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            yield item
+            returned += 1
+            if limit is not None and returned >= limit:
+                return
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Menghapus semua checkpoint, blob, dan writes milik satu thread."""
+        thread_id = str(thread_id)
+        patterns: Iterable[str] = (
+            f"{self.key_prefix}:{kind}:{thread_id}:*" for kind in ("idx", "cp", "blob", "writes")
+        )
+        for pattern in patterns:
+            batch = []
+            async for key in self.client.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    await self.client.delete(*batch)
+                    batch = []
+            if batch:
+                await self.client.delete(*batch)
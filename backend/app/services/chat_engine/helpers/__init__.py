@@ -5,9 +5,11 @@ Helper utilities untuk chat engine.
 from .token_counter import TokenCounter
 from .permission_helper import PermissionHelper
 from .message_loader import MessageLoader
+from .history_cache import conversation_history_cache
 
 __all__ = [
     "TokenCounter",
     "PermissionHelper",
-    "MessageLoader"
+    "MessageLoader",
+    "conversation_history_cache"
 ]
@@ -0,0 +1,279 @@
+"""
+Per-conversation chat history cache (in-process + Redis).
+
+Satu giliran chat sebelumnya memuat riwayat dari DB hingga 3x
+(`MessageLoader.load_history` 2x + node `load_full_history` dengan limit
+1000) dan meng-tokenisasi ulang semuanya. Cache ini menyimpan baris pesan
+terbaru per percakapan beserta token count-nya, dan di-append secara
+inkremental setelah setiap giliran (`ChatService._save_messages_after_stream`).
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+from dateutil.parser import parse as dt_parse
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.core.utils import serialization
+from app.core.utils.ttl_cache import TTLCache
+from app.db.queries.conversation import message_queries
+from app.services.chat_engine.helpers.token_counter import TokenCounter
+from app.services.redis_pubsub import redis_pubsub_manager
+from app.services.redis_rate_limiter import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Channel Pub/Sub untuk membuang cache lokal di worker lain setelah append
+HISTORY_INVALIDATION_CHANNEL = "chat_history:invalidate"
+
+CHAT_HISTORY_CACHE_LOOKUPS = Counter(
+    "chat_history_cache_lookups_total",
+    "Total lookup cache riwayat percakapan",
+    ["layer"]  # 'local' | 'redis' | 'db'
+)
+
+# Role AI disimpan sebagai 'ai' oleh ChatService; 'assistant' oleh message_queries
+_AI_ROLES = ("ai", "assistant")
+
+
+def _to_message(row: Dict[str, Any], formatted: bool) -> Optional[BaseMessage]:
+    content = row.get("content") or ""
+    if formatted:
+        try:
+            timestamp_str = dt_parse(row["created_at"]).strftime('%Y-%m-%d %H:%M %Z')
+        except Exception:
+            timestamp_str = "timestamp_unknown"
+        content = f"[{timestamp_str}] {content}"
+
+    role = row.get("role")
+    if role == "user":
+        return HumanMessage(content=content)
+    if role in _AI_ROLES:
+        tool_calls = row.get("tool_calls")
+        if tool_calls:
+            return AIMessage(content=content, tool_calls=tool_calls)
+        return AIMessage(content=content)
+    return None
+
+
+class _HistoryEntry:
+    """Baris pesan (urut lama -> baru) + hasil konversi yang di-memo."""
+
+    __slots__ = ("rows", "_views")
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self._views: Dict[bool, Tuple[List[BaseMessage], List[int]]] = {}
+
+    def view(self, formatted: bool) -> Tuple[List[BaseMessage], List[int]]:
+        cached = self._views.get(formatted)
+        if cached is None:
+            messages: List[BaseMessage] = []
+            token_counts: List[int] = []
+            for row in self.rows:
+                message = _to_message(row, formatted)
+                if message is not None:
+                    messages.append(message)
+                    token_counts.append(int(row.get("token_count") or 0))
+            cached = self._views[formatted] = (messages, token_counts)
+        return cached
+
+    def extend(self, rows: List[Dict[str, Any]], max_messages: int) -> None:
+        self.rows = (self.rows + rows)[-max_messages:]
+        self._views.clear()
+
+
+class ConversationHistoryCache:
+    """
+    Cache riwayat percakapan 2 tingkat:
+    1. In-process TTL/LRU berisi baris + `BaseMessage` yang sudah dikonversi.
+    2. Redis LIST `chat:history:{user_id}:{conversation_id}` (JSON per baris).
+
+    Token count per baris (isi mentah, tanpa prefix timestamp) diambil dari
+    kolom `messages.content_tokens` (atau dihitung sekali saat baris masuk
+    cache), lalu dipakai ulang oleh `manage_context_window`.
+    """
+
+    def __init__(
+        self,
+        local_ttl_seconds: int,
+        redis_ttl_seconds: int,
+        max_conversations: int,
+        max_messages: int,
+    ):
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.max_messages = max_messages
+        self._local: TTLCache[_HistoryEntry] = TTLCache(max_size=max_conversations, ttl_seconds=local_ttl_seconds)
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _local_key(user_id: Union[str, UUID], conversation_id: Union[str, UUID]) -> Tuple[str, str]:
+        return (str(user_id), str(conversation_id))
+
+    @staticmethod
+    def _redis_key(user_id: Union[str, UUID], conversation_id: Union[str, UUID]) -> str:
+        return f"chat:history:{user_id}:{conversation_id}"
+
+    @staticmethod
+    def _normalize(row: Dict[str, Any]) -> Dict[str, Any]:
+        content = row.get("content") or ""
+        # Token count yang dipersist saat insert (messages.content_tokens);
+        # baris lama tanpa kolom ini dihitung ulang sekali di sini.
+        token_count = row.get("content_tokens")
+        if token_count is None:
+            token_count = TokenCounter.count_tokens(content)
+        normalized = {
+            "role": row.get("role"),
+            "content": content,
+            "created_at": row.get("created_at"),
+            "token_count": int(token_count),
+        }
+        if row.get("tool_calls"):
+            normalized["tool_calls"] = row["tool_calls"]
+        return normalized
+
+    async def _load_entry(self, client, user_id: UUID, conversation_id: UUID) -> _HistoryEntry:
+        key = self._local_key(user_id, conversation_id)
+        entry = self._local.get(key)
+        if entry is not None:
+            CHAT_HISTORY_CACHE_LOOKUPS.labels(layer="local").inc()
+            return entry
+
+        redis_key = self._redis_key(user_id, conversation_id)
+        if redis_client is not None:
+            try:
+                raw_rows = await redis_client.lrange(redis_key, 0, -1)
+                if raw_rows:
+                    entry = _HistoryEntry([serialization.loads(r) for r in raw_rows])
+                    self._local.set(key, entry)
+                    CHAT_HISTORY_CACHE_LOOKUPS.labels(layer="redis").inc()
+                    return entry
+            except Exception as e:
+                logger.warning(f"Gagal membaca cache riwayat dari Redis untuk {conversation_id}: {e}")
+
+        CHAT_HISTORY_CACHE_LOOKUPS.labels(layer="db").inc()
+        db_rows = await message_queries.get_recent_conversation_messages(
+            client, user_id, conversation_id, limit=self.max_messages
+        )
+        entry = _HistoryEntry([self._normalize(r) for r in db_rows])
+        self._local.set(key, entry)
+
+        if redis_client is not None and entry.rows:
+            try:
+                async with redis_client.pipeline(transaction=True) as pipe:
+                    pipe.delete(redis_key)
+                    pipe.rpush(redis_key, *[serialization.dumps(r) for r in entry.rows])
+                    pipe.expire(redis_key, self.redis_ttl_seconds)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Gagal menulis cache riwayat ke Redis untuk {conversation_id}: {e}")
+        return entry
+
+    async def get_history(
+        self,
+        client,
+        user_id: UUID,
+        conversation_id: UUID,
+        limit: Optional[int] = None,
+        formatted: bool = False,
+    ) -> Tuple[List[BaseMessage], List[int]]:
+        """
+        Mengembalikan (messages, token_counts) untuk `limit` pesan terakhir.
+        `formatted=True` menambahkan prefix timestamp seperti `MessageLoader`.
+        List yang dikembalikan adalah salinan; aman untuk di-append caller.
+        """
+        entry = await self._load_entry(client, user_id, conversation_id)
+        messages, token_counts = entry.view(formatted)
+        if limit is not None:
+            return messages[-limit:], token_counts[-limit:]
+        return list(messages), list(token_counts)
+
+    async def append(
+        self,
+        user_id: Union[str, UUID],
+        conversation_id: Union[str, UUID],
+        rows: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Menambahkan baris pesan baru (hasil insert DB) ke cache yang SUDAH ada.
+        Jika percakapan belum di-cache, tidak ada yang dilakukan; pembacaan
+        berikutnya akan mengisi cache dari DB (yang sudah berisi baris ini).
+        """
+        if not rows:
+            return
+        normalized = [self._normalize(r) for r in rows]
+
+        entry = self._local.get(self._local_key(user_id, conversation_id))
+        if entry is not None:
+            entry.extend(normalized, self.max_messages)
+
+        if redis_client is not None:
+            redis_key = self._redis_key(user_id, conversation_id)
+            try:
+                async with redis_client.pipeline(transaction=True) as pipe:
+                    # RPUSHX: hanya append jika list sudah ada (tidak membuat
+                    # list parsial yang berisi pesan terbaru saja)
+                    pipe.rpushx(redis_key, *[serialization.dumps(r) for r in normalized])
+                    pipe.ltrim(redis_key, -self.max_messages, -1)
+                    pipe.expire(redis_key, self.redis_ttl_seconds)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Gagal append cache riwayat Redis untuk {conversation_id}: {e}")
+                await self._drop_redis(redis_key)
+
+        await redis_pubsub_manager.publish(HISTORY_INVALIDATION_CHANNEL, {
+            "user_id": str(user_id),
+            "conversation_id": str(conversation_id),
+            "origin": redis_pubsub_manager.node_id,
+        })
+
+    async def invalidate(self, user_id: Union[str, UUID], conversation_id: Union[str, UUID]) -> None:
+        self._local.pop(self._local_key(user_id, conversation_id))
+        await self._drop_redis(self._redis_key(user_id, conversation_id))
+        await redis_pubsub_manager.publish(HISTORY_INVALIDATION_CHANNEL, {
+            "user_id": str(user_id),
+            "conversation_id": str(conversation_id),
+        })
+
+    async def _drop_redis(self, redis_key: str) -> None:
+        if redis_client is None:
+            return
+        try:
+            await redis_client.delete(redis_key)
+        except Exception as e:
+            logger.warning(f"Gagal menghapus cache riwayat Redis {redis_key}: {e}")
+
+    # --- Listener invalidasi (per worker) ---
+
+    async def _invalidation_listener(self):
+        async for message in redis_pubsub_manager.subscribe(HISTORY_INVALIDATION_CHANNEL):
+            if message.get("origin") == redis_pubsub_manager.node_id:
+                # Append dari worker ini, cache lokal sudah diperbarui
+                continue
+            self._local.pop(self._local_key(message.get("user_id"), message.get("conversation_id")))
+
+    def start_invalidation_listener(self):
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._invalidation_listener())
+            logger.info("Listener invalidasi cache riwayat percakapan dimulai.")
+
+    async def stop_invalidation_listener(self):
+        if self._listener_task and not self._listener_task.done():
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+        self._listener_task = None
+
+
+# Instance singleton
+conversation_history_cache = ConversationHistoryCache(
+    local_ttl_seconds=settings.CHAT_HISTORY_CACHE_LOCAL_TTL_SECONDS,
+    redis_ttl_seconds=settings.CHAT_HISTORY_CACHE_REDIS_TTL_SECONDS,
+    max_conversations=settings.CHAT_HISTORY_CACHE_MAX_CONVERSATIONS,
+    max_messages=settings.CHAT_HISTORY_CACHE_MAX_MESSAGES,
+)
@@ -35,6 +35,9 @@ class RequestTrace:
     total_cost_usd: float = 0.0
     total_duration_ms: float = 0.0
     errors: List[str] = field(default_factory=list)
+    # Breakdown waktu per node LangGraph (ms, dijumlah jika node berjalan >1x)
+    node_timings_ms: Dict[str, float] = field(default_factory=dict)
+    time_to_first_token_ms: Optional[float] = None
     
     def add_llm_call(self, call: LLMCallTrace):
         """Add LLM call and update totals."""
@@ -60,7 +63,12 @@ class RequestTrace:
                 "total_duration_ms": round(self.total_duration_ms, 2),
                 "num_llm_calls": len(self.llm_calls),
                 "errors": self.errors
-            }
+            },
+            "node_timings_ms": {k: round(v, 2) for k, v in self.node_timings_ms.items()},
+            "time_to_first_token_ms": (
+                round(self.time_to_first_token_ms, 2)
+                if self.time_to_first_token_ms is not None else None
+            )
         }
 
 
@@ -130,6 +138,21 @@ class ObservabilityCollector:
         
         cls._active_traces[request_id].add_llm_call(call)
     
+    @classmethod
+    def record_node_timing(cls, request_id: str, node_name: str, duration_ms: float):
+        """Record durasi satu eksekusi node LangGraph."""
+        trace = cls._active_traces.get(request_id)
+        if trace is None:
+            return
+        trace.node_timings_ms[node_name] = trace.node_timings_ms.get(node_name, 0.0) + duration_ms
+
+    @classmethod
+    def record_first_token(cls, request_id: str, elapsed_ms: float):
+        """Record time-to-first-token (sejak stream dimulai)."""
+        trace = cls._active_traces.get(request_id)
+        if trace is not None and trace.time_to_first_token_ms is None:
+            trace.time_to_first_token_ms = elapsed_ms
+
     @classmethod
     def get_trace(cls, request_id: str) -> Optional[RequestTrace]:
         """Get trace for a request."""
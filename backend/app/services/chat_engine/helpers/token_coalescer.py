@@ -0,0 +1,56 @@
+"""
+Penggabung token stream LLM menjadi frame SSE (berdasarkan ukuran atau waktu).
+"""
+import time
+from typing import List, Optional
+
+
+class TokenCoalescer:
+    """
+    Menampung token dan melepasnya sebagai satu frame jika:
+    - panjang buffer >= `max_chars`, atau
+    - token tertua di buffer sudah menunggu >= `max_delay_seconds`.
+
+    Token pertama dilepas langsung agar time-to-first-token tidak bertambah.
+    Tidak thread-safe; dipakai dari satu event loop.
+    """
+
+    def __init__(self, max_chars: int = 64, max_delay_seconds: float = 0.02):
+        self.max_chars = max_chars
+        self.max_delay_seconds = max_delay_seconds
+        self._parts: List[str] = []
+        self._size = 0
+        self._oldest_at: Optional[float] = None
+        self._emitted_any = False
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def add(self, token: str) -> None:
+        if not token:
+            return
+        if self._oldest_at is None:
+            self._oldest_at = time.monotonic()
+        self._parts.append(token)
+        self._size += len(token)
+
+    def time_until_due(self) -> Optional[float]:
+        """Detik sampai buffer wajib di-flush (0 jika sudah waktunya), None jika kosong."""
+        if self._oldest_at is None:
+            return None
+        if not self._emitted_any or self._size >= self.max_chars:
+            return 0.0
+        return max(0.0, self._oldest_at + self.max_delay_seconds - time.monotonic())
+
+    def ready(self) -> bool:
+        return self.time_until_due() == 0.0
+
+    def flush(self) -> Optional[str]:
+        if not self._parts:
+            return None
+        frame = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        self._oldest_at = None
+        self._emitted_any = True
+        return frame
@@ -1,19 +1,38 @@
 """
 Token counting utilities using tiktoken.
 """
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import List
 
 from langchain_core.messages import BaseMessage
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Teks lebih pendek dari ini langsung di-encode; biaya hashing + lookup
+# sebanding dengan tokenisasinya sendiri (mis. chunk token streaming).
+_MIN_CACHED_LENGTH = 64
+
 
 class TokenCounter:
-    """Utility class for counting tokens in text and messages."""
-    
+    """
+    Utility class for counting tokens in text and messages.
+
+    [BARU] Hasil dihitung sekali per konten: LRU in-memory dengan key hash
+    konten (blake2b) sehingga prompt fragment, system prompt, dan pesan
+    riwayat yang sama tidak di-tokenisasi ulang di setiap node / giliran.
+    Semua node chat engine memakai kelas ini (bukan `tiktoken` langsung).
+    """
+
     _tokenizer = None
-    
+    _cache: "OrderedDict[bytes, int]" = OrderedDict()
+    _cache_max_size: int = settings.TOKEN_COUNT_CACHE_MAX_SIZE
+    _cache_lock = threading.Lock()
+
     @classmethod
     def _get_tokenizer(cls):
         """Lazy load tiktoken tokenizer."""
@@ -26,36 +45,54 @@ class TokenCounter:
                 logger.warning(f"Failed to load tiktoken: {e}. Using fallback estimation.")
                 cls._tokenizer = False  # Mark as failed
         return cls._tokenizer
-    
+
+    @classmethod
+    def _encode_count(cls, text: str) -> int:
+        tokenizer = cls._get_tokenizer()
+        if tokenizer and tokenizer is not False:
+            return len(tokenizer.encode(text))
+        else:
+            # Fallback: rough estimation (4 chars = 1 token)
+            return len(text) // 4
+
     @classmethod
     def count_tokens(cls, text: str) -> int:
         """
         Count tokens in text.
-        
+
         Args:
             text: Text to count tokens for
-            
+
         Returns:
             int: Number of tokens (or estimated count if tiktoken unavailable)
         """
         if not text:
             return 0
-        
-        tokenizer = cls._get_tokenizer()
-        if tokenizer and tokenizer is not False:
-            return len(tokenizer.encode(text))
-        else:
-            # Fallback: rough estimation (4 chars = 1 token)
-            return len(text) // 4
-    
+        if len(text) < _MIN_CACHED_LENGTH:
+            return cls._encode_count(text)
+
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with cls._cache_lock:
+            count = cls._cache.get(key)
+            if count is not None:
+                cls._cache.move_to_end(key)
+                return count
+
+        count = cls._encode_count(text)
+        with cls._cache_lock:
+            cls._cache[key] = count
+            if len(cls._cache) > cls._cache_max_size:
+                cls._cache.popitem(last=False)
+        return count
+
     @classmethod
     def count_message_tokens(cls, messages: List[BaseMessage]) -> int:
         """
         Count total tokens in a list of messages.
-        
+
         Args:
             messages: List of LangChain messages
-            
+
         Returns:
             int: Total token count
         """
@@ -64,3 +101,8 @@ class TokenCounter:
             if msg.content:
                 total += cls.count_tokens(msg.content)
         return total
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._cache_lock:
+            cls._cache.clear()
@@ -5,8 +5,9 @@ Hanya berisi graph builder & compiler logic.
 import logging
 from langgraph.graph import StateGraph, END
 
-from app.services.redis_rate_limiter import rate_limiter
+from app.core.config import settings
 from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.stream_signals import with_node_start_signal
 
 # Import nodes
 from app.services.chat_engine.nodes import (
@@ -15,10 +16,13 @@ from app.services.chat_engine.nodes import (
     manage_context_window,
     summarize_context,
     classify_intent,
+    classify_intent_speculative,
+    route_and_transform,
     query_transform,
     retrieve_context,
     rerank_context,
     context_compression,
+    semantic_cache_lookup,
     agent_node,
     reflection_node,
     call_tools,
@@ -31,56 +35,91 @@ from app.services.chat_engine.nodes import (
 from app.services.chat_engine.routers import (
     route_after_context_management,
     route_after_classify,
+    route_after_router,
+    route_after_semantic_cache,
     route_after_agent,
     route_after_reflection,
     route_check_context
 )
 
 # Import checkpoint
-from app.services.chat_engine.checkpoint import AsyncCompatibleRedisSaver
+from app.services.chat_engine.checkpoint import AsyncRedisCheckpointSaver
 
 logger = logging.getLogger(__name__)
 
 
-def build_langgraph_agent():
-    """Membangun LangGraph Agent v3.2 (modular, interrupt-ready)."""
-    redis_client = getattr(rate_limiter, "redis", None)
-    
-    # TEMPORARY FIX: Disable checkpointing
+def _add_node(workflow: StateGraph, name: str, node) -> None:
+    """add_node + sinyal node_start (status SSE & timing pada stream_mode lean)."""
+    workflow.add_node(name, with_node_start_signal(name, node))
+
+
+def build_langgraph_agent(speculative_retrieval: bool = None, router_mode: str = None):
+    """
+    Membangun LangGraph Agent v3.2 (modular, interrupt-ready).
+
+    `speculative_retrieval` (default: settings.CHAT_SPECULATIVE_RETRIEVAL)
+    menjalankan retrieval RAG paralel dengan classify_intent.
+    `router_mode` (default: settings.CHAT_ROUTER_MODE): "split" atau
+    "combined" (intent + rewrite kueri RAG dalam satu panggilan LLM).
+    """
+    if speculative_retrieval is None:
+        speculative_retrieval = settings.CHAT_SPECULATIVE_RETRIEVAL
+    if router_mode is None:
+        router_mode = settings.CHAT_ROUTER_MODE
+    combined_router = router_mode == "combined"
+    if combined_router and speculative_retrieval:
+        # Mode gabungan sudah menghasilkan kueri RAG final di langkah pertama
+        logger.warning("CHAT_SPECULATIVE_RETRIEVAL diabaikan pada CHAT_ROUTER_MODE=combined.")
+        speculative_retrieval = False
+
+    if combined_router:
+        router_node = route_and_transform
+    elif speculative_retrieval:
+        router_node = classify_intent_speculative
+    else:
+        router_node = classify_intent
+    # Checkpointing (HiTL interrupt/resume): async-native di atas redis.asyncio.
+    # Default mati; state antar giliran tetap dibangun ulang dari riwayat DB.
     checkpointer = None
-    # if redis_client:
-    #     try:
-    #         checkpointer = AsyncCompatibleRedisSaver(redis_client=redis_client)
-    #         logger.info("✅ Redis checkpointer berhasil diinisialisasi")
-    #     except Exception as e:
-    #         logger.warning(f"⚠️ Gagal inisialisasi Redis checkpointer: {e}")
-    #         checkpointer = None
+    if settings.CHAT_CHECKPOINT_ENABLED:
+        try:
+            checkpointer = AsyncRedisCheckpointSaver.from_url(
+                settings.REDIS_URL,
+                ttl_seconds=settings.CHAT_CHECKPOINT_TTL_SECONDS,
+                keep_last=settings.CHAT_CHECKPOINT_KEEP_LAST,
+            )
+            logger.info("✅ Redis checkpointer (async) berhasil diinisialisasi")
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal inisialisasi Redis checkpointer: {e}")
+            checkpointer = None
     
     workflow = StateGraph(AgentState)
 
     # 1️⃣ Tambahkan Semua Node
-    workflow.add_node("sanitize_input", sanitize_input)
-    workflow.add_node("load_full_history", load_full_history)
-    workflow.add_node("manage_context_window", manage_context_window)
-    workflow.add_node("summarize_context", summarize_context)
-    workflow.add_node("classify_intent", classify_intent)
-    workflow.add_node("query_transform", query_transform)
-    workflow.add_node("retrieve_context", retrieve_context)
-    workflow.add_node("rerank_context", rerank_context)
-    workflow.add_node("context_compression", context_compression)
-    workflow.add_node("agent_node", agent_node)
-    workflow.add_node("reflection_node", reflection_node)
-    workflow.add_node("call_tools", call_tools)
-    workflow.add_node("extract_preferences_node", extract_preferences_node)
-    workflow.add_node("check_context_length", check_context_length)
-    workflow.add_node("prune_and_summarize_node", prune_and_summarize_node)
+    _add_node(workflow, "sanitize_input", sanitize_input)
+    _add_node(workflow, "load_full_history", load_full_history)
+    _add_node(workflow, "manage_context_window", manage_context_window)
+    _add_node(workflow, "summarize_context", summarize_context)
+    # Nama node tetap "classify_intent" di semua mode (status SSE & metrik)
+    _add_node(workflow, "classify_intent", router_node)
+    _add_node(workflow, "query_transform", query_transform)
+    _add_node(workflow, "retrieve_context", retrieve_context)
+    _add_node(workflow, "rerank_context", rerank_context)
+    _add_node(workflow, "context_compression", context_compression)
+    _add_node(workflow, "semantic_cache_lookup", semantic_cache_lookup)
+    _add_node(workflow, "agent_node", agent_node)
+    _add_node(workflow, "reflection_node", reflection_node)
+    _add_node(workflow, "call_tools", call_tools)
+    _add_node(workflow, "extract_preferences_node", extract_preferences_node)
+    _add_node(workflow, "check_context_length", check_context_length)
+    _add_node(workflow, "prune_and_summarize_node", prune_and_summarize_node)
 
     # Interrupt node
     def interrupt_node(state: AgentState):
         """Menjeda graph sementara, menunggu aksi manusia (HiTL)."""
         logger.warning(f"Graph dijeda untuk request_id={state.get('request_id')}")
         return state
-    workflow.add_node("interrupt", interrupt_node)
+    _add_node(workflow, "interrupt", interrupt_node)
 
     # 2️⃣ Define Edges
     workflow.set_entry_point("sanitize_input")
@@ -97,13 +136,28 @@ def build_langgraph_agent():
 
     workflow.add_conditional_edges(
         "classify_intent",
-        route_after_classify,
-        {"query_transform": "query_transform", "agent_node": "agent_node", "__end__": END},
+        route_after_router if combined_router else route_after_classify,
+        {
+            "query_transform": "query_transform",
+            "retrieve_context": "retrieve_context",
+            "semantic_cache_lookup": "semantic_cache_lookup",
+            "__end__": END,
+        },
     )
 
-    # RAG Flow
+    # RAG Flow (cache semantik dicek setelah retrieval: butuh embedding rag_query)
     workflow.add_edge("query_transform", "retrieve_context")
-    workflow.add_edge("retrieve_context", "rerank_context")
+    workflow.add_edge("retrieve_context", "semantic_cache_lookup")
+
+    workflow.add_conditional_edges(
+        "semantic_cache_lookup",
+        route_after_semantic_cache,
+        {
+            "rerank_context": "rerank_context",
+            "agent_node": "agent_node",
+            "extract_preferences_node": "extract_preferences_node",
+        },
+    )
     workflow.add_edge("rerank_context", "context_compression")
     workflow.add_edge("context_compression", "agent_node")
 
@@ -130,8 +184,11 @@ def build_langgraph_agent():
     workflow.add_edge("prune_and_summarize_node", END)
 
     # ✅ Kompilasi Graph
-    logger.info("🔁 Mengkompilasi LangGraph Agent v3.2 (tanpa checkpointing)...")
-    compiled = workflow.compile()
+    logger.info(
+        f"🔁 Mengkompilasi LangGraph Agent v3.2 "
+        f"({'dengan' if checkpointer else 'tanpa'} checkpointing)..."
+    )
+    compiled = workflow.compile(checkpointer=checkpointer)
     
     # DEBUG: Wrap compiled agent to log final state
     async def debug_wrapper(initial_state, config):
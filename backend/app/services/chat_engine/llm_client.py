@@ -3,7 +3,6 @@
 
 import logging
 import time
-import tiktoken
 from typing import List, Optional
 from opentelemetry import trace
 from prometheus_client import Counter, Histogram
@@ -15,6 +14,7 @@ from langchain_core.outputs import LLMResult
 
 from app.core.config import settings
 from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.helpers.token_counter import TokenCounter
 
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
@@ -42,12 +42,6 @@ class LLMClient:
         self.model_name = model_name
         self.timeout_seconds = timeout
         self.temperature = temperature
-        
-        try:
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
-        except Exception:
-            logger.warning("Tiktoken (cl100k_base) tidak ditemukan. Estimasi token tidak akan akurat.")
-            self.tokenizer = None
 
         # Inisialisasi LLM Client
         self.llm = ChatGoogleGenerativeAI(
@@ -62,10 +56,8 @@ class LLMClient:
         return self.llm
 
     def _count_tokens(self, text: str) -> int:
-        """Menghitung token menggunakan tiktoken."""
-        if not self.tokenizer or not text:
-            return len(text) // 4  # Estimasi kasar
-        return len(self.tokenizer.encode(text))
+        """Menghitung token via TokenCounter bersama (tiktoken + cache per konten)."""
+        return TokenCounter.count_tokens(text)
 
     @retry(
         stop=stop_after_attempt(3),
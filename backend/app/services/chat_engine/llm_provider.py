@@ -3,12 +3,23 @@ LLM Provider Factory - Frontend-driven model selection.
 Backend auto-detects provider from model name.
 """
 import logging
-from typing import Optional
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from prometheus_client import Counter
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+LLM_CLIENT_LOOKUPS = Counter(
+    "llm_client_registry_lookups_total",
+    "Lookup registry klien LLM",
+    ["provider", "outcome"]  # outcome: 'hit' | 'miss'
+)
+
 # Model to provider mapping (static, can be moved to DB later)
 MODEL_TO_PROVIDER = {
     # Gemini models
@@ -60,117 +71,213 @@ def get_provider_from_model(model: str) -> str:
     return provider
 
 
-def get_chat_model(model: str, temperature: float = 0.2, **kwargs):
+# Provider OpenAI-compatible: (atribut settings API key, atribut settings base URL)
+_OPENAI_COMPATIBLE = {
+    "openai": ("OPENAI_API_KEY", "OPENAI_BASE_URL"),
+    "deepseek": ("DEEPSEEK_API_KEY", "DEEPSEEK_BASE_URL"),
+    "kimi": ("KIMI_API_KEY", "KIMI_BASE_URL"),
+    "xai": ("XAI_API_KEY", "XAI_BASE_URL"),
+}
+
+ClientKey = Tuple[str, str, float, Optional[int]]
+
+
+@dataclass
+class _CachedClient:
+    client: Any
+    last_used: float
+    # Hanya untuk klien fallback: setelah waktu ini provider asli dicoba lagi
+    expires_at: Optional[float] = None
+
+
+class LLMClientRegistry:
     """
-    Build ChatModel from model identifier.
-    Provider is auto-detected from model name.
-    
-    Args:
-        model: Model identifier (e.g., 'gemini-2.5-flash', 'gpt-4o-mini')
-        temperature: 0.0-2.0
-        **kwargs: Additional provider-specific parameters
-    
-    Returns:
-        LangChain ChatModel instance
-    
-    Raises:
-        ValueError: If model is not supported
+    Registry ChatModel yang di-key oleh (provider, model, temperature, max_tokens).
+
+    Sebelumnya `get_chat_model` membuat ChatGoogleGenerativeAI / ChatOpenAI baru
+    di setiap giliran chat (plus klien HTTP & TLS handshake baru). Registry ini:
+    - Me-reuse instance untuk key yang sama (LRU, dibatasi `max_size`).
+    - Membuang entri yang idle lebih dari `idle_ttl_seconds`.
+    - Klien fallback Gemini (provider asli gagal init) hanya disimpan
+      `fallback_ttl_seconds`, agar provider asli dicoba lagi walau trafik terus jalan.
+    - Untuk provider OpenAI-compatible, memakai SATU httpx.AsyncClient (pool
+      koneksi keep-alive) per base URL, dibagi semua model/temperature.
+      Klien Gemini memakai transport SDK Google sendiri; yang di-reuse adalah
+      instance-nya.
     """
-    logger.info(
-        f"🏭 get_chat_model called with: model={model}, "
-        f"temperature={temperature}"
-    )
-    
-    provider = get_provider_from_model(model)
-    logger.info(f"🔍 Detected provider: {provider} for model: {model}")
-    
-    try:
+
+    def __init__(
+        self,
+        max_size: int = 64,
+        idle_ttl_seconds: int = 1800,
+        max_connections: int = 100,
+        fallback_ttl_seconds: int = 30,
+    ):
+        self.max_size = max_size
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.fallback_ttl_seconds = fallback_ttl_seconds
+        self._max_connections = max_connections
+        self._clients: "OrderedDict[ClientKey, _CachedClient]" = OrderedDict()
+        self._http_clients: Dict[str, Any] = {}
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, max_tokens: Optional[int]) -> ClientKey:
+        return (provider, model, float(temperature), int(max_tokens) if max_tokens else None)
+
+    def _get_http_client(self, base_url: str):
+        """httpx.AsyncClient bersama per base URL (dengan default SDK OpenAI)."""
+        http_client = self._http_clients.get(base_url)
+        if http_client is None:
+            import httpx
+            from openai import DefaultAsyncHttpxClient
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                ),
+            )
+            self._http_clients[base_url] = http_client
+            logger.info(f"🔌 Created shared HTTP pool for LLM base URL: {base_url}")
+        return http_client
+
+    def _build(self, provider: str, model: str, temperature: float, max_tokens: Optional[int]):
         if provider == "gemini":
             from langchain_google_genai import ChatGoogleGenerativeAI
-            logger.info(f"🤖 Creating Gemini client: {model} (temp={temperature})")
-            client = ChatGoogleGenerativeAI(
+            return ChatGoogleGenerativeAI(
                 model=model,
                 temperature=temperature,
+                max_output_tokens=max_tokens,
                 google_api_key=settings.GEMINI_API_KEY,
             )
-            logger.info(f"✅ Created Gemini client for model: {model}")
-            return client
-        
-        if provider == "openai":
-            from langchain_openai import ChatOpenAI
-            logger.info(f"🤖 Creating OpenAI client: {model} (temp={temperature})")
-            client = ChatOpenAI(
-                model=model,
-                temperature=temperature,
-                api_key=settings.OPENAI_API_KEY,
-                base_url=settings.OPENAI_BASE_URL,
-            )
-            logger.info(f"✅ Created OpenAI client for model: {model}")
-            return client
-        
-        if provider == "deepseek":
-            from langchain_openai import ChatOpenAI
-            logger.info(f"🤖 Creating DeepSeek client: {model} (temp={temperature})")
-            client = ChatOpenAI(
-                model=model,
-                temperature=temperature,
-                api_key=settings.DEEPSEEK_API_KEY,
-                base_url=settings.DEEPSEEK_BASE_URL,
-            )
-            logger.info(f"✅ Created DeepSeek client for model: {model}")
-            return client
-        
-        if provider == "kimi":
-            from langchain_openai import ChatOpenAI
-            logger.info(f"🤖 Creating Kimi client: {model} (temp={temperature})")
-            client = ChatOpenAI(
-                model=model,
-                temperature=temperature,
-                api_key=settings.KIMI_API_KEY,
-                base_url=settings.KIMI_BASE_URL,
-            )
-            logger.info(f"✅ Created Kimi client for model: {model}")
-            return client
-        
-        if provider == "xai":
+
+        if provider in _OPENAI_COMPATIBLE:
             from langchain_openai import ChatOpenAI
-            logger.info(f"🤖 Creating XAI client: {model} (temp={temperature})")
-            client = ChatOpenAI(
+            api_key_attr, base_url_attr = _OPENAI_COMPATIBLE[provider]
+            base_url = getattr(settings, base_url_attr)
+            return ChatOpenAI(
                 model=model,
                 temperature=temperature,
-                api_key=settings.XAI_API_KEY,
-                base_url=settings.XAI_BASE_URL,
-            )
-            logger.info(f"✅ Created XAI client for model: {model}")
-            return client
-    
-    except Exception as e:
-        logger.error(
-            f"❌ Failed to init {provider}/{model}: {e}",
-            exc_info=True
-        )
-        # Fallback to Gemini but track the error for user notification
-        if provider != "gemini":
-            logger.warning(
-                f"⚠️  Fallback to Gemini DEFAULT_MODEL: "
-                f"{settings.DEFAULT_MODEL}"
-            )
-            from langchain_google_genai import ChatGoogleGenerativeAI
-            
-            # Return Gemini client with error info attached
-            gemini_client = ChatGoogleGenerativeAI(
-                model=settings.DEFAULT_MODEL,
-                temperature=temperature,
-                google_api_key=settings.GEMINI_API_KEY,
+                max_tokens=max_tokens,
+                api_key=getattr(settings, api_key_attr),
+                base_url=base_url,
+                http_async_client=self._get_http_client(base_url),
             )
-            # Attach error metadata for streaming service to detect
-            gemini_client._fallback_error = {
+
+        raise ValueError(f"Unknown provider: {provider}")
+
+    def _evict(self, now: float) -> None:
+        """Buang entri idle (urutan LRU: paling lama dipakai di depan), lalu LRU jika penuh."""
+        while self._clients:
+            key, entry = next(iter(self._clients.items()))
+            if now - entry.last_used < self.idle_ttl_seconds:
+                break
+            del self._clients[key]
+            logger.debug(f"Evicted idle LLM client: {key}")
+        while len(self._clients) > self.max_size:
+            self._clients.popitem(last=False)
+        # Catatan: httpx.AsyncClient bersama TIDAK ditutup saat eviction,
+        # karena masih dipakai klien lain dengan base URL yang sama.
+
+    def get(self, model: str, temperature: float, max_tokens: Optional[int] = None):
+        provider = get_provider_from_model(model)
+        key = self.make_key(provider, model, temperature, max_tokens)
+        now = time.monotonic()
+
+        entry = self._clients.get(key)
+        if entry is not None and entry.expires_at is not None and now >= entry.expires_at:
+            # Klien fallback kedaluwarsa: coba lagi provider asli
+            del self._clients[key]
+            entry = None
+        if entry is not None:
+            entry.last_used = now
+            self._clients.move_to_end(key)
+            LLM_CLIENT_LOOKUPS.labels(provider=provider, outcome="hit").inc()
+            return entry.client
+
+        LLM_CLIENT_LOOKUPS.labels(provider=provider, outcome="miss").inc()
+        expires_at = None
+        try:
+            client = self._build(provider, model, key[2], key[3])
+            logger.info(f"✅ Created {provider} client: {model} (temp={key[2]}, max_tokens={key[3]})")
+        except Exception as e:
+            logger.error(f"❌ Failed to init {provider}/{model}: {e}", exc_info=True)
+            if provider == "gemini":
+                raise
+            # Fallback ke Gemini; error dilampirkan agar streaming service bisa
+            # memberi tahu user. Disimpan di bawah key model asli sehingga
+            # instance Gemini default bersih tidak ikut membawa atribut ini.
+            logger.warning(f"⚠️  Fallback to Gemini DEFAULT_MODEL: {settings.DEFAULT_MODEL}")
+            client = self._build("gemini", settings.DEFAULT_MODEL, key[2], key[3])
+            client._fallback_error = {
                 "original_model": model,
                 "original_provider": provider,
                 "error": str(e)
             }
-            return gemini_client
-        raise
+            expires_at = now + self.fallback_ttl_seconds
+
+        self._clients[key] = _CachedClient(client=client, last_used=now, expires_at=expires_at)
+        self._evict(now)
+        return client
+
+    def warmup(self, models: Iterable[str], temperature: float, max_tokens: Optional[int] = None) -> None:
+        """Membuat klien lebih awal (saat startup) agar tidak masuk time-to-first-token."""
+        for model in models:
+            try:
+                self.get(model, temperature, max_tokens)
+            except Exception as e:
+                logger.warning(f"Warmup klien LLM gagal untuk {model}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def close(self) -> None:
+        self._clients.clear()
+        for http_client in self._http_clients.values():
+            await http_client.aclose()
+        self._http_clients.clear()
+        logger.info("Registry klien LLM ditutup.")
+
+
+llm_client_registry = LLMClientRegistry(
+    max_size=settings.LLM_CLIENT_CACHE_MAX_SIZE,
+    idle_ttl_seconds=settings.LLM_CLIENT_IDLE_TTL_SECONDS,
+    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+    fallback_ttl_seconds=settings.LLM_CLIENT_FALLBACK_TTL_SECONDS,
+)
+
+
+def get_chat_model(model: str, temperature: float = 0.2, max_tokens: Optional[int] = None, **kwargs):
+    """
+    Build ChatModel from model identifier.
+    Provider is auto-detected from model name. Instances are reused via
+    `llm_client_registry`; do not mutate the returned client.
+    
+    Args:
+        model: Model identifier (e.g., 'gemini-2.5-flash', 'gpt-4o-mini')
+        temperature: 0.0-2.0
+        max_tokens: Optional output token limit
+        **kwargs: Additional provider-specific parameters (ignored)
+    
+    Returns:
+        LangChain ChatModel instance
+    
+    Raises:
+        ValueError: If model is not supported
+    """
+    logger.debug(f"🏭 get_chat_model: model={model}, temperature={temperature}, max_tokens={max_tokens}")
+    return llm_client_registry.get(model, temperature, max_tokens)
+
+
+async def warmup_chat_models() -> None:
+    """Dipanggil saat startup: DEFAULT_MODEL + LLM_WARMUP_MODELS (dipisah koma)."""
+    models = [settings.DEFAULT_MODEL] + [
+        m.strip() for m in settings.LLM_WARMUP_MODELS.split(",") if m.strip()
+    ]
+    llm_client_registry.warmup(dict.fromkeys(models), settings.DEFAULT_TEMPERATURE)
+
+
+async def close_chat_models() -> None:
+    await llm_client_registry.close()
 
 
 def get_available_models() -> list[str]:
@@ -11,13 +11,15 @@ from .context_management import (
     check_context_length,
     prune_and_summarize_node
 )
-from .intent import classify_intent
+from .intent import classify_intent, route_and_transform
+from .speculative import classify_intent_speculative
 from .rag import (
     query_transform,
     retrieve_context,
     rerank_context,
     context_compression
 )
+from .semantic_cache import semantic_cache_lookup
 from .agent import agent_node
 from .tools import reflection_node, call_tools
 from .preferences import extract_preferences_node
@@ -28,10 +30,13 @@ __all__ = [
     "manage_context_window",
     "summarize_context",
     "classify_intent",
+    "classify_intent_speculative",
+    "route_and_transform",
     "query_transform",
     "retrieve_context",
     "rerank_context",
     "context_compression",
+    "semantic_cache_lookup",
     "agent_node",
     "reflection_node",
     "call_tools",
@@ -8,13 +8,16 @@ from langchain_core.runnables import RunnableConfig
 from opentelemetry import trace
 
 from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.helpers.token_counter import TokenCounter
 from app.services.chat_engine.llm_client import llm_pro_client
 from app.services.chat_engine.agent_prompts import AGENT_SYSTEM_PROMPT
 from app.core.config import settings
+from app.services.semantic_response_cache import semantic_response_cache
 from app.services.chat_engine.llm_provider import (
     get_chat_model,
     get_provider_from_model
 )
+from app.services.chat_engine.provider_router import provider_router
 
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
@@ -31,14 +34,8 @@ def _get_tool_registry():
     return _tool_registry
 
 def _count_tokens(text: str) -> int:
-    """Estimasi token count."""
-    if not text:
-        return 0
-    try:
-        import tiktoken
-        return len(tiktoken.get_encoding("cl100k_base").encode(text))
-    except:
-        return len(text) // 4
+    """Estimasi token count (TokenCounter bersama, di-cache per konten)."""
+    return TokenCounter.count_tokens(text)
 
 
 async def agent_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
@@ -100,9 +97,19 @@ async def agent_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any
                 f"model={model}, temp={temperature}, max_tokens={max_tokens}"
             )
 
-            # Use factory to build LLM with all params
+            # Pilih model berdasarkan kesehatan provider SEBELUM memanggil LLM
+            primary_model, backup_model, reroute_reason = provider_router.plan(model)
+            if reroute_reason:
+                logger.warning(f"REQUEST_ID: {request_id} - {reroute_reason}")
+                state["llm_fallback_error"] = {
+                    "original_model": model,
+                    "original_provider": get_provider_from_model(model),
+                    "error": reroute_reason
+                }
+
+            # Use factory to build LLM with all params (instance di-cache registry)
             llm = get_chat_model(
-                model=model, 
+                model=primary_model, 
                 temperature=temperature,
                 max_tokens=max_tokens
             )
@@ -116,80 +123,42 @@ async def agent_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any
                 )
                 state["llm_fallback_error"] = fallback_error
 
-            logger.info(
-                f"✅ agent_node created LLM instance: model={model}, "
-                f"temp={temperature}"
-            )
-            
-            # Try streaming with the primary model
+            backup = None
+            if backup_model:
+                backup = (backup_model, get_chat_model(
+                    model=backup_model,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                ))
+
+            # Streaming via router: failover ke backup jika provider error sebelum
+            # token pertama; hedging opsional setelah deadline p95 TTFT.
             final_message: Optional[AIMessage] = None
             chunk_count = 0
-            
-            try:
-                stream = llm.astream(messages, config=config)
-                async for chunk in stream:
-                    chunk_count += 1
-                    if final_message is None:
-                        final_message = chunk
-                    else:
-                        final_message += chunk
-            except Exception as stream_error:
-                # Streaming failed - check if we should fallback
-                error_str = str(stream_error)
-                is_api_error = (
-                    "429" in error_str or
-                    "503" in error_str or
-                    "quota" in error_str.lower() or
-                    "rate limit" in error_str.lower() or
-                    "suspended" in error_str.lower() or
-                    "overloaded" in error_str.lower() or
-                    "unavailable" in error_str.lower() or
-                    "401" in error_str.lower() or
-                    "unauthorized" in error_str.lower()
-                )
-                
-                if is_api_error and model != settings.DEFAULT_MODEL:
-                    logger.warning(
-                        f"REQUEST_ID: {request_id} - Streaming failed with "
-                        f"{model}, falling back to {settings.DEFAULT_MODEL}"
-                    )
-                    logger.warning(f"REQUEST_ID: {request_id} - Error: {error_str}")
-                    
-                    # Track fallback error
-                    state["llm_fallback_error"] = {
-                        "original_model": model,
-                        "original_provider": get_provider_from_model(model),
-                        "error": error_str
-                    }
-                    
-                    # Fallback to Gemini (already imported at top)
-                    fallback_llm = get_chat_model(
-                        model=settings.DEFAULT_MODEL,
-                        temperature=temperature,
-                        max_tokens=max_tokens
-                    )
-                    
-                    logger.info(
-                        f"REQUEST_ID: {request_id} - Retrying with fallback "
-                        f"model: {settings.DEFAULT_MODEL}"
-                    )
-                    
-                    # Retry with fallback
-                    stream = fallback_llm.astream(messages, config=config)
-                    async for chunk in stream:
-                        chunk_count += 1
-                        if final_message is None:
-                            final_message = chunk
-                        else:
-                            final_message += chunk
+
+            used_model, stream = await provider_router.stream(
+                primary_model, llm, messages, config, backup=backup
+            )
+            if used_model != model and not state.get("llm_fallback_error"):
+                state["llm_fallback_error"] = {
+                    "original_model": model,
+                    "original_provider": get_provider_from_model(model),
+                    "error": f"Provider error pada {primary_model}, dialihkan ke {used_model}"
+                }
+            span.set_attribute("app.llm_model", used_model)
+
+            async for chunk in stream:
+                chunk_count += 1
+                if final_message is None:
+                    final_message = chunk
                 else:
-                    # Not an API error or already using default model - re-raise
-                    raise
+                    final_message += chunk
 
             logger.debug(f"REQUEST_ID: {request_id} - Streaming selesai. Chunks: {chunk_count}")
             logger.debug(f"REQUEST_ID: {request_id} - Final message type: {type(final_message)}")
 
-            if final_message is None or not getattr(final_message, "content", None):
+            empty_response = final_message is None or not getattr(final_message, "content", None)
+            if empty_response:
                 logger.warning(f"REQUEST_ID: {request_id} - Final message kosong, fallback.")
                 final_message = AIMessage(content="Maaf, respons saya kosong. Silakan coba lagi.")
 
@@ -197,6 +166,24 @@ async def agent_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any
             cost = state.get("cost_estimate", 0.0)
             span.set_attributes({"app.output_tokens": output_tokens})
 
+            # Cache semantik: simpan hanya jawaban final dari model yang diminta
+            cache_embedding = state.get("semantic_cache_embedding")
+            if (
+                cache_embedding
+                and not empty_response
+                and not getattr(final_message, "tool_calls", None)
+                and not state.get("llm_fallback_error")
+            ):
+                semantic_response_cache.schedule_store(
+                    state.get("user_id"),
+                    state.get("intent"),
+                    model,
+                    state.get("semantic_cache_context"),
+                    cache_embedding,
+                    final_message.content,
+                    state.get("semantic_cache_generation"),
+                )
+
             logger.info(f"REQUEST_ID: {request_id} - Agent node selesai. Response length: {len(final_message.content)}")
             logger.debug(f"REQUEST_ID: {request_id} - Tokens - Input: {input_tokens}, Output: {output_tokens}")
 
@@ -207,8 +194,9 @@ async def agent_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any
                 "input_token_count": state.get("input_token_count", 0) + input_tokens,
                 "api_call_count": state.get("api_call_count", 0) + 1,
                 "final_response": final_message.content,
-                "model_used": model,  # Track which model was actually used
-                "llm_fallback_error": state.get("llm_fallback_error")  # Propagate fallback error
+                "model_used": used_model,  # Track which model was actually used
+                "llm_fallback_error": state.get("llm_fallback_error"),  # Propagate fallback error
+                "semantic_cache_embedding": None
             }
         except Exception as e:
             logger.error(
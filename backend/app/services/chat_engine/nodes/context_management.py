@@ -3,11 +3,12 @@ import logging
 from typing import Dict, Any, List, TYPE_CHECKING
 from uuid import UUID
 
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from opentelemetry import trace
 
 from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.helpers.token_counter import TokenCounter
 from app.services.chat_engine.llm_client import llm_flash_client
 from app.services.chat_engine.agent_schemas import PruningResult
 from app.services.chat_engine.agent_prompts import (
@@ -27,15 +28,8 @@ RECENT_MESSAGES_TO_KEEP = 10
 
 # Helper functions untuk token counting
 def _count_tokens(text: str) -> int:
-    """Estimasi jumlah token dalam teks."""
-    if not text:
-        return 0
-    try:
-        import tiktoken
-        tokenizer = tiktoken.get_encoding("cl100k_base")
-        return len(tokenizer.encode(text))
-    except:
-        return len(text) // 4
+    """Estimasi jumlah token dalam teks (TokenCounter bersama, di-cache per konten)."""
+    return TokenCounter.count_tokens(text)
 
 def _count_message_tokens(messages: List[BaseMessage]) -> int:
     """Hitung total token dalam list messages."""
@@ -45,6 +39,16 @@ def _count_message_tokens(messages: List[BaseMessage]) -> int:
             count += _count_tokens(msg.content)
     return count
 
+def _history_token_counts(state: AgentState, messages: List[BaseMessage]) -> List[int]:
+    """
+    Token count per pesan. Memakai hasil `load_full_history` (dari cache
+    riwayat) jika masih sejajar dengan `chat_history`, selain itu dihitung ulang.
+    """
+    counts = state.get("chat_history_token_counts")
+    if counts is not None and len(counts) == len(messages):
+        return list(counts)
+    return [_count_tokens(msg.content) if msg.content else 0 for msg in messages]
+
 
 async def load_full_history(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     """Node #A: Memuat SEMUA riwayat dari DB."""
@@ -52,7 +56,7 @@ async def load_full_history(state: AgentState, config: RunnableConfig) -> Dict[s
     logger.info(f"REQUEST_ID: {request_id} - Node: load_full_history")
     
     # Import here to avoid circular dependency at module level
-    from app.db.queries.conversation import message_queries
+    from app.services.chat_engine.helpers.history_cache import conversation_history_cache
     
     dependencies = config["configurable"]["dependencies"]
     auth_info = dependencies["auth_info"]
@@ -61,21 +65,18 @@ async def load_full_history(state: AgentState, config: RunnableConfig) -> Dict[s
     conversation_id = UUID(state.get("conversation_id"))
 
     try:
-        messages_data = await message_queries.get_all_conversation_messages(
-            client, user_id, conversation_id, limit=1000
+        # [BARU] Riwayat + token count per pesan dari cache (tidak query & tokenisasi ulang)
+        history, token_counts = await conversation_history_cache.get_history(
+            client, user_id, conversation_id
         )
         
-        history: List[BaseMessage] = []
-        for msg in messages_data:
-            if msg['role'] == 'user':
-                history.append(HumanMessage(content=msg.get("content", "")))
-            elif msg['role'] == 'assistant':
-                history.append(AIMessage(content=msg.get("content", "")))
-        
-        history.append(HumanMessage(content=state.get("user_message")))
+        user_message = state.get("user_message")
+        history.append(HumanMessage(content=user_message))
+        token_counts.append(_count_tokens(user_message))
         
         return {
             "chat_history": history,
+            "chat_history_token_counts": token_counts,
             "api_call_count": state.get("api_call_count", 0)  # Preserve
         }
     except Exception as e:
@@ -89,7 +90,8 @@ async def manage_context_window(state: AgentState, config: RunnableConfig) -> Di
     logger.info(f"REQUEST_ID: {request_id} - Node: manage_context_window")
     
     full_history = state.get("chat_history", [])
-    total_tokens = _count_message_tokens(full_history)
+    token_counts = _history_token_counts(state, full_history)
+    total_tokens = sum(token_counts)
     
     if total_tokens <= CONTEXT_WINDOW_TOKEN_LIMIT:
         logger.info(f"REQUEST_ID: {request_id} - Konteks muat ({total_tokens} tokens).")
@@ -120,12 +122,19 @@ async def manage_context_window(state: AgentState, config: RunnableConfig) -> Di
                 messages_to_summarize.append(msg)
 
         final_pruned_history = pruned_history + messages_to_keep_recent
-        final_tokens = _count_message_tokens(final_pruned_history)
+        final_tokens = sum(
+            token_counts[i] for i, msg in enumerate(messages_to_evaluate)
+            if priority_map.get(i) == "P1"
+        ) + sum(token_counts[-RECENT_MESSAGES_TO_KEEP:])
 
         logger.info(f"REQUEST_ID: {request_id} - Pruning selesai. {len(pruned_history)} (P1) + {len(messages_to_keep_recent)} (P4).")
 
         return {
             "chat_history": final_pruned_history,
+            "chat_history_token_counts": [
+                token_counts[i] for i, msg in enumerate(messages_to_evaluate)
+                if priority_map.get(i) == "P1"
+            ] + token_counts[-RECENT_MESSAGES_TO_KEEP:],
             "messages_to_summarize": messages_to_summarize,
             "total_tokens": final_tokens,
             "api_call_count": state.get("api_call_count", 0)  # Preserve
@@ -136,7 +145,8 @@ async def manage_context_window(state: AgentState, config: RunnableConfig) -> Di
         final_pruned_history = full_history[-RECENT_MESSAGES_TO_KEEP:]
         return {
             "chat_history": final_pruned_history,
-            "total_tokens": _count_message_tokens(final_pruned_history),
+            "chat_history_token_counts": token_counts[-RECENT_MESSAGES_TO_KEEP:],
+            "total_tokens": sum(token_counts[-RECENT_MESSAGES_TO_KEEP:]),
             "api_call_count": state.get("api_call_count", 0)  # Preserve
         }
 
@@ -177,6 +187,7 @@ async def summarize_context(state: AgentState, config: RunnableConfig) -> Dict[s
         
         return {
             "chat_history": messages_to_summarize,  # Assuming we return the summarized messages
+            "chat_history_token_counts": None,
             "api_call_count": state.get("api_call_count", 0) + 1  # Increment if LLM called
         }
     except Exception as e:
@@ -241,6 +252,7 @@ async def prune_and_summarize_node(state: AgentState, config: RunnableConfig) ->
             
             return {
                 "chat_history": messages_to_keep_recent,  # Assuming we return the recent messages
+                "chat_history_token_counts": None,
                 "api_call_count": state.get("api_call_count", 0)  # Preserve or +1 if LLM called
             }
         
@@ -7,22 +7,18 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 from opentelemetry import trace
 
 from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.helpers.token_counter import TokenCounter
 from app.services.chat_engine.llm_client import llm_flash_client
-from app.services.chat_engine.agent_schemas import IntentClassification
-from app.services.chat_engine.agent_prompts import CLASSIFY_INTENT_PROMPT
+from app.services.chat_engine.agent_schemas import IntentClassification, RouterDecision
+from app.services.chat_engine.agent_prompts import CLASSIFY_INTENT_PROMPT, ROUTE_AND_TRANSFORM_PROMPT
+from app.services.chat_engine.nodes.rag import _fallback_ts_query
 
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
 
 def _count_tokens(text: str) -> int:
-    """Estimasi token count."""
-    if not text:
-        return 0
-    try:
-        import tiktoken
-        return len(tiktoken.get_encoding("cl100k_base").encode(text))
-    except:
-        return len(text) // 4
+    """Estimasi token count (TokenCounter bersama, di-cache per konten)."""
+    return TokenCounter.count_tokens(text)
 
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
@@ -82,6 +78,7 @@ async def classify_intent(state: AgentState, config: RunnableConfig) -> Dict[str
             return {
                 "intent": result.intent,
                 "potential_preference": result.potential_preference,
+                "speculative_retrieval_used": False,
                 "cost_estimate": cost,
                 "output_token_count": state.get("output_token_count", 0) + output_tokens,
                 "input_token_count": state.get("input_token_count", 0) + input_tokens,
@@ -96,3 +93,65 @@ async def classify_intent(state: AgentState, config: RunnableConfig) -> Dict[str
                 "potential_preference": False,
                 "errors": state.get("errors", []) + [{"node": "classify_intent", "error": str(e)}]
             }
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+async def route_and_transform(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Node #1 (mode gabungan): classify_intent + query_transform dalam SATU
+    panggilan structured output (`RouterDecision`). Untuk intent 'rag_query'
+    graph langsung lanjut ke `retrieve_context`.
+    """
+    request_id = state.get("request_id")
+    logger.info(f"REQUEST_ID: {request_id} - Node: route_and_transform")
+    user_message = state.get("user_message", "")
+
+    with tracer.start_as_current_span("route_and_transform") as span:
+        try:
+            prompt = ROUTE_AND_TRANSFORM_PROMPT.format(
+                chat_history=state.get("chat_history", []),
+                user_message=user_message
+            )
+            input_tokens = _count_tokens(prompt)
+
+            llm = llm_flash_client.with_structured_output(RouterDecision)
+            result: RouterDecision = await llm.ainvoke([HumanMessage(content=prompt)], config=config)
+
+            if not isinstance(result, RouterDecision):
+                logger.error(f"REQUEST_ID: {request_id} - LLM tidak mengembalikan RouterDecision. Type: {type(result)}")
+                return {
+                    "intent": "simple_chat",
+                    "potential_preference": False,
+                    "errors": state.get("errors", []) + [{"node": "route_and_transform", "error": f"Invalid type: {type(result)}"}]
+                }
+
+            output_tokens = _count_tokens(result.model_dump_json())
+            span.set_attributes({
+                "app.intent": result.intent,
+                "app.input_tokens": input_tokens,
+                "app.output_tokens": output_tokens
+            })
+            logger.info(f"REQUEST_ID: {request_id} - Intent classified (gabungan): {result.intent}")
+
+            update = {
+                "intent": result.intent,
+                "potential_preference": result.potential_preference,
+                "speculative_retrieval_used": False,
+                "cost_estimate": state.get("cost_estimate", 0.0),
+                "output_token_count": state.get("output_token_count", 0) + output_tokens,
+                "input_token_count": state.get("input_token_count", 0) + input_tokens,
+                "api_call_count": state.get("api_call_count", 0) + 1
+            }
+            if result.intent == "rag_query":
+                # Fallback sama dengan query_transform jika LLM tidak mengisi kueri
+                update["rag_query"] = result.rag_query or user_message
+                update["ts_query"] = result.ts_query or _fallback_ts_query(user_message)
+            return update
+        except Exception as e:
+            logger.error(f"REQUEST_ID: {request_id} - Gagal di route_and_transform: {e}", exc_info=True)
+            span.set_status(trace.StatusCode.ERROR, f"Error: {e}")
+            return {
+                "intent": "simple_chat",
+                "potential_preference": False,
+                "errors": state.get("errors", []) + [{"node": "route_and_transform", "error": str(e)}]
+            }
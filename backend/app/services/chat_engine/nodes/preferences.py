@@ -8,6 +8,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 from opentelemetry import trace
 
 from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.helpers.token_counter import TokenCounter
 from app.services.chat_engine.llm_client import llm_flash_client
 from app.services.chat_engine.agent_schemas import ExtractedPreference
 from app.services.chat_engine.agent_prompts import EXTRACT_PREFERENCES_PROMPT
@@ -17,14 +18,8 @@ logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
 
 def _count_tokens(text: str) -> int:
-    """Estimasi token count."""
-    if not text:
-        return 0
-    try:
-        import tiktoken
-        return len(tiktoken.get_encoding("cl100k_base").encode(text))
-    except:
-        return len(text) // 4
+    """Estimasi token count (TokenCounter bersama, di-cache per konten)."""
+    return TokenCounter.count_tokens(text)
 
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
@@ -1,7 +1,7 @@
 import json
 import asyncio
 import logging
-from typing import Dict, Any, TYPE_CHECKING
+from typing import Dict, Any, List, Tuple, TYPE_CHECKING
 from uuid import UUID
 
 from langchain_core.messages import HumanMessage
@@ -9,8 +9,11 @@ from langchain_core.runnables import RunnableConfig
 from tenacity import retry, stop_after_attempt, wait_exponential
 from opentelemetry import trace
 
+from app.core.config import settings
 from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.helpers.token_counter import TokenCounter
 from app.services.chat_engine.llm_client import llm_flash_client
+from app.services.chat_engine.reranker import reranker_service
 from app.services.chat_engine.agent_schemas import RagQueryTransform, RerankedDocuments
 from app.services.chat_engine.agent_prompts import (
     QUERY_TRANSFORM_PROMPT,
@@ -38,14 +41,13 @@ def _get_embedding_service():
     return _rag_embedding_service
 
 def _count_tokens(text: str) -> int:
-    """Estimasi token count."""
-    if not text:
-        return 0
-    try:
-        import tiktoken
-        return len(tiktoken.get_encoding("cl100k_base").encode(text))
-    except:
-        return len(text) // 4
+    """Estimasi token count (TokenCounter bersama, di-cache per konten)."""
+    return TokenCounter.count_tokens(text)
+
+
+def _fallback_ts_query(text: str) -> str:
+    """tsquery sederhana dari kata-kata pertama pesan (tanpa LLM)."""
+    return " & ".join(text.split()[:5])
 
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
@@ -71,7 +73,8 @@ async def query_transform(state: AgentState, config: RunnableConfig) -> Dict[str
         logger.debug(f"REQUEST_ID: {request_id} - RAG query: {result.rag_query[:100]}...")
         
         return {
-            "transformed_query": result.rag_query,
+            "rag_query": result.rag_query,
+            "ts_query": result.ts_query,
             "cost_estimate": cost,
             "output_token_count": state.get("output_token_count", 0) + output_tokens,
             "input_token_count": state.get("input_token_count", 0) + input_tokens,
@@ -82,7 +85,8 @@ async def query_transform(state: AgentState, config: RunnableConfig) -> Dict[str
         # REMOVE: span.set_status(trace.StatusCode.ERROR, f"Error: {e}")
         # Return fallback instead of raising to prevent retry loop
         return {
-            "transformed_query": state.get("user_message", ""),
+            "rag_query": state.get("user_message", ""),
+            "ts_query": _fallback_ts_query(state.get("user_message", "")),
             "cost_estimate": state.get("cost_estimate", 0.0),
             "output_token_count": state.get("output_token_count", 0),
             "input_token_count": state.get("input_token_count", 0),
@@ -90,85 +94,103 @@ async def query_transform(state: AgentState, config: RunnableConfig) -> Dict[str
         }
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-async def retrieve_context(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
-    """Node #4: Retrieve relevant context from vector store (RAG)."""
-    request_id = state.get("request_id", "unknown")
-    logger.info(f"REQUEST_ID: {request_id} - Node: retrieve_context")
-    
-    try:
-        prompt = QUERY_TRANSFORM_PROMPT.format(
-            chat_history=state.get("chat_history", []),
-            user_message=state.get("user_message", "")
-        )
-        input_tokens = _count_tokens(prompt)
-        
-        llm = llm_flash_client.with_structured_output(RagQueryTransform)
-        result: RagQueryTransform = await llm.ainvoke([HumanMessage(content=prompt)], config=config)
-        
-        output_tokens = _count_tokens(result.model_dump_json())
-        cost = state.get("cost_estimate", 0.0)
+async def _search_context(
+    config: RunnableConfig,
+    user_id: str,
+    rag_query: str,
+    ts_query: str
+) -> Tuple[List[Dict[str, Any]], List[float]]:
+    """
+    Embedding kueri + hybrid search `find_relevant_summaries`.
+    Dipakai oleh `retrieve_context` dan retrieval spekulatif (`nodes/speculative.py`).
+    Mengembalikan (docs, query_embedding); embedding dokumen ikut di
+    `doc["embedding"]` untuk reranker lokal.
+    """
+    dependencies = config["configurable"]["dependencies"]
+    client = dependencies["auth_info"]["client"]
+    embedding_service = dependencies.get("embedding_service") or _get_embedding_service()
 
-        logger.info(f"REQUEST_ID: {request_id} - Query transformed")
-        
-        return {
-            "transformed_query": result.rag_query,
-            "cost_estimate": cost,
-            "output_token_count": state.get("output_token_count", 0) + output_tokens,
-            "input_token_count": state.get("input_token_count", 0) + input_tokens,
-            "api_call_count": state.get("api_call_count", 0) + 1  # Increment
+    query_embedding = await embedding_service.generate_embedding(rag_query, task_type="retrieval_query")
+    rows = await context_queries.find_relevant_summaries(
+        client, UUID(str(user_id)), query_embedding, ts_query
+    )
+    docs = [
+        {
+            "source_id": str(row.get("summary_id")),
+            "content": row.get("summary_text", ""),
+            "similarity": row.get("similarity"),
+            "rank": row.get("rank"),
+            "embedding": row.get("embedding"),
         }
-    except Exception as e:
-        logger.error(f"REQUEST_ID: {request_id} - Gagal di query_transform: {e}", exc_info=True)
-        ts_query_fallback = " & ".join(state.get("user_message", "").split()[:5])
-        return {"rag_query": state.get("user_message"), "ts_query": ts_query_fallback}
+        for row in rows
+    ]
+    return docs, query_embedding
+
+
+def _strip_embeddings(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Embedding dokumen hanya untuk rerank; jangan ikut tersimpan di checkpoint."""
+    return [{k: v for k, v in doc.items() if k != "embedding"} for doc in docs]
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
 async def retrieve_context(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     """Node #4: Retrieve relevant context from vector store (RAG)."""
     request_id = state.get("request_id", "unknown")
     logger.info(f"REQUEST_ID: {request_id} - Node: retrieve_context")
-    
-    try:
-        prompt = QUERY_TRANSFORM_PROMPT.format(
-            chat_history=state.get("chat_history", []),
-            user_message=state.get("user_message", "")
-        )
-        input_tokens = _count_tokens(prompt)
-        
-        llm = llm_flash_client.with_structured_output(RagQueryTransform)
-        result: RagQueryTransform = await llm.ainvoke([HumanMessage(content=prompt)], config=config)
-        
-        output_tokens = _count_tokens(result.model_dump_json())
-        cost = state.get("cost_estimate", 0.0)
 
-        logger.info(f"REQUEST_ID: {request_id} - Query transformed")
-        
-        return {
-            "transformed_query": result.rag_query,
-            "cost_estimate": cost,
-            "output_token_count": state.get("output_token_count", 0) + output_tokens,
-            "input_token_count": state.get("input_token_count", 0) + input_tokens,
-            "api_call_count": state.get("api_call_count", 0) + 1  # Increment
-        }
-    except Exception as e:
-        logger.error(f"REQUEST_ID: {request_id} - Gagal di query_transform: {e}", exc_info=True)
-        ts_query_fallback = " & ".join(state.get("user_message", "").split()[:5])
-        return {"rag_query": state.get("user_message"), "ts_query": ts_query_fallback}
+    user_message = state.get("user_message", "")
+    rag_query = state.get("rag_query") or user_message
+    ts_query = state.get("ts_query") or _fallback_ts_query(user_message)
+
+    with tracer.start_as_current_span("retrieve_context") as span:
+        try:
+            docs, query_embedding = await _search_context(config, state.get("user_id"), rag_query, ts_query)
+            span.set_attribute("app.retrieve.docs", len(docs))
+            logger.info(f"REQUEST_ID: {request_id} - Retrieved {len(docs)} docs")
+            return {"retrieved_docs": docs, "rag_query_embedding": query_embedding}
+        except Exception as e:
+            logger.error(f"REQUEST_ID: {request_id} - Gagal di retrieve_context: {e}", exc_info=True)
+            span.set_status(trace.StatusCode.ERROR, f"Error: {e}")
+            return {"retrieved_docs": []}
 
 
 async def rerank_context(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
-    """Node #6: Menggunakan LLM Flash sebagai Reranker."""
+    """
+    Node #6: Rerank dokumen hasil retrieval.
+
+    [BARU] Default memakai `reranker_service` (lokal: cosine + BM25 di CPU,
+    tanpa panggilan LLM). `RERANKER_BACKEND=llm` memakai LLM Flash (lama).
+    """
     request_id = state.get("request_id")
     logger.info(f"REQUEST_ID: {request_id} - Node: rerank_context")
-    
-    rag_query = state.get("rag_query")
+
     retrieved_docs = state.get("retrieved_docs", [])
-    
     if not retrieved_docs:
         return {"reranked_docs": []}
 
+    if settings.RERANKER_BACKEND == "llm":
+        result = await _rerank_with_llm(state, config)
+    else:
+        reranked_docs = await reranker_service.arerank_documents(
+            state.get("rag_query") or state.get("user_message", ""),
+            retrieved_docs,
+            query_embedding=state.get("rag_query_embedding")
+        )
+        for doc in reranked_docs:
+            doc["rank"] = doc.pop("relevance_score", doc.get("rank"))
+        result = {"reranked_docs": reranked_docs}
+
+    result["reranked_docs"] = _strip_embeddings(result["reranked_docs"])
+    result["retrieved_docs"] = _strip_embeddings(retrieved_docs)
+    result["rag_query_embedding"] = None
+    return result
+
+
+async def _rerank_with_llm(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """Rerank via LLM Flash (RERANK_GEMINI_PROMPT), satu panggilan LLM penuh."""
+    request_id = state.get("request_id")
+    rag_query = state.get("rag_query")
+    retrieved_docs = state.get("retrieved_docs", [])
+
     with tracer.start_as_current_span("rerank_context_gemini") as span:
         try:
             docs_with_index = []
@@ -199,6 +221,7 @@ async def rerank_context(state: AgentState, config: RunnableConfig) -> Dict[str,
                 final_docs.append(original_doc)
                 
             span.set_attributes({
+                "app.rerank.backend": "llm",
                 "app.rerank.docs_in": len(retrieved_docs),
                 "app.rerank.docs_out": len(final_docs),
                 "app.input_tokens": input_tokens,
@@ -206,7 +229,7 @@ async def rerank_context(state: AgentState, config: RunnableConfig) -> Dict[str,
             })
             
             return {
-                "retrieved_contexts": final_docs,
+                "reranked_docs": final_docs,
                 "cost_estimate": cost,
                 "api_call_count": state.get("api_call_count", 0)  # Preserve (no LLM)
             }
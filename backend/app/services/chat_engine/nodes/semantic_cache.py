@@ -0,0 +1,110 @@
+import hashlib
+import logging
+from typing import Dict, Any, List
+
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.runnables import RunnableConfig
+from opentelemetry import trace
+
+from app.core.config import settings
+from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.nodes.rag import _get_embedding_service, _strip_embeddings
+from app.services.semantic_response_cache import semantic_response_cache
+
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+# 'rag_query' hasil query_transform sudah berdiri sendiri (riwayat sudah diserap)
+_STANDALONE_CONTEXT = "standalone"
+
+
+def _context_fingerprint(intent: str, chat_history: List[BaseMessage], user_message: str) -> str:
+    """
+    Sidik konteks percakapan untuk kunci cache. 'simple_chat': hash dari
+    CHAT_SEMANTIC_CACHE_CONTEXT_MESSAGES pesan terakhir sebelum pesan user
+    saat ini, sehingga "jelaskan lebih lanjut" hanya cocok dengan riwayat
+    yang sama; giliran pertama (tanpa riwayat) berbagi satu sidik.
+    """
+    if intent == "rag_query":
+        return _STANDALONE_CONTEXT
+    history = list(chat_history or [])
+    # load_full_history menambahkan pesan user saat ini di akhir riwayat
+    if history and history[-1].type == "human" and history[-1].content == user_message:
+        history.pop()
+    limit = settings.CHAT_SEMANTIC_CACHE_CONTEXT_MESSAGES
+    recent = history[-limit:] if limit > 0 else []
+    if not recent:
+        return "first_turn"
+    digest = hashlib.blake2b(digest_size=16)
+    for message in recent:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        digest.update(message.type.encode())
+        digest.update(b"\x00")
+        digest.update(content.encode("utf-8", "ignore"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+async def semantic_cache_lookup(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Node: cache respons semantik di depan `agent_node` (dan rerank/compression
+    untuk 'rag_query').
+
+    Kunci: user + intent + model + konteks percakapan + embedding kueri.
+    Untuk 'rag_query' dipakai `rag_query` hasil transformasi (embedding-nya
+    sudah ada dari retrieval, kueri berdiri sendiri); untuk 'simple_chat'
+    pesan user di-embed di sini dan konteksnya adalah hash riwayat terakhir.
+    - hit  -> `final_response` + AIMessage, graph melewati agent_node.
+    - miss -> embedding & generasi disimpan di state agar agent_node bisa
+      menulis respons ke cache setelah selesai.
+    """
+    request_id = state.get("request_id")
+    intent = state.get("intent")
+    if not semantic_response_cache.is_cacheable(intent):
+        return {}
+
+    query = state.get("rag_query") if intent == "rag_query" else None
+    query = query or state.get("user_message", "")
+    if len(query.strip()) < settings.CHAT_SEMANTIC_CACHE_MIN_QUERY_CHARS:
+        return {}
+
+    model = state.get("llm_model") or settings.DEFAULT_MODEL
+    context = _context_fingerprint(intent, state.get("chat_history", []), state.get("user_message", ""))
+
+    with tracer.start_as_current_span("semantic_cache_lookup") as span:
+        embedding = state.get("rag_query_embedding")
+        if not embedding:
+            try:
+                dependencies = config["configurable"]["dependencies"]
+                embedding_service = dependencies.get("embedding_service") or _get_embedding_service()
+                embedding = await embedding_service.generate_embedding(query, task_type="retrieval_query")
+            except Exception as e:
+                logger.warning(f"REQUEST_ID: {request_id} - Embedding untuk cache semantik gagal: {e}")
+                return {}
+
+        cached, generation = await semantic_response_cache.lookup(
+            state.get("user_id"), intent, model, context, embedding
+        )
+        span.set_attribute("app.semantic_cache.hit", cached is not None)
+
+        if cached is None:
+            return {
+                "semantic_cache_hit": False,
+                "semantic_cache_embedding": embedding if generation is not None else None,
+                "semantic_cache_generation": generation,
+                "semantic_cache_context": context,
+            }
+
+        logger.info(
+            f"REQUEST_ID: {request_id} - Cache semantik hit "
+            f"(intent={intent}, distance={cached.distance:.4f})"
+        )
+        return {
+            "chat_history": state.get("chat_history", []) + [AIMessage(content=cached.response)],
+            "final_response": cached.response,
+            "model_used": cached.model,
+            "semantic_cache_hit": True,
+            # rerank_context dilewati: buang embedding di sini
+            "retrieved_docs": _strip_embeddings(state.get("retrieved_docs") or []),
+            "rag_query_embedding": None,
+        }
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Dict, Any
+
+from langchain_core.runnables import RunnableConfig
+from opentelemetry import trace
+from prometheus_client import Counter
+
+from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.nodes.intent import classify_intent
+from app.services.chat_engine.nodes.rag import _search_context, _fallback_ts_query
+
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+SPECULATIVE_RETRIEVAL_TOTAL = Counter(
+    "chat_speculative_retrieval_total",
+    "Hasil retrieval spekulatif yang berjalan paralel dengan classify_intent",
+    ["outcome"]  # 'used' | 'discarded' | 'failed'
+)
+
+
+def _consume_result(task: asyncio.Task) -> None:
+    # Hindari warning "Task exception was never retrieved" untuk hasil yang dibuang
+    if not task.cancelled():
+        task.exception()
+
+
+async def classify_intent_speculative(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Node #1 (mode spekulatif): `classify_intent` + retrieval paralel.
+
+    Embedding kueri dan hybrid search dimulai BERSAMAAN dengan klasifikasi
+    intent, memakai pesan user apa adanya sebagai kueri (tanpa rewrite LLM).
+    - intent == 'rag_query' -> hasil retrieval dipakai, graph langsung ke
+      `rerank_context` (melewati `query_transform` + `retrieve_context`).
+    - intent lain / error   -> task retrieval dibatalkan dan hasilnya dibuang.
+    """
+    request_id = state.get("request_id")
+    user_message = state.get("user_message", "")
+    rag_query = user_message
+    ts_query = _fallback_ts_query(user_message)
+
+    with tracer.start_as_current_span("classify_intent_speculative") as span:
+        retrieval_task = asyncio.create_task(
+            _search_context(config, state.get("user_id"), rag_query, ts_query)
+        )
+        retrieval_task.add_done_callback(_consume_result)
+
+        try:
+            result = await classify_intent(state, config)
+        except BaseException:
+            retrieval_task.cancel()
+            raise
+
+        if result.get("errors") or result.get("intent") != "rag_query":
+            retrieval_task.cancel()
+            SPECULATIVE_RETRIEVAL_TOTAL.labels(outcome="discarded").inc()
+            span.set_attribute("app.speculative.outcome", "discarded")
+            return {**result, "speculative_retrieval_used": False}
+
+        try:
+            docs, query_embedding = await retrieval_task
+        except Exception as e:
+            # Jatuh ke jalur RAG biasa (query_transform -> retrieve_context)
+            logger.warning(f"REQUEST_ID: {request_id} - Retrieval spekulatif gagal: {e}")
+            SPECULATIVE_RETRIEVAL_TOTAL.labels(outcome="failed").inc()
+            span.set_attribute("app.speculative.outcome", "failed")
+            return {**result, "speculative_retrieval_used": False}
+
+        SPECULATIVE_RETRIEVAL_TOTAL.labels(outcome="used").inc()
+        span.set_attributes({
+            "app.speculative.outcome": "used",
+            "app.retrieve.docs": len(docs),
+        })
+        logger.info(f"REQUEST_ID: {request_id} - Retrieval spekulatif dipakai ({len(docs)} docs)")
+        return {
+            **result,
+            "rag_query": rag_query,
+            "ts_query": ts_query,
+            "retrieved_docs": docs,
+            "rag_query_embedding": query_embedding,
+            "speculative_retrieval_used": True,
+        }
@@ -0,0 +1,514 @@
+# File: backend/app/services/chat_engine/provider_router.py
+# (FILE BARU - Routing model berbasis kesehatan provider + hedging first token)
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGenerationChunk
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+from app.services.chat_engine.llm_provider import get_provider_from_model
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDER_REQUESTS = Counter(
+    "llm_provider_requests_total",
+    "Hasil panggilan streaming LLM per model",
+    ["model", "outcome"]  # outcome: 'success' | 'provider_error' | 'cancelled'
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Latensi sampai chunk pertama dari LLM",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30)
+)
+LLM_ROUTING_DECISIONS = Counter(
+    "llm_routing_decisions_total",
+    "Keputusan routing model sebelum panggilan LLM",
+    ["decision"]  # 'requested' | 'degraded_probe' | 'rerouted' | 'no_healthy_candidate'
+)
+LLM_HEDGE_EVENTS = Counter(
+    "llm_hedge_events_total",
+    "Request hedged: backup dimulai setelah deadline first token",
+    ["winner"]  # 'primary' | 'backup'
+)
+LLM_CIRCUIT_OPEN = Gauge(
+    "llm_provider_circuit_open",
+    "1 jika circuit provider/model sedang terbuka",
+    ["target"]
+)
+
+# Nama kelas exception SDK yang menandakan masalah di sisi provider
+# (openai / google.api_core / httpx), dipakai jika status code tidak tersedia.
+_PROVIDER_ERROR_TYPES = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "AuthenticationError", "PermissionDeniedError",
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded",
+    "TooManyRequests", "Unauthenticated", "PermissionDenied",
+    "ConnectError", "ReadTimeout", "ConnectTimeout", "RemoteProtocolError",
+}
+# Fallback terakhir untuk wrapper yang hanya membawa pesan (mis. ChatGoogleGenerativeAIError)
+_PROVIDER_ERROR_MARKERS = (
+    "429", "503", "quota", "rate limit", "suspended", "overloaded",
+    "unavailable", "401", "unauthorized",
+)
+
+_LATENCY_EWMA_ALPHA = 0.2
+_ERROR_EWMA_ALPHA = 0.2
+
+
+def is_provider_error(exc: BaseException) -> bool:
+    """
+    True jika error berasal dari kondisi provider (rate limit, quota, auth,
+    5xx, timeout, koneksi) - bukan dari request itu sendiri (mis. 400).
+    """
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is None and isinstance(getattr(exc, "code", None), int):
+        status = exc.code  # google.api_core: kode HTTP
+    if isinstance(status, int):
+        return status in (401, 403, 408, 429) or status >= 500
+
+    if type(exc).__name__ in _PROVIDER_ERROR_TYPES:
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in _PROVIDER_ERROR_MARKERS)
+
+
+@dataclass
+class _Health:
+    """Statistik bergulir untuk satu target (model atau provider)."""
+    ttft_ewma: Optional[float] = None
+    error_ewma: float = 0.0
+    samples: int = 0
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    trial_until: float = 0.0
+    ttft_window: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+
+    def p95_ttft(self) -> Optional[float]:
+        if not self.ttft_window:
+            return None
+        ordered = sorted(self.ttft_window)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class ProviderRouter:
+    """
+    Menyimpan skor kesehatan bergulir per model dan per provider (dari
+    `MODEL_TO_PROVIDER`): EWMA latensi first token, EWMA error rate, dan
+    state circuit (closed -> open -> half-open).
+
+    - `plan(model)` memilih model SEBELUM panggilan: model yang diminta jika
+      sehat, jika tidak kandidat fallback sehat dengan skor terbaik. Model
+      yang terdegradasi (TTFT lambat) tetap menerima satu request percobaan
+      per `open_seconds` (lewat `trial_until`, seperti half-open) agar bisa
+      pulih; percobaan yang cepat memulai ulang EWMA TTFT-nya.
+    - `stream(...)` menjalankan streaming, mencatat TTFT/error, failover ke
+      backup jika primary gagal sebelum chunk pertama, dan (opsional) hedging:
+      backup dimulai setelah deadline p95 TTFT primary; yang kalah dibatalkan.
+      Contender berjalan TANPA callback config node; hanya chunk pemenang
+      yang di-stream ulang lewat `_WinnerRelay` dengan config node, sehingga
+      token contender yang kalah tidak pernah sampai ke stream LangGraph
+      (messages / astream_events) dan SSE klien.
+    """
+
+    def __init__(
+        self,
+        fallback_models: List[str],
+        failure_threshold: int,
+        error_rate_threshold: float,
+        min_samples: int,
+        open_seconds: float,
+        degraded_ttft_seconds: float,
+        hedge_enabled: bool,
+        hedge_min_delay_seconds: float,
+        hedge_max_delay_seconds: float,
+    ):
+        self.fallback_models = fallback_models
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self.degraded_ttft_seconds = degraded_ttft_seconds
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.hedge_max_delay_seconds = hedge_max_delay_seconds
+        self._health: Dict[str, _Health] = {}
+
+    # --- Skor kesehatan ---
+
+    @staticmethod
+    def _targets(model: str) -> Tuple[str, str]:
+        return (f"model:{model}", f"provider:{get_provider_from_model(model)}")
+
+    def _get(self, target: str) -> _Health:
+        health = self._health.get(target)
+        if health is None:
+            health = self._health[target] = _Health()
+        return health
+
+    def _is_open(self, target: str, now: float) -> bool:
+        health = self._health.get(target)
+        if health is None or health.open_until == 0.0:
+            return False
+        if now < health.open_until:
+            return True
+        # Cooldown selesai: half-open, hanya satu request percobaan dalam satu waktu
+        return now < health.trial_until
+
+    def is_available(self, model: str) -> bool:
+        now = time.monotonic()
+        return not any(self._is_open(t, now) for t in self._targets(model))
+
+    def _is_slow(self, health: Optional[_Health]) -> bool:
+        return bool(
+            health and health.ttft_ewma is not None
+            and health.samples >= self.min_samples
+            and health.ttft_ewma > self.degraded_ttft_seconds
+        )
+
+    def is_degraded(self, model: str) -> bool:
+        return self._is_slow(self._health.get(f"model:{model}"))
+
+    def _degraded_probe_due(self, model: str, now: float) -> bool:
+        """Cooldown model terdegradasi selesai dan belum ada percobaan yang berjalan."""
+        health = self._health.get(f"model:{model}")
+        return health is not None and now >= health.trial_until
+
+    def score(self, model: str) -> float:
+        """Makin kecil makin baik. Model tanpa data dianggap netral (deadline hedge maksimum)."""
+        health = self._health.get(f"model:{model}")
+        if health is None or health.ttft_ewma is None:
+            return self.hedge_max_delay_seconds
+        return health.ttft_ewma * (1.0 + 4.0 * health.error_ewma)
+
+    def record_success(self, model: str, ttft_seconds: float) -> None:
+        LLM_PROVIDER_REQUESTS.labels(model=model, outcome="success").inc()
+        LLM_TIME_TO_FIRST_TOKEN.labels(model=model).observe(ttft_seconds)
+        now = time.monotonic()
+        for target in self._targets(model):
+            health = self._get(target)
+            was_slow = self._is_slow(health)
+            health.samples += 1
+            health.ttft_window.append(ttft_seconds)
+            if was_slow and ttft_seconds <= self.degraded_ttft_seconds:
+                # Percobaan cepat saat terdegradasi: mulai ulang EWMA (seperti
+                # percobaan half-open yang berhasil menutup circuit)
+                logger.info(f"{target} pulih dari latensi tinggi (TTFT {ttft_seconds:.2f}s).")
+                health.ttft_ewma = ttft_seconds
+            else:
+                health.ttft_ewma = (
+                    ttft_seconds if health.ttft_ewma is None
+                    else health.ttft_ewma + _LATENCY_EWMA_ALPHA * (ttft_seconds - health.ttft_ewma)
+                )
+            health.error_ewma *= (1 - _ERROR_EWMA_ALPHA)
+            health.consecutive_failures = 0
+            if health.open_until:
+                logger.info(f"Circuit {target} tertutup kembali.")
+                LLM_CIRCUIT_OPEN.labels(target=target).set(0)
+                health.trial_until = 0.0
+            health.open_until = 0.0
+            if not was_slow and self._is_slow(health):
+                # Baru terdegradasi: percobaan pertama setelah cooldown
+                health.trial_until = now + self.open_seconds
+
+    def record_failure(self, model: str, error: BaseException) -> None:
+        LLM_PROVIDER_REQUESTS.labels(model=model, outcome="provider_error").inc()
+        now = time.monotonic()
+        for target in self._targets(model):
+            health = self._get(target)
+            health.samples += 1
+            health.error_ewma += _ERROR_EWMA_ALPHA * (1 - health.error_ewma)
+            health.consecutive_failures += 1
+            trip = (
+                (health.open_until and now >= health.open_until)  # percobaan half-open gagal
+                or health.consecutive_failures >= self.failure_threshold
+                or (health.samples >= self.min_samples and health.error_ewma >= self.error_rate_threshold)
+            )
+            if trip:
+                health.open_until = now + self.open_seconds
+                health.trial_until = 0.0
+                LLM_CIRCUIT_OPEN.labels(target=target).set(1)
+                logger.warning(f"Circuit {target} terbuka selama {self.open_seconds}s: {error}")
+
+    def _claim_half_open(self, model: str) -> None:
+        """
+        Tandai request ini sebagai percobaan (circuit half-open atau model
+        terdegradasi) agar request lain tetap dialihkan selama `open_seconds`.
+        """
+        now = time.monotonic()
+        for target in self._targets(model):
+            health = self._health.get(target)
+            if health and health.open_until and now >= max(health.open_until, health.trial_until):
+                # Percobaan yang tidak pernah melapor (mis. dibatalkan) kedaluwarsa sendiri
+                health.trial_until = now + self.open_seconds
+        if self.is_degraded(model) and self._degraded_probe_due(model, now):
+            self._health[f"model:{model}"].trial_until = now + self.open_seconds
+
+    # --- Routing ---
+
+    def _candidates(self, requested: str) -> List[str]:
+        candidates = [requested]
+        for model in [settings.DEFAULT_MODEL] + self.fallback_models:
+            if model not in candidates:
+                candidates.append(model)
+        return candidates
+
+    def plan(self, requested: str) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Mengembalikan (model_utama, model_backup, alasan_reroute).
+        `alasan_reroute` diisi jika model yang diminta dialihkan sebelum dipanggil.
+        """
+        candidates = self._candidates(requested)
+        healthy = [m for m in candidates if self.is_available(m)]
+
+        if requested in healthy and not self.is_degraded(requested):
+            primary, reason = requested, None
+            LLM_ROUTING_DECISIONS.labels(decision="requested").inc()
+        elif requested in healthy and self._degraded_probe_due(requested, time.monotonic()):
+            # Satu request percobaan per cooldown agar model lambat bisa pulih
+            primary, reason = requested, None
+            LLM_ROUTING_DECISIONS.labels(decision="degraded_probe").inc()
+        else:
+            alternatives = sorted(
+                (m for m in healthy if m != requested and not self.is_degraded(m)),
+                key=self.score
+            )
+            if alternatives:
+                primary = alternatives[0]
+                reason = (
+                    f"Provider {get_provider_from_model(requested)} sedang terdegradasi "
+                    f"(circuit terbuka / latensi tinggi), dialihkan ke {primary}"
+                )
+                LLM_ROUTING_DECISIONS.labels(decision="rerouted").inc()
+            else:
+                # Tidak ada kandidat sehat: tetap coba model yang diminta
+                primary, reason = requested, None
+                LLM_ROUTING_DECISIONS.labels(decision="no_healthy_candidate").inc()
+
+        self._claim_half_open(primary)
+        backups = sorted((m for m in healthy if m != primary), key=self.score)
+        return primary, (backups[0] if backups else None), reason
+
+    def hedge_delay(self, model: str) -> float:
+        health = self._health.get(f"model:{model}")
+        p95 = health.p95_ttft() if health and health.samples >= self.min_samples else None
+        if p95 is None:
+            return self.hedge_max_delay_seconds
+        return min(self.hedge_max_delay_seconds, max(self.hedge_min_delay_seconds, p95))
+
+    # --- Streaming ---
+
+    async def stream(
+        self,
+        model: str,
+        llm: Any,
+        messages: List[Any],
+        config: Any,
+        backup: Optional[Tuple[str, Any]] = None,
+    ) -> Tuple[str, AsyncIterator[Any]]:
+        """
+        Mengembalikan (model_pemenang, iterator chunk). Error provider sebelum
+        chunk pertama membuat router beralih ke `backup`; error setelah itu
+        dicatat lalu diteruskan ke pemanggil.
+        """
+        contenders: Dict[asyncio.Future, _Contender] = {}
+        contender_config = _without_callbacks(config)
+
+        def start(target_model: str, target_llm: Any) -> None:
+            contender = _Contender(target_model, target_llm, messages, contender_config)
+            contenders[contender.first_token] = contender
+
+        start(model, llm)
+        hedge_timeout = self.hedge_delay(model) if (self.hedge_enabled and backup) else None
+        backup_started = False
+        last_error: Optional[BaseException] = None
+
+        try:
+            while contenders:
+                done, _ = await asyncio.wait(
+                    contenders.keys(),
+                    timeout=None if backup_started else hedge_timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    logger.info(f"Hedging: {model} belum memberi token setelah {hedge_timeout:.2f}s, mulai {backup[0]}")
+                    start(*backup)
+                    backup_started = True
+                    continue
+
+                for first_token in done:
+                    contender = contenders.pop(first_token)
+                    error = first_token.exception()
+                    if error is not None:
+                        if not is_provider_error(error):
+                            raise error
+                        self.record_failure(contender.model, error)
+                        last_error = error
+                        logger.warning(f"Provider error dari {contender.model} sebelum token pertama: {error}")
+                        if backup and not backup_started:
+                            start(*backup)
+                            backup_started = True
+                        continue
+
+                    self.record_success(contender.model, first_token.result())
+                    if backup_started:
+                        LLM_HEDGE_EVENTS.labels(winner="primary" if contender.model == model else "backup").inc()
+                    await _cancel_all(contenders)
+                    winner_stream = self._drain(contender)
+                    if config is None:
+                        return contender.model, winner_stream
+                    relay = _WinnerRelay(winner_model=contender.model, source=winner_stream)
+                    return contender.model, relay.astream(messages, config=config)
+
+            raise last_error
+        except BaseException:
+            await _cancel_all(contenders)
+            raise
+
+    async def _drain(self, contender: "_Contender") -> AsyncIterator[Any]:
+        try:
+            while True:
+                item = await contender.queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    if is_provider_error(item.error):
+                        self.record_failure(contender.model, item.error)
+                    raise item.error
+                yield item
+        finally:
+            await contender.cancel()
+
+
+_END = object()
+
+
+def _without_callbacks(config: Any) -> Any:
+    """
+    Config contender: sama dengan config node tetapi tanpa callback (handler
+    stream LangGraph, astream_events). `[]` (bukan None) agar callback dari
+    context runnable induk juga tidak diwarisi.
+    """
+    if config is None:
+        return None
+    return {**config, "callbacks": []}
+
+
+class _WinnerRelay(BaseChatModel):
+    """
+    Chat model penerus: men-stream ulang chunk contender pemenang dengan
+    config node, sehingga callback stream melihat satu run LLM biasa yang
+    hanya berisi token pemenang.
+    """
+    winner_model: str
+    source: Any = None  # AsyncIterator chunk dari ProviderRouter._drain
+
+    @property
+    def _llm_type(self) -> str:
+        return "provider_router_relay"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"winner_model": self.winner_model}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError("_WinnerRelay hanya mendukung astream")
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        try:
+            async for chunk in self.source:
+                generation = ChatGenerationChunk(message=chunk)
+                if run_manager:
+                    token = chunk.content if isinstance(chunk.content, str) else ""
+                    await run_manager.on_llm_new_token(token, chunk=generation)
+                yield generation
+        finally:
+            # Konsumen berhenti lebih awal: hentikan stream pemenang juga
+            await self.source.aclose()
+
+
+@dataclass
+class _Failure:
+    error: BaseException
+
+
+class _Contender:
+    """
+    Satu stream LLM yang berjalan di task sendiri dan mengisi queue chunk.
+    `first_token` selesai dengan TTFT (detik) atau dengan exception jika
+    stream gagal sebelum chunk pertama.
+    """
+
+    def __init__(self, model: str, llm: Any, messages: List[Any], config: Any):
+        self.model = model
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.first_token: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._started = time.perf_counter()
+        self._task = asyncio.create_task(self._pump(llm, messages, config))
+
+    def _mark_first_token(self) -> None:
+        if not self.first_token.done():
+            self.first_token.set_result(time.perf_counter() - self._started)
+
+    async def _pump(self, llm: Any, messages: List[Any], config: Any) -> None:
+        try:
+            async for chunk in llm.astream(messages, config=config):
+                self._mark_first_token()
+                self.queue.put_nowait(chunk)
+            self._mark_first_token()
+            self.queue.put_nowait(_END)
+        except asyncio.CancelledError:
+            if not self.first_token.done():
+                self.first_token.cancel()
+            raise
+        except Exception as e:
+            if self.first_token.done():
+                self.queue.put_nowait(_Failure(e))
+            else:
+                self.first_token.set_exception(e)
+
+    async def cancel(self) -> None:
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except BaseException:
+                pass
+
+
+async def _cancel_all(contenders: Dict[asyncio.Future, _Contender]) -> None:
+    """Membatalkan stream yang kalah."""
+    for contender in list(contenders.values()):
+        await contender.cancel()
+        LLM_PROVIDER_REQUESTS.labels(model=contender.model, outcome="cancelled").inc()
+    contenders.clear()
+
+
+def _parse_models(raw: str) -> List[str]:
+    return [m.strip() for m in raw.split(",") if m.strip()]
+
+
+# Instance singleton (state kesehatan per worker)
+provider_router = ProviderRouter(
+    fallback_models=_parse_models(settings.LLM_ROUTER_FALLBACK_MODELS),
+    failure_threshold=settings.LLM_ROUTER_FAILURE_THRESHOLD,
+    error_rate_threshold=settings.LLM_ROUTER_ERROR_RATE_THRESHOLD,
+    min_samples=settings.LLM_ROUTER_MIN_SAMPLES,
+    open_seconds=settings.LLM_ROUTER_OPEN_SECONDS,
+    degraded_ttft_seconds=settings.LLM_ROUTER_DEGRADED_TTFT_SECONDS,
+    hedge_enabled=settings.LLM_HEDGE_ENABLED,
+    hedge_min_delay_seconds=settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+    hedge_max_delay_seconds=settings.LLM_HEDGE_MAX_DELAY_SECONDS,
+)
@@ -1,83 +1,230 @@
 # File: backend/app/services/chat_engine/reranker.py
 # (File Baru - Rencana v2.1 Fase 3)
+# [BARU] Backend reranker lokal (NumPy cosine + BM25) selain Cohere.
 
+import asyncio
 import logging
+import re
+import time
+from collections import Counter
 from typing import List, Dict, Any, Optional
-from langchain_cohere import CohereRerank
+
+import numpy as np
+from opentelemetry import trace
+
 from app.core.config import settings
+from app.core.utils import serialization
 
 logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _doc_text(doc: Dict[str, Any]) -> str:
+    return doc.get("page_content") or doc.get("content") or doc.get("summary_text") or ""
+
+
+def _as_vector(value: Any) -> Optional[List[float]]:
+    """pgvector via PostgREST dikirim sebagai string '[0.1,0.2,...]'."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = serialization.loads(value)
+        except serialization.JSONDecodeError:
+            return None
+    return value if isinstance(value, list) and value else None
+
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    span = scores.max() - scores.min()
+    if span <= 0:
+        return np.zeros_like(scores)
+    return (scores - scores.min()) / span
+
+
+class LocalReranker:
+    """
+    Reranker CPU-only tanpa panggilan jaringan.
+
+    Skor akhir = fusi (min-max) antara:
+    - cosine similarity query vs embedding dokumen (NumPy, satu matmul),
+      memakai embedding yang sudah dikembalikan `find_relevant_summaries`;
+    - BM25 query vs teks dokumen (korpus = dokumen hasil retrieval).
+    Dokumen tanpa embedding memakai kolom `similarity` dari DB.
+    """
+
+    def __init__(self, dense_weight: float, k1: float = 1.5, b: float = 0.75):
+        self.dense_weight = dense_weight
+        self.k1 = k1
+        self.b = b
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        return _TOKEN_PATTERN.findall(text.lower())
+
+    def _dense_scores(
+        self,
+        query_embedding: Optional[List[float]],
+        documents: List[Dict[str, Any]]
+    ) -> np.ndarray:
+        fallback = np.array([float(doc.get("similarity") or 0.0) for doc in documents])
+        vectors = [_as_vector(doc.get("embedding")) for doc in documents]
+        if query_embedding is None or any(v is None for v in vectors):
+            return fallback
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != query.shape[0]:
+            logger.warning("Dimensi embedding dokumen tidak cocok dengan query, memakai similarity DB.")
+            return fallback
+
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        norms[norms == 0] = 1.0
+        return (matrix @ query) / norms
+
+    def _bm25_scores(self, query: str, documents: List[Dict[str, Any]]) -> np.ndarray:
+        query_terms = list(dict.fromkeys(self._tokenize(query)))
+        if not query_terms:
+            return np.zeros(len(documents))
+
+        term_index = {term: i for i, term in enumerate(query_terms)}
+        tf = np.zeros((len(documents), len(query_terms)), dtype=np.float32)
+        doc_lengths = np.zeros(len(documents), dtype=np.float32)
+        for row, doc in enumerate(documents):
+            tokens = self._tokenize(_doc_text(doc))
+            doc_lengths[row] = len(tokens)
+            for term, count in Counter(tokens).items():
+                col = term_index.get(term)
+                if col is not None:
+                    tf[row, col] = count
+
+        n_docs = len(documents)
+        df = (tf > 0).sum(axis=0)
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        avg_length = doc_lengths.mean() or 1.0
+        length_norm = self.k1 * (1 - self.b + self.b * doc_lengths / avg_length)
+        scores = (tf * (self.k1 + 1)) / (tf + length_norm[:, None])
+        return scores @ idf
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[Dict[str, Any]],
+        query_embedding: Optional[List[float]] = None,
+        top_n: int = 5
+    ) -> List[Dict[str, Any]]:
+        dense = self._dense_scores(query_embedding, documents)
+        sparse = self._bm25_scores(query, documents)
+        fused = self.dense_weight * _min_max(dense) + (1 - self.dense_weight) * _min_max(sparse)
+
+        reranked = []
+        for index in np.argsort(-fused, kind="stable")[:top_n]:
+            doc = documents[int(index)]
+            doc["relevance_score"] = float(fused[index])
+            reranked.append(doc)
+        return reranked
+
 
 class RerankerService:
     """
     Menyediakan layanan reranking terpusat.
     Mengimplementasikan NFR Poin 9 (Batching Reranker).
+
+    [BARU] Backend dipilih per deployment via `RERANKER_BACKEND`:
+    "local" (NumPy cosine + BM25, default) atau "cohere" (butuh COHERE_API_KEY).
     """
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None, top_n: int = 5):
+        self.backend = backend or settings.RERANKER_BACKEND
+        self.top_n = top_n
         self.reranker = None
+        self.local_reranker = LocalReranker(dense_weight=settings.RERANKER_DENSE_WEIGHT)
+
+        if self.backend != "cohere":
+            return
         if settings.COHERE_API_KEY:
             try:
+                from langchain_cohere import CohereRerank
                 self.reranker = CohereRerank(
-                    api_key=settings.COHERE_API_KEY,
-                    model="rerank-english-v3.0", # Ganti ke 'rerank-multilingual-v3.0' untuk non-Inggris
-                    top_n=5 # Ambil top 5 dokumen terbaik
+                    cohere_api_key=settings.COHERE_API_KEY,
+                    model="rerank-multilingual-v3.0",
+                    top_n=top_n
                 )
                 logger.info("Cohere Reranker (rerank-multilingual-v3.0) berhasil diinisialisasi.")
             except ImportError:
-                logger.error("Package 'langchain-cohere' tidak terinstal. Reranker tidak akan berfungsi.")
+                logger.error("Package 'langchain-cohere' tidak terinstal. Memakai reranker lokal.")
             except Exception as e:
-                logger.error(f"Gagal menginisialisasi CohereRerank: {e}")
+                logger.error(f"Gagal menginisialisasi CohereRerank: {e}. Memakai reranker lokal.")
         else:
-            logger.warning("COHERE_API_KEY tidak diatur. Reranker akan dilewati (fallback).")
+            logger.warning("COHERE_API_KEY tidak diatur. Memakai reranker lokal.")
 
     async def arerank_documents(
-        self, 
-        query: str, 
-        documents: List[Dict[str, Any]]
+        self,
+        query: str,
+        documents: List[Dict[str, Any]],
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Melakukan rerank dokumen secara batch.
-        
+
         Args:
             query: Kueri pengguna (rag_query).
-            documents: List[dict], setiap dict HARUS memiliki 'page_content'.
+            documents: List[dict] dengan 'content' (atau 'page_content'),
+                opsional 'embedding' dan 'similarity'.
+            query_embedding: Embedding `query` (reranker lokal).
 
         Returns:
-            List[dict] dokumen yang telah diurutkan ulang.
+            List[dict] dokumen yang telah diurutkan ulang (maks. `top_n`),
+            masing-masing dengan 'relevance_score'.
         """
-        if not self.reranker:
-            logger.warning("Reranker dilewati (tidak terkonfigurasi). Mengembalikan 5 dokumen teratas.")
-            return documents[:5]
-            
         if not documents:
             return []
 
-        try:
-            # Ubah format dokumen untuk Cohere
-            docs_to_rerank = [{"text": doc.get("page_content", "")} for doc in documents]
-            
-            # Panggil .arerank (async)
-            # NFR Poin 9: Ini adalah panggilan batch, bukan N panggilan individual.
-            reranked_results = await self.reranker.arerank(
-                query=query,
-                documents=docs_to_rerank,
-                rank_fields=["text"]
-            )
-            
-            # Kembalikan dokumen asli, diurutkan berdasarkan hasil rerank
-            reranked_docs = []
-            for result in reranked_results:
-                if result.relevance_score > 0.1: # Filter skor rendah
-                    original_doc = documents[result.index]
-                    original_doc["relevance_score"] = result.relevance_score
-                    reranked_docs.append(original_doc)
-            
+        backend = "cohere" if self.reranker else "local"
+        with tracer.start_as_current_span("rerank_documents") as span:
+            start = time.perf_counter()
+            try:
+                if self.reranker:
+                    reranked_docs = await self._arerank_cohere(query, documents)
+                else:
+                    # CPU-bound tapi orde mikro-/milidetik untuk puluhan dokumen;
+                    # tidak perlu dipindah ke thread.
+                    reranked_docs = self.local_reranker.rerank(
+                        query, documents, query_embedding=query_embedding, top_n=self.top_n
+                    )
+            except Exception as e:
+                logger.error(f"Gagal melakukan rerank ({backend}): {e}. Mengembalikan {self.top_n} dokumen teratas (fallback).")
+                # NFR Poin 4 (Fallbacks)
+                span.set_status(trace.StatusCode.ERROR, f"Error: {e}")
+                reranked_docs = documents[:self.top_n]
+
+            span.set_attributes({
+                "app.rerank.backend": backend,
+                "app.rerank.docs_in": len(documents),
+                "app.rerank.docs_out": len(reranked_docs),
+                "app.rerank.used_query_embedding": query_embedding is not None,
+                "app.rerank.duration_ms": (time.perf_counter() - start) * 1000,
+            })
             return reranked_docs
 
-        except Exception as e:
-            logger.error(f"Gagal melakukan rerank: {e}. Mengembalikan 5 dokumen teratas (fallback).")
-            # NFR Poin 4 (Fallbacks)
-            return documents[:5]
+    async def _arerank_cohere(self, query: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # NFR Poin 9: Ini adalah panggilan batch, bukan N panggilan individual.
+        # CohereRerank.rerank sinkron (HTTP); jalankan di thread
+        reranked_results = await asyncio.to_thread(
+            self.reranker.rerank,
+            documents=[_doc_text(doc) for doc in documents],
+            query=query
+        )
+
+        # Kembalikan dokumen asli, diurutkan berdasarkan hasil rerank
+        reranked_docs = []
+        for result in reranked_results:
+            if result["relevance_score"] > 0.1: # Filter skor rendah
+                original_doc = documents[result["index"]]
+                original_doc["relevance_score"] = result["relevance_score"]
+                reranked_docs.append(original_doc)
+        return reranked_docs
 
 # --- Instance Singleton ---
-reranker_service = RerankerService()
\ No newline at end of file
+reranker_service = RerankerService()
@@ -5,6 +5,8 @@ Routing logic untuk LangGraph Agent.
 from .route_logic import (
     route_after_context_management,
     route_after_classify,
+    route_after_router,
+    route_after_semantic_cache,
     route_after_agent,
     route_after_reflection,
     route_check_context
@@ -13,6 +15,8 @@ from .route_logic import (
 __all__ = [
     "route_after_context_management",
     "route_after_classify",
+    "route_after_router",
+    "route_after_semantic_cache",
     "route_after_agent",
     "route_after_reflection",
     "route_check_context"
@@ -22,7 +22,24 @@ def route_after_classify(state: AgentState) -> str:
     if state.get("errors"):
         return "__end__"
     intent = state.get("intent")
-    return "query_transform" if intent == "rag_query" else "agent_node"
+    if intent != "rag_query":
+        return "semantic_cache_lookup"
+    # Mode spekulatif: retrieval sudah selesai paralel dengan classify_intent
+    return "semantic_cache_lookup" if state.get("speculative_retrieval_used") else "query_transform"
+
+
+def route_after_router(state: AgentState) -> str:
+    """Router setelah node gabungan route_and_transform (kueri RAG sudah ditulis ulang)."""
+    if state.get("errors"):
+        return "__end__"
+    return "retrieve_context" if state.get("intent") == "rag_query" else "semantic_cache_lookup"
+
+
+def route_after_semantic_cache(state: AgentState) -> str:
+    """Router setelah semantic_cache_lookup (hit melewati rerank/compression/agent)."""
+    if state.get("semantic_cache_hit"):
+        return "extract_preferences_node"
+    return "rerank_context" if state.get("intent") == "rag_query" else "agent_node"
 
 
 def route_after_agent(state: AgentState) -> str:
@@ -0,0 +1,50 @@
+"""
+Sinyal "node mulai" untuk stream_mode="custom" LangGraph.
+
+stream_mode "updates" hanya memberi tahu saat node SELESAI; status SSE
+("Merumuskan jawaban...") dan timing per node butuh saat node MULAI.
+Setiap node graph dibungkus `with_node_start_signal` yang menulis
+{"type": "node_start", "node": <nama>} ke stream writer LangGraph.
+Di luar stream_mode="custom" writer-nya no-op.
+"""
+import inspect
+import logging
+from typing import Any, Callable
+
+from langchain_core.runnables import RunnableConfig
+
+try:
+    from langgraph.config import get_stream_writer
+except ImportError:  # langgraph lama: sinyal dimatikan (status SSE tetap dari updates)
+    get_stream_writer = None
+
+logger = logging.getLogger(__name__)
+
+NODE_START_EVENT = "node_start"
+
+
+def emit_node_start(node_name: str) -> None:
+    if get_stream_writer is None:
+        return
+    try:
+        get_stream_writer()({"type": NODE_START_EVENT, "node": node_name})
+    except Exception as e:
+        # Di luar konteks runnable LangGraph (mis. node dipanggil langsung di tes)
+        logger.debug(f"Sinyal node_start untuk {node_name} dilewati: {e}")
+
+
+def with_node_start_signal(node_name: str, node: Callable[..., Any]) -> Callable[..., Any]:
+    """Membungkus fungsi node (sync/async, dengan/tanpa `config`) agar mengirim sinyal mulai."""
+    accepts_config = "config" in inspect.signature(node).parameters
+    is_async = inspect.iscoroutinefunction(node)
+
+    async def signalled_node(state, config: RunnableConfig):
+        emit_node_start(node_name)
+        result = node(state, config) if accepts_config else node(state)
+        if is_async:
+            result = await result
+        return result
+
+    signalled_node.__name__ = getattr(node, "__name__", node_name)
+    signalled_node.__doc__ = node.__doc__
+    return signalled_node
@@ -1,24 +1,98 @@
 """
 SSE streaming service for LangGraph agent events.
 """
-import json
+import asyncio
 import logging
-from typing import AsyncGenerator, List, Optional
+import random
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, List, Optional, Union
 from uuid import UUID
 from datetime import datetime
 import time
 
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.messages import BaseMessage, AIMessageChunk, ToolMessage
 from langchain_core.runnables import RunnableConfig
+from prometheus_client import Histogram
 
 from app.services.chat_engine.agent_state import AgentState
 from app.services.chat_engine.streaming_schemas import StreamError
 from app.services.chat_engine.helpers import TokenCounter
+from app.services.chat_engine.helpers.token_coalescer import TokenCoalescer
 from app.services.chat_engine.helpers.observability_collector import ObservabilityCollector
+from app.services.chat_engine.stream_signals import NODE_START_EVENT
 from app.core.config import settings
+from app.core.utils import serialization
 
 logger = logging.getLogger(__name__)
 
+CHAT_NODE_DURATION_SECONDS = Histogram(
+    "chat_graph_node_duration_seconds",
+    "Durasi eksekusi per node LangGraph",
+    ["node"]
+)
+CHAT_TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "chat_time_to_first_token_seconds",
+    "Waktu dari awal stream hingga token_chunk pertama",
+    buckets=(0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0, 8.0, 12.0, 20.0)
+)
+
+
+def _graph_node_name(event: dict) -> Optional[str]:
+    """Nama node jika event chain adalah eksekusi node graph (bukan runnable di dalamnya)."""
+    name = event.get("name")
+    metadata = event.get("metadata") or {}
+    return name if name and metadata.get("langgraph_node") == name else None
+
+
+@dataclass
+class StreamResult:
+    """
+    Hasil akhir satu stream, diisi StreamingService selama streaming.
+    Dipakai langkah persistensi secara langsung (tanpa mem-parse ulang
+    setiap baris JSON yang dikirim ke klien).
+    """
+    response_chunks: List[str] = field(default_factory=list)
+    final_state: Optional[Dict[str, Any]] = None
+
+    @property
+    def response_text(self) -> str:
+        return "".join(self.response_chunks)
+
+
+@dataclass
+class _TokenChunk:
+    """Token dari agent; digabung menjadi frame `token_chunk` sebelum dikirim."""
+    text: str
+
+
+def _token_frame(text: str) -> str:
+    return serialization.dumps({"type": "token_chunk", "payload": text}) + "\n"
+
+
+class _PromptLogHandler(BaseCallbackHandler):
+    """
+    Callback untuk request yang tersampel (CHAT_PROMPT_LOG_SAMPLE_RATE):
+    log prompt setiap panggilan chat model ke terminal (DEBUG, tidak dikirim ke user).
+    """
+    run_inline = True
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.total_tokens = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        node_name = (kwargs.get("metadata") or {}).get("langgraph_node", "unknown")
+        logger.debug(f"🔍 PROMPT_LOG [req_id={self.request_id}] [node={node_name}] - Sending prompt to LLM")
+        total_tokens = 0
+        for idx, msg in enumerate(m for batch in messages for m in batch):
+            content = getattr(msg, "content", "")
+            tokens = TokenCounter.count_tokens(content) if isinstance(content, str) and content else 0
+            total_tokens += tokens
+            logger.debug(f"  [{idx}] {msg.type} ({tokens} tokens): {content}...")
+        logger.debug(f"  Total tokens: {total_tokens}")
+        self.total_tokens += total_tokens
+
 
 class StreamingService:
     """Service for handling LangGraph agent event streaming."""
@@ -35,10 +109,157 @@ class StreamingService:
         auth_info,
         embedding_service,
         background_tasks,
-        llm_config: Optional[dict] = None
+        llm_config: Optional[dict] = None,
+        result: Optional[StreamResult] = None
     ) -> AsyncGenerator[str, None]:
         """
         Stream LangGraph agent events as Server-Sent Events (SSE).
+
+        Graph dijalankan di task terpisah yang mengisi antrean frame berukuran
+        tetap (CHAT_STREAM_MAX_BUFFERED_FRAMES). Token digabung per
+        CHAT_STREAM_FRAME_MAX_CHARS karakter / CHAT_STREAM_FRAME_MAX_DELAY_MS.
+        Jika klien lambat dan antrean penuh, token terus digabung ke frame
+        berikutnya (bukan menumpuk ribuan frame kecil); event kontrol
+        (status, final_state, ...) menunggu ruang di antrean.
+
+        `result` (opsional) diisi dengan respons lengkap dan final_state.
+        Argumen lain: lihat `_stream_events`.
+        """
+        result = result if result is not None else StreamResult()
+        coalescer = TokenCoalescer(
+            max_chars=settings.CHAT_STREAM_FRAME_MAX_CHARS,
+            max_delay_seconds=settings.CHAT_STREAM_FRAME_MAX_DELAY_MS / 1000
+        )
+        frames: asyncio.Queue = asyncio.Queue(maxsize=settings.CHAT_STREAM_MAX_BUFFERED_FRAMES)
+        end_of_stream = object()
+        # Penanda "buffer coalescer baru terisi": membangunkan konsumen yang sedang
+        # menunggu antrean agar menghitung ulang tenggat max_delay (token
+        # berikutnya bisa saja baru datang jauh kemudian)
+        buffer_filled = object()
+
+        async def pump():
+            try:
+                async for item in StreamingService._stream_events(
+                    langgraph_agent=langgraph_agent,
+                    request_id=request_id,
+                    user_id=user_id,
+                    conversation_id=conversation_id,
+                    user_message=user_message,
+                    chat_history=chat_history,
+                    permissions=permissions,
+                    auth_info=auth_info,
+                    embedding_service=embedding_service,
+                    background_tasks=background_tasks,
+                    llm_config=llm_config,
+                    result=result
+                ):
+                    if isinstance(item, _TokenChunk):
+                        result.response_chunks.append(item.text)
+                        was_empty = not coalescer
+                        coalescer.add(item.text)
+                        if frames.full():
+                            # Konsumen masih punya frame untuk dikirim; buffer diperiksa lagi setelahnya
+                            continue
+                        if coalescer.ready():
+                            frames.put_nowait(_token_frame(coalescer.flush()))
+                        elif was_empty and coalescer:
+                            frames.put_nowait(buffer_filled)
+                        continue
+                    # Event kontrol: token yang tertunda dikirim lebih dulu (urutan tetap)
+                    pending = coalescer.flush()
+                    if pending:
+                        await frames.put(_token_frame(pending))
+                    await frames.put(item)
+                pending = coalescer.flush()
+                if pending:
+                    await frames.put(_token_frame(pending))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Stream pump error (req_id: {request_id}): {e}", exc_info=True)
+                await frames.put(StreamError(detail=f"Stream error: {e}", status_code=500).model_dump_json() + "\n")
+            await frames.put(end_of_stream)
+
+        pump_task = asyncio.create_task(pump())
+        try:
+            while True:
+                if not frames.empty():
+                    item = frames.get_nowait()
+                else:
+                    # Antrean kosong: buffer coalescer adalah data terbaru
+                    due_in = coalescer.time_until_due()
+                    if due_in == 0.0:
+                        yield _token_frame(coalescer.flush())
+                        continue
+                    try:
+                        item = await asyncio.wait_for(frames.get(), timeout=due_in)
+                    except asyncio.TimeoutError:
+                        continue
+                if item is end_of_stream:
+                    break
+                if item is buffer_filled:
+                    continue
+                yield item
+            await pump_task
+        finally:
+            if not pump_task.done():
+                pump_task.cancel()
+                try:
+                    await pump_task
+                except BaseException:
+                    pass
+
+    @staticmethod
+    async def _graph_events_lean(langgraph_agent, initial_state, config):
+        """
+        Mode default: `stream_mode` messages + updates + custom. Hanya token
+        LLM, update per node, dan sinyal mulai node (lihat stream_signals) -
+        tanpa event start/end untuk setiap runnable di dalam node.
+        Yields: (kind, node_name, data) dengan kind 'node_start' | 'token' | 'node_end'.
+        """
+        async for mode, chunk in langgraph_agent.astream(
+            initial_state, config=config, stream_mode=["messages", "updates", "custom"]
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                yield "token", (metadata or {}).get("langgraph_node"), message
+            elif mode == "updates":
+                for node_name, update in chunk.items():
+                    yield "node_end", node_name, update
+            elif mode == "custom" and isinstance(chunk, dict) and chunk.get("type") == NODE_START_EVENT:
+                yield "node_start", chunk.get("node"), None
+
+    @staticmethod
+    async def _graph_events_v1(langgraph_agent, initial_state, config):
+        """Mode lama (CHAT_STREAM_MODE=events_v1): astream_events v1, dinormalisasi ke (kind, node_name, data)."""
+        async for event in langgraph_agent.astream_events(initial_state, config=config, version="v1"):
+            kind = event["event"]
+            if kind in ("on_chain_start", "on_chain_end"):
+                graph_node = _graph_node_name(event)
+                if graph_node and kind == "on_chain_start":
+                    yield "node_start", graph_node, None
+                elif graph_node:
+                    yield "node_end", graph_node, event["data"].get("output")
+            elif kind == "on_chat_model_stream":
+                yield "token", (event.get("metadata") or {}).get("langgraph_node"), event["data"]["chunk"]
+
+    @staticmethod
+    async def _stream_events(
+        langgraph_agent,
+        request_id: str,
+        user_id: str,
+        conversation_id: str,
+        user_message: str,
+        chat_history: List[BaseMessage],
+        permissions: List[str],
+        auth_info,
+        embedding_service,
+        background_tasks,
+        llm_config: Optional[dict],
+        result: StreamResult
+    ) -> AsyncGenerator[Union[str, _TokenChunk], None]:
+        """
+        Menjalankan graph dan menerjemahkan event LangGraph.
         
         Args:
             langgraph_agent: Compiled LangGraph agent
@@ -52,22 +273,26 @@ class StreamingService:
             embedding_service: Embedding service instance
             background_tasks: FastAPI BackgroundTasks
             llm_config: Optional LLM configuration overrides
+            result: StreamResult yang menerima final_state
             
         Yields:
-            str: JSON-formatted SSE events
+            str: JSON-formatted SSE events (non-token), atau _TokenChunk
         """
         final_ai_response_chunks = []
-        current_node = None
-        final_state = None
+        final_state: Dict[str, Any] = {}
 
         # Local counters (fallback if AgentState doesn't accumulate)
         total_input_tokens_stream = 0
-        total_output_tokens_stream = 0
         model_used_stream = None
 
         # NEW: Debug counters
         event_count = 0
 
+        # Timing breakdown per node + time-to-first-token
+        stream_started_at = time.perf_counter()
+        node_started_at = {}
+        first_token_sent = False
+
         # NEW: Start observability tracking
         ObservabilityCollector.start_request(request_id, conversation_id, user_message)
         
@@ -81,7 +306,7 @@ class StreamingService:
 
         try:
             # Send metadata first (user needs this)
-            yield json.dumps({
+            yield serialization.dumps({
                 "type": "metadata",
                 "payload": {
                     "conversation_id": conversation_id,
@@ -174,92 +399,30 @@ class StreamingService:
             
             logger.info(f"🤖 Model: {model} (temp={temperature})")
 
-            # Helper: robustly extract messages contents from event data
-            def _extract_messages_contents(data: dict) -> List[str]:
-                # Try common locations
-                candidates = []
-                # direct fields
-                msg = data.get("messages")
-                if msg: candidates.append(msg)
-                inp = data.get("input")
-                if inp: candidates.append(inp)
-                # kwargs fields
-                kwargs = data.get("kwargs") or {}
-                kw_msgs = kwargs.get("messages")
-                if kw_msgs: candidates.append(kw_msgs)
-                kw_inp = kwargs.get("input") or kwargs.get("inputs")
-                if kw_inp: candidates.append(kw_inp)
-
-                contents: List[str] = []
-
-                def _flatten(xs):
-                    for x in xs:
-                        if isinstance(x, (list, tuple)):
-                            yield from _flatten(x)
-                        else:
-                            yield x
-
-                for cand in candidates:
-                    try:
-                        for item in _flatten(cand if isinstance(cand, list) else [cand]):
-                            # LangChain message object
-                            content = getattr(item, "content", None)
-                            if content is None and isinstance(item, dict):
-                                content = item.get("content")
-                            if isinstance(content, str) and content:
-                                contents.append(content)
-                    except Exception:
-                        continue
-                return contents
+            # Logging prompt: opt-in, hanya untuk sampel request saat level DEBUG aktif
+            prompt_logger = None
+            if logger.isEnabledFor(logging.DEBUG) and random.random() < settings.CHAT_PROMPT_LOG_SAMPLE_RATE:
+                prompt_logger = _PromptLogHandler(request_id)
+                config["callbacks"] = [prompt_logger]
 
-            async for event in langgraph_agent.astream_events(initial_state, config=config, version="v1"):
-                kind = event["event"]
-                
-                # LOG PROMPT TO TERMINAL (NOT sent to user)
-                if kind == "on_chat_model_start":
-                    data = event.get("data", {}) or {}
-                    node_name = event.get("name", "unknown")
-                    
-                    # Extract prompt messages
-                    messages = data.get("input", {}).get("messages", [])
-                    
-                    # Flatten nested lists
-                    def flatten_messages(msgs):
-                        for item in msgs:
-                            if isinstance(item, list):
-                                yield from flatten_messages(item)
-                            else:
-                                yield item
-                    
-                    # LOG to terminal only
-                    logger.info(f"🔍 PROMPT_LOG [node={node_name}] - Sending prompt to LLM")
-                    total_tokens = 0
-                    for idx, msg in enumerate(flatten_messages(messages)):
-                        # Handle both LangChain message objects and dicts
-                        if hasattr(msg, "type"):
-                            role = msg.type
-                            content = getattr(msg, "content", "")
-                        elif isinstance(msg, dict):
-                            role = msg.get("type", "unknown")
-                            content = msg.get("content", "")
-                        else:
-                            continue
-                        
-                        tokens = TokenCounter.count_tokens(content) if content else 0
-                        total_tokens += tokens
-                        
-                        # LOG each message to terminal
-                        logger.info(f"  [{idx}] {role} ({tokens} tokens): {content}...")
-                    
-                    logger.info(f"  Total tokens: {total_tokens}")
-                    
-                    # Accumulate for final_state
-                    total_input_tokens_stream += total_tokens
-                
+            if settings.CHAT_STREAM_MODE == "events_v1":
+                graph_events = StreamingService._graph_events_v1(langgraph_agent, initial_state, config)
+            else:
+                graph_events = StreamingService._graph_events_lean(langgraph_agent, initial_state, config)
+
+            status_messages = {
+                "classify_intent": "Menganalisis niat...",
+                "query_transform": "Memperjelas kueri...",
+                "retrieve_context": "Mencari ingatan...",
+                "rerank_context": "Memfilter ingatan...",
+                "context_compression": "Meringkas ingatan...",
+                "agent_node": "Merumuskan jawaban..."
+            }
+
+            async for kind, node_name, data in graph_events:
                 # Send status updates to user (clean, no internal details)
-                if kind == "on_chain_start":
-                    node_name = event["name"]
-                    current_node = node_name
+                if kind == "node_start":
+                    node_started_at[node_name] = time.perf_counter()
                     
                     # Check for fallback error and send errorStatus before first status
                     if not error_status_sent and node_name == "agent_node":
@@ -280,52 +443,45 @@ class StreamingService:
                             else:
                                 msg = f"⚠️ Model '{original_model}' error: {error_str[:100]}. Menggunakan fallback model."
                             
-                            yield json.dumps({"type": "errorStatus", "payload": msg}) + "\n"
+                            yield serialization.dumps({"type": "errorStatus", "payload": msg}) + "\n"
                             error_status_sent = True
                             logger.info(f"REQUEST_ID: {request_id} - Sent errorStatus to user")
                     
-                    status_messages = {
-                        "classify_intent": "Menganalisis niat...",
-                        "query_transform": "Memperjelas kueri...",
-                        "retrieve_context": "Mencari ingatan...",
-                        "rerank_context": "Memfilter ingatan...",
-                        "context_compression": "Meringkas ingatan...",
-                        "agent_node": "Merumuskan jawaban..."
-                    }
                     if node_name in status_messages:
-                        yield json.dumps({"type": "status", "payload": status_messages[node_name]}) + "\n"
+                        yield serialization.dumps({"type": "status", "payload": status_messages[node_name]}) + "\n"
                 
                 # Stream token chunks to user
-                elif kind == "on_chat_model_stream":
-                    if current_node == "agent_node":
-                        chunk = event["data"]["chunk"]
-                        if isinstance(chunk, AIMessageChunk) and chunk.content:
-                            token = chunk.content
-                            
-                            # Stream all content as token_chunk (including thinkingDiv)
-                            final_ai_response_chunks.append(token)
-                            try:
-                                total_output_tokens_stream += TokenCounter.count_tokens(token)
-                            except Exception:
-                                pass
-                            yield json.dumps({"type": "token_chunk", "payload": token}) + "\n"
+                elif kind == "token":
+                    if node_name == "agent_node" and isinstance(data, AIMessageChunk) and data.content:
+                        token = data.content
+                        
+                        # Stream all content as token_chunk (including thinkingDiv)
+                        final_ai_response_chunks.append(token)
+                        if not first_token_sent:
+                            first_token_sent = True
+                            ttft = time.perf_counter() - stream_started_at
+                            CHAT_TIME_TO_FIRST_TOKEN_SECONDS.observe(ttft)
+                            ObservabilityCollector.record_first_token(request_id, ttft * 1000)
+                        yield _TokenChunk(token)
                 
-                # Handle chain end
-                elif kind == "on_chain_end":
-                    current_node = None
-                    node_name = event["name"]
-                    output_data = event["data"]["output"]
+                # Handle node end
+                elif kind == "node_end":
+                    output_data = data
+                    if node_name in node_started_at:
+                        duration = time.perf_counter() - node_started_at.pop(node_name)
+                        CHAT_NODE_DURATION_SECONDS.labels(node=node_name).observe(duration)
+                        ObservabilityCollector.record_node_timing(request_id, node_name, duration * 1000)
+                    if not isinstance(output_data, dict):
+                        continue
                     
                     # DEBUG: Log api_call_count after each node
-                    if output_data and isinstance(output_data, dict):
-                        api_count = output_data.get("api_call_count", "N/A")
-                        logger.debug(f"🔍 After node '{node_name}': api_call_count={api_count}")
+                    logger.debug(f"🔍 After node '{node_name}': api_call_count={output_data.get('api_call_count', 'N/A')}")
                     
                     # Handle tool approval request (HiTL)
                     if node_name == "reflection_node":
                         if output_data.get("tool_approval_request"):
                             logger.warning(f"REQUEST_ID: {request_id} - Graph paused for approval")
-                            yield json.dumps({
+                            yield serialization.dumps({
                                 "type": "tool_approval_required",
                                 "payload": output_data["tool_approval_request"]
                             }) + "\n"
@@ -333,35 +489,49 @@ class StreamingService:
                     # Handle tool execution result
                     elif node_name == "call_tools":
                         last_tool_msg: ToolMessage = output_data["chat_history"][-1]
-                        yield json.dumps({
+                        yield serialization.dumps({
                             "type": "status",
                             "payload": f"Hasil: {str(last_tool_msg.content)[:50]}..."
                         }) + "\n"
-                    
-                    # Capture final state from graph
-                    if output_data and isinstance(output_data, dict):
-                        final_state = output_data
+
+                    # Cache semantik hit: tidak ada token LLM, kirim respons
+                    # ter-cache sebagai token_chunk (protokol klien tetap sama)
+                    elif node_name == "semantic_cache_lookup" and output_data.get("semantic_cache_hit"):
+                        token = output_data.get("final_response") or ""
+                        final_ai_response_chunks.append(token)
+                        if not first_token_sent:
+                            first_token_sent = True
+                            ttft = time.perf_counter() - stream_started_at
+                            CHAT_TIME_TO_FIRST_TOKEN_SECONDS.observe(ttft)
+                            ObservabilityCollector.record_first_token(request_id, ttft * 1000)
+                        yield _TokenChunk(token)
+
+                    # Final state = gabungan update semua node (nilai terakhir menang)
+                    final_state.update(output_data)
                         
-                        # Check for fallback error in final state (in case not caught earlier)
-                        if not error_status_sent and node_name == "agent_node":
-                            fallback_err = output_data.get("llm_fallback_error")
-                            if fallback_err:
-                                error_str = fallback_err.get("error", "")
-                                original_model = fallback_err.get("original_model", "")
-                                
-                                if "429" in error_str or "quota" in error_str.lower():
-                                    if "suspended" in error_str.lower():
-                                        msg = f"⚠️ Model '{original_model}' suspended. Akun billing habis. Menggunakan fallback model."
-                                    else:
-                                        msg = f"⚠️ Model '{original_model}' rate limit/quota habis. Menggunakan fallback model."
-                                elif "401" in error_str or "unauthorized" in error_str.lower():
-                                    msg = f"⚠️ Model '{original_model}' autentikasi gagal. Menggunakan fallback model."
+                    # Check for fallback error in final state (in case not caught earlier)
+                    if not error_status_sent and node_name == "agent_node":
+                        fallback_err = output_data.get("llm_fallback_error")
+                        if fallback_err:
+                            error_str = fallback_err.get("error", "")
+                            original_model = fallback_err.get("original_model", "")
+                            
+                            if "429" in error_str or "quota" in error_str.lower():
+                                if "suspended" in error_str.lower():
+                                    msg = f"⚠️ Model '{original_model}' suspended. Akun billing habis. Menggunakan fallback model."
                                 else:
-                                    msg = f"⚠️ Model '{original_model}' error. Menggunakan fallback model."
-                                
-                                yield json.dumps({"type": "errorStatus", "payload": msg}) + "\n"
-                                error_status_sent = True
-                                logger.info(f"REQUEST_ID: {request_id} - Sent errorStatus to user (on_chain_end)")
+                                    msg = f"⚠️ Model '{original_model}' rate limit/quota habis. Menggunakan fallback model."
+                            elif "401" in error_str or "unauthorized" in error_str.lower():
+                                msg = f"⚠️ Model '{original_model}' autentikasi gagal. Menggunakan fallback model."
+                            else:
+                                msg = f"⚠️ Model '{original_model}' error. Menggunakan fallback model."
+                            
+                            yield serialization.dumps({"type": "errorStatus", "payload": msg}) + "\n"
+                            error_status_sent = True
+                            logger.info(f"REQUEST_ID: {request_id} - Sent errorStatus to user (on_chain_end)")
+
+            if prompt_logger is not None:
+                total_input_tokens_stream = prompt_logger.total_tokens
             
             # No need to send final_response separately since fallback will stream normally
             
@@ -370,9 +540,10 @@ class StreamingService:
                 (final_state or {}).get("input_token_count") or
                 total_input_tokens_stream
             )
+            # Fallback: hitung sekali dari respons utuh (bukan per chunk)
             output_total = (
                 (final_state or {}).get("output_token_count") or
-                total_output_tokens_stream
+                (TokenCounter.count_tokens("".join(final_ai_response_chunks)) if final_ai_response_chunks else 0)
             )
             api_calls = (final_state or {}).get("api_call_count", 0)
             # Use model_used from state (includes attempted model on error)
@@ -398,15 +569,16 @@ class StreamingService:
             logger.info(f"  Model:         {model_used}")
             
             # Send clean final_state to user
-            yield json.dumps({
+            result.final_state = {
+                "input_token_count": int(input_total),
+                "output_token_count": int(output_total),
+                "api_call_count": int(api_calls),  # NEW
+                "cost_estimate": round(cost, 6),
+                "model_used": model_used
+            }
+            yield serialization.dumps({
                 "type": "final_state",
-                "payload": {
-                    "input_token_count": int(input_total),
-                    "output_token_count": int(output_total),
-                    "api_call_count": int(api_calls),  # NEW
-                    "cost_estimate": round(cost, 6),
-                    "model_used": model_used
-                }
+                "payload": result.final_state
             }) + "\n"
             
             logger.info(f"REQUEST_ID: {request_id} - Stream finished")
@@ -415,3 +587,13 @@ class StreamingService:
             logger.error(f"Stream error (req_id: {request_id}): {e}", exc_info=True)
             error_payload = StreamError(detail=f"Stream error: {e}", status_code=500)
             yield error_payload.model_dump_json() + "\n"
+        finally:
+            # Ringkasan timing per node (dan lepas trace dari memori)
+            trace_summary = ObservabilityCollector.finalize_request(request_id)
+            if trace_summary:
+                timings = trace_summary.get("node_timings_ms") or {}
+                breakdown = ", ".join(f"{node}={ms:.0f}ms" for node, ms in timings.items())
+                logger.info(
+                    f"⏱️ NODE TIMING [request_id={request_id}] "
+                    f"ttft={trace_summary.get('time_to_first_token_ms')}ms | {breakdown}"
+                )
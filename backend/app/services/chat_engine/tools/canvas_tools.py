@@ -11,6 +11,7 @@ from langchain_core.tools import tool
 from app.db.queries.canvas import block_queries
 from app.db.supabase_client import get_supabase_admin_async_client
 from app.services.redis_rate_limiter import rate_limiter
+from app.services.semantic_response_cache import semantic_response_cache
 # [HAPUS] Hapus impor yang menyebabkan circular dependency
 # from app.core.dependencies import AuthInfoDep
 
@@ -77,6 +78,7 @@ async def create_canvas_block(
         result = await block_queries.execute_mutation_rpc(admin_client, rpc_params)
 
         if result.get("status") == "success":
+            await semantic_response_cache.invalidate_canvas(canvas_id, editor_id=user_id)
             return f"Sukses: Blok '{content[:30]}...' berhasil dibuat di canvas."
         else:
             error_message = result.get('error', 'Gagal menjalankan RPC')
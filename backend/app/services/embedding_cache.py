@@ -0,0 +1,218 @@
+# File: backend/app/services/embedding_cache.py
+# (FILE BARU - Cache embedding berbasis hash konten + coalescing request identik)
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+from app.core.utils import serialization
+from app.core.utils.ttl_cache import TTLCache
+from app.services.redis_rate_limiter import redis_client
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "embedding_cache_lookups_total",
+    "Total lookup cache embedding",
+    ["task_type", "outcome"]  # outcome: 'local' | 'redis' | 'coalesced' | 'miss'
+)
+EMBEDDING_API_SECONDS = Histogram(
+    "embedding_api_call_seconds",
+    "Durasi panggilan API embedding (hanya cache miss)",
+    ["task_type"]
+)
+EMBEDDING_CACHE_SAVED_SECONDS = Counter(
+    "embedding_cache_saved_seconds_total",
+    "Estimasi latensi API embedding yang dihemat oleh cache/coalescing",
+    ["task_type"]
+)
+
+# Bobot EWMA untuk estimasi latensi API (dipakai menghitung latensi yang dihemat)
+_LATENCY_EWMA_ALPHA = 0.2
+
+
+class EmbeddingCache:
+    """
+    Cache embedding 2 tingkat, dikunci oleh sha256(model, task_type, teks):
+    1. In-process TTL/LRU (per worker).
+    2. Redis STRING `embedding:cache:{digest}` (dibagi semua worker).
+
+    `get_or_compute` juga melakukan single-flight: request identik yang
+    datang bersamaan menunggu satu panggilan API yang sama.
+    """
+
+    def __init__(self, local_ttl_seconds: int, redis_ttl_seconds: int, max_size: int):
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._local: TTLCache[List[float]] = TTLCache(max_size=max_size, ttl_seconds=local_ttl_seconds)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._api_latency_ewma: Dict[str, float] = {}
+
+    @staticmethod
+    def make_key(model: str, task_type: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{task_type}\x00{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"embedding:cache:{key}"
+
+    def _record_saved(self, task_type: str, count: int = 1) -> None:
+        estimate = self._api_latency_ewma.get(task_type)
+        if estimate and count:
+            EMBEDDING_CACHE_SAVED_SECONDS.labels(task_type=task_type).inc(estimate * count)
+
+    def _record_api_latency(self, task_type: str, seconds: float) -> None:
+        EMBEDDING_API_SECONDS.labels(task_type=task_type).observe(seconds)
+        previous = self._api_latency_ewma.get(task_type)
+        self._api_latency_ewma[task_type] = (
+            seconds if previous is None
+            else previous + _LATENCY_EWMA_ALPHA * (seconds - previous)
+        )
+
+    async def _get_redis(self, key: str) -> Optional[List[float]]:
+        if redis_client is None:
+            return None
+        try:
+            raw = await redis_client.get(self._redis_key(key))
+            return serialization.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Gagal membaca cache embedding dari Redis: {e}")
+            return None
+
+    async def _set_redis(self, key: str, embedding: List[float]) -> None:
+        if redis_client is None:
+            return
+        try:
+            await redis_client.set(self._redis_key(key), serialization.dumps(embedding), ex=self.redis_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Gagal menulis cache embedding ke Redis: {e}")
+
+    async def get_or_compute(
+        self,
+        model: str,
+        task_type: str,
+        text: str,
+        compute: Callable[[], Awaitable[List[float]]],
+    ) -> List[float]:
+        key = self.make_key(model, task_type, text)
+
+        embedding = self._local.get(key)
+        if embedding is not None:
+            EMBEDDING_CACHE_LOOKUPS.labels(task_type=task_type, outcome="local").inc()
+            self._record_saved(task_type)
+            return embedding
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            EMBEDDING_CACHE_LOOKUPS.labels(task_type=task_type, outcome="coalesced").inc()
+            self._record_saved(task_type)
+        else:
+            # Task terpisah pemilik hasil: pembatalan pemanggil pertama (leader)
+            # tidak membatalkan komputasi yang juga ditunggu pemanggil lain
+            pending = asyncio.create_task(self._resolve(key, task_type, compute))
+            self._in_flight[key] = pending
+            pending.add_done_callback(lambda task: self._finish_in_flight(key, task))
+        # shield: pembatalan satu penunggu tidak membatalkan yang lain
+        return await asyncio.shield(pending)
+
+    def _finish_in_flight(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Hindari warning "Task exception was never retrieved" jika semua penunggu batal
+            task.exception()
+
+    async def _resolve(
+        self,
+        key: str,
+        task_type: str,
+        compute: Callable[[], Awaitable[List[float]]],
+    ) -> List[float]:
+        embedding = await self._get_redis(key)
+        if embedding is not None:
+            EMBEDDING_CACHE_LOOKUPS.labels(task_type=task_type, outcome="redis").inc()
+            self._record_saved(task_type)
+        else:
+            EMBEDDING_CACHE_LOOKUPS.labels(task_type=task_type, outcome="miss").inc()
+            start = time.perf_counter()
+            embedding = await compute()
+            self._record_api_latency(task_type, time.perf_counter() - start)
+            await self._set_redis(key, embedding)
+        self._local.set(key, embedding)
+        return embedding
+
+    async def get_or_compute_many(
+        self,
+        model: str,
+        task_type: str,
+        texts: List[str],
+        compute_many: Callable[[List[str]], Awaitable[List[List[float]]]],
+    ) -> List[List[float]]:
+        """
+        Versi batch: cek lokal, lalu satu MGET Redis, lalu `compute_many`
+        sekali untuk teks unik yang masih miss. Urutan hasil = urutan `texts`.
+        """
+        keys = [self.make_key(model, task_type, text) for text in texts]
+        results: List[Optional[List[float]]] = [self._local.get(key) for key in keys]
+
+        local_hits = sum(1 for r in results if r is not None)
+        if local_hits:
+            EMBEDDING_CACHE_LOOKUPS.labels(task_type=task_type, outcome="local").inc(local_hits)
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing and redis_client is not None:
+            try:
+                raws = await redis_client.mget([self._redis_key(keys[i]) for i in missing])
+                redis_hits = 0
+                for i, raw in zip(missing, raws):
+                    if raw:
+                        results[i] = serialization.loads(raw)
+                        self._local.set(keys[i], results[i])
+                        redis_hits += 1
+                if redis_hits:
+                    EMBEDDING_CACHE_LOOKUPS.labels(task_type=task_type, outcome="redis").inc(redis_hits)
+            except Exception as e:
+                logger.warning(f"Gagal membaca cache embedding (batch) dari Redis: {e}")
+            missing = [i for i in missing if results[i] is None]
+
+        self._record_saved(task_type, len(texts) - len(missing))
+
+        if missing:
+            # Teks identik dalam satu batch cukup di-embed sekali
+            unique: Dict[str, str] = {}
+            for i in missing:
+                unique.setdefault(keys[i], texts[i])
+            EMBEDDING_CACHE_LOOKUPS.labels(task_type=task_type, outcome="miss").inc(len(unique))
+
+            start = time.perf_counter()
+            vectors = await compute_many(list(unique.values()))
+            EMBEDDING_API_SECONDS.labels(task_type=task_type).observe(time.perf_counter() - start)
+
+            computed = dict(zip(unique.keys(), vectors))
+            for key, embedding in computed.items():
+                self._local.set(key, embedding)
+            for i in missing:
+                results[i] = computed[keys[i]]
+
+            if redis_client is not None:
+                try:
+                    async with redis_client.pipeline(transaction=False) as pipe:
+                        for key, embedding in computed.items():
+                            pipe.set(self._redis_key(key), serialization.dumps(embedding), ex=self.redis_ttl_seconds)
+                        await pipe.execute()
+                except Exception as e:
+                    logger.warning(f"Gagal menulis cache embedding (batch) ke Redis: {e}")
+
+        return results
+
+
+# Instance singleton (dibagi semua instance GeminiEmbeddingService)
+embedding_cache = EmbeddingCache(
+    local_ttl_seconds=settings.EMBEDDING_CACHE_LOCAL_TTL_SECONDS,
+    redis_ttl_seconds=settings.EMBEDDING_CACHE_REDIS_TTL_SECONDS,
+    max_size=settings.EMBEDDING_CACHE_MAX_SIZE,
+)
@@ -8,9 +8,13 @@ from typing import List
 from app.core.config import settings
 from app.services.interfaces import IEmbeddingService
 from app.core.exceptions import EmbeddingGenerationError
+from app.services.embedding_cache import embedding_cache
 
 logger = logging.getLogger(__name__)
 
+# Batas jumlah teks per request batchEmbedContents Gemini
+GEMINI_EMBED_BATCH_LIMIT = 100
+
 try:
     if settings.GEMINI_API_KEY:
         genai.configure(api_key=settings.GEMINI_API_KEY)
@@ -35,22 +39,66 @@ class GeminiEmbeddingService(IEmbeddingService):
         """
         [PERBAIKAN] Secara ASINKRON menghasilkan embedding
         menggunakan panggilan 'embed_content_async' native.
+
+        [BARU] Hasil di-cache per (model, task_type, konten) dan request
+        identik yang bersamaan berbagi satu panggilan API (`embedding_cache`).
         """
         if not settings.GEMINI_API_KEY:
             raise EmbeddingGenerationError("GEMINI_API_KEY tidak diatur.")
-        
-        try:
-            # --- PERBAIKAN: Panggil 'embed_content_async' ---
+
+        async def _embed() -> List[float]:
             result = await genai.embed_content_async(
                 model=self.model_name,
                 content=text,
                 task_type=task_type
             )
             return result["embedding"]
-            # ----------------------------------------------
+
+        try:
+            return await embedding_cache.get_or_compute(self.model_name, task_type, text, _embed)
 
         except Exception as e:
             logger.error(f"Gagal menjalankan embedding_service.generate_embedding (async): {e}", exc_info=True)
+            if isinstance(e, EmbeddingGenerationError):
+                raise
+            raise EmbeddingGenerationError(str(e))
+
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        task_type: str = "retrieval_document"
+    ) -> List[List[float]]:
+        """
+        [BARU] Embedding banyak teks sekaligus. Teks yang sudah ada di
+        `embedding_cache` tidak dikirim; sisanya dikirim ke endpoint batch
+        (`content` berupa list) per potongan GEMINI_EMBED_BATCH_LIMIT.
+        """
+        if not texts:
+            return []
+        if not settings.GEMINI_API_KEY:
+            raise EmbeddingGenerationError("GEMINI_API_KEY tidak diatur.")
+
+        async def _embed_many(batch: List[str]) -> List[List[float]]:
+            vectors: List[List[float]] = []
+            for start in range(0, len(batch), GEMINI_EMBED_BATCH_LIMIT):
+                chunk = batch[start:start + GEMINI_EMBED_BATCH_LIMIT]
+                result = await genai.embed_content_async(
+                    model=self.model_name,
+                    content=chunk,
+                    task_type=task_type
+                )
+                vectors.extend(result["embedding"])
+            if len(vectors) != len(batch):
+                raise EmbeddingGenerationError(
+                    f"Jumlah embedding ({len(vectors)}) tidak sesuai jumlah teks ({len(batch)})."
+                )
+            return vectors
+
+        try:
+            return await embedding_cache.get_or_compute_many(self.model_name, task_type, texts, _embed_many)
+
+        except Exception as e:
+            logger.error(f"Gagal menjalankan embedding_service.generate_embeddings (async): {e}", exc_info=True)
             if isinstance(e, EmbeddingGenerationError):
                 raise
             raise EmbeddingGenerationError(str(e))
\ No newline at end of file
@@ -22,6 +22,18 @@ class IEmbeddingService(ABC):
         """
         pass
 
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        task_type: str = "retrieval_document"
+    ) -> List[List[float]]:
+        """
+        Versi batch dari `generate_embedding`; urutan hasil sama dengan `texts`.
+        Implementasi default memanggil `generate_embedding` satu per satu;
+        override jika provider punya endpoint batch.
+        """
+        return [await self.generate_embedding(text, task_type=task_type) for text in texts]
+
 class ILlmService(ABC):
     """Interface untuk layanan generatif LLM dasar (non-tool-calling)."""
     
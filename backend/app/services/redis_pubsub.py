@@ -1,25 +1,110 @@
 # File: backend/app/services/redis_pubsub.py
 # (FILE BARU)
+# [v0.4.4] Satu subscriber bersama per proses (multiplexed), lihat `subscribe`.
 
 import logging
 import asyncio
-import json
-from typing import AsyncGenerator, Dict, Any
+import uuid
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, Any, Iterable, Optional, Set, Union
+from uuid import UUID
 import redis.asyncio as redis
 from redis.asyncio.client import PubSub
+from prometheus_client import Counter, Gauge
 
 from app.core.config import settings #
+from app.core.utils.ttl_cache import TTLCache
+from app.services.broadcast_frame import BroadcastFrame
 
 logger = logging.getLogger(__name__)
 
+# Kebijakan untuk consumer yang lambat (queue lokalnya penuh)
+SLOW_CONSUMER_DROP_OLDEST = "drop_oldest"
+SLOW_CONSUMER_DISCONNECT = "disconnect"
+
+PUBSUB_ACTIVE_CHANNELS = Gauge(
+    "pubsub_active_channels",
+    "Jumlah channel Redis yang sedang di-SUBSCRIBE oleh subscriber bersama"
+)
+PUBSUB_ACTIVE_CONSUMERS = Gauge(
+    "pubsub_active_consumers",
+    "Jumlah consumer lokal (WebSocket/SSE/listener) yang terdaftar"
+)
+PUBSUB_SLOW_CONSUMER_EVENTS = Counter(
+    "pubsub_slow_consumer_events_total",
+    "Pesan yang dibuang / consumer yang diputus karena queue lokal penuh",
+    ["policy"]
+)
+
+PUBSUB_REDIS_PUBLISH_SKIPPED = Counter(
+    "pubsub_redis_publish_skipped_total",
+    "Publish ephemeral yang tidak dikirim ke Redis karena tidak ada subscriber di node lain"
+)
+
+# Sentinel yang dikirim ke queue consumer untuk memutus consumer lambat
+_DISCONNECT = object()
+
+
+@dataclass(eq=False)
+class _Consumer:
+    """Satu consumer lokal dengan queue terbatas miliknya sendiri."""
+    channel: str
+    queue: asyncio.Queue
+    policy: str
+    closed: bool = False
+
+    def deliver(self, message: Any) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(message)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        PUBSUB_SLOW_CONSUMER_EVENTS.labels(policy=self.policy).inc()
+        if self.policy == SLOW_CONSUMER_DISCONNECT:
+            logger.warning(f"Consumer lambat di channel {self.channel} diputus (queue penuh).")
+            self.closed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_DISCONNECT)
+        else:
+            # drop_oldest: buang pesan paling lama, simpan yang terbaru
+            self.queue.get_nowait()
+            self.queue.put_nowait(message)
+
+
 class RedisPubSubManager:
     """
     Mengelola koneksi Redis Pub/Sub untuk real-time broadcast.
+
+    [v0.4.4] Sebelumnya setiap WebSocket/SSE membuat objek PubSub (dan
+    koneksi Redis) sendiri. Sekarang setiap proses hanya punya SATU PubSub:
+    - Channel di-SUBSCRIBE saat consumer pertama masuk dan di-UNSUBSCRIBE
+      saat consumer terakhir keluar (reference count).
+    - Satu task reader mem-parse header frame SEKALI per pesan lalu fan-out
+      `BroadcastFrame` ke queue asyncio milik masing-masing consumer.
+    - Queue consumer dibatasi; consumer lambat ditangani sesuai kebijakan
+      (`drop_oldest` atau `disconnect`).
+
+    [v0.4.4] Publish bersifat hybrid: consumer lokal langsung menerima
+    pesan (tanpa round trip Redis), lalu frame dikirim ke Redis dengan
+    origin (node id) di header untuk node lain. Reader melewati echo dari
+    node ini.
     """
     def __init__(self, redis_url: str):
         self.redis_url = redis_url
         self.publisher = None
         self.subscriber = None
+        self._pubsub: Optional[PubSub] = None
+        self._consumers: Dict[str, Set[_Consumer]] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        # ID unik per proses untuk menandai pesan asal node ini
+        self.node_id = uuid.uuid4().hex
+        # Cache singkat hasil PUBSUB NUMSUB per channel
+        self._numsub_cache: TTLCache[int] = TTLCache(max_size=10000, ttl_seconds=1.0)
 
     async def connect(self):
         """Membangun koneksi publisher dan subscriber."""
@@ -34,8 +119,49 @@ class RedisPubSubManager:
             self.publisher = None
             self.subscriber = None
 
-    async def publish(self, channel: str, message: Dict[str, Any]):
-        """Mem-publish pesan JSON ke channel Redis."""
+    def _deliver_local(self, channel: str, frame: BroadcastFrame):
+        """Fan-out langsung ke consumer di proses ini (tanpa lewat Redis)."""
+        consumers = self._consumers.get(channel)
+        if not consumers:
+            return
+        for consumer in list(consumers):
+            consumer.deliver(frame)
+
+    async def _has_remote_subscribers(self, channel: str) -> bool:
+        """
+        True jika ada node LAIN yang subscribe ke channel ini.
+        Hasil NUMSUB di-cache 1 detik agar tidak menambah round trip per pesan.
+        """
+        total = self._numsub_cache.get(channel)
+        if total is None:
+            try:
+                result = await self.publisher.pubsub_numsub(channel)
+                total = int(result[0][1]) if result else 0
+            except Exception as e:
+                logger.warning(f"Gagal PUBSUB NUMSUB untuk {channel}: {e}")
+                return True
+            self._numsub_cache.set(channel, total)
+        local = 1 if channel in self._consumers else 0
+        return total > local
+
+    async def publish(
+        self,
+        channel: str,
+        message: Dict[str, Any],
+        ephemeral: bool = False,
+        exclude_user_ids: Optional[Iterable[Union[str, UUID]]] = None
+    ):
+        """
+        Men-serialize pesan SEKALI menjadi `BroadcastFrame`, mengirimnya ke
+        consumer lokal, lalu mem-publish frame ke Redis untuk node lain.
+
+        `exclude_user_ids` disimpan di header frame (bukan di payload).
+        `ephemeral=True` (presence/cursor): publish ke Redis dilewati jika
+        tidak ada node lain yang subscribe ke channel ini.
+        """
+        frame = BroadcastFrame.from_message(message, exclude_user_ids, origin=self.node_id)
+        self._deliver_local(channel, frame)
+
         if not self.publisher:
             logger.warning("Publisher Redis tidak terinisialisasi. Mencoba koneksi ulang...")
             await self.connect()
@@ -44,39 +170,171 @@ class RedisPubSubManager:
                 return
 
         try:
-            await self.publisher.publish(channel, json.dumps(message))
+            if ephemeral and not await self._has_remote_subscribers(channel):
+                PUBSUB_REDIS_PUBLISH_SKIPPED.inc()
+                return
+            await self.publisher.publish(channel, frame.encode())
         except Exception as e:
             logger.error(f"Gagal publish ke channel {channel}: {e}", exc_info=True)
 
-    async def subscribe(self, channel: str) -> AsyncGenerator[Dict[str, Any], None]:
+    # --- Subscriber bersama ---
+
+    async def _ensure_reader(self):
+        if self._pubsub is None:
+            self._pubsub = self.subscriber.pubsub()
+        if self._reader_task is None or self._reader_task.done():
+            self._reader_task = asyncio.create_task(self._reader_loop())
+
+    async def _register(self, channel: str, queue_size: int, policy: str) -> _Consumer:
+        consumer = _Consumer(channel=channel, queue=asyncio.Queue(maxsize=queue_size), policy=policy)
+        async with self._lock:
+            await self._ensure_reader()
+            consumers = self._consumers.get(channel)
+            if consumers is None:
+                consumers = self._consumers[channel] = set()
+                await self._pubsub.subscribe(channel)
+                logger.info(f"Berhasil subscribe ke channel: {channel}")
+            consumers.add(consumer)
+            self._update_gauges()
+        return consumer
+
+    async def _unregister(self, consumer: _Consumer):
+        async with self._lock:
+            consumers = self._consumers.get(consumer.channel)
+            if consumers is None:
+                return
+            consumers.discard(consumer)
+            if not consumers:
+                del self._consumers[consumer.channel]
+                try:
+                    if self._pubsub is not None:
+                        await self._pubsub.unsubscribe(consumer.channel)
+                except Exception as e:
+                    logger.warning(f"Gagal unsubscribe dari channel {consumer.channel}: {e}")
+                logger.info(f"Unsubscribe dari channel {consumer.channel} (tidak ada consumer tersisa).")
+            self._update_gauges()
+
+    def _update_gauges(self):
+        PUBSUB_ACTIVE_CHANNELS.set(len(self._consumers))
+        PUBSUB_ACTIVE_CONSUMERS.set(sum(len(c) for c in self._consumers.values()))
+
+    def _dispatch(self, channel: str, raw: Any):
+        consumers = self._consumers.get(channel)
+        if not consumers:
+            return
+        try:
+            frame = BroadcastFrame.decode(raw)
+        except (ValueError, TypeError):
+            logger.warning(f"Menerima frame tidak valid di channel {channel}")
+            return
+        if frame.origin == self.node_id:
+            # Echo dari node ini, consumer lokal sudah menerimanya di publish()
+            return
+        for consumer in list(consumers):
+            consumer.deliver(frame)
+
+    async def _resubscribe(self):
+        """Membuat ulang PubSub setelah koneksi putus dan subscribe ulang semua channel."""
+        async with self._lock:
+            old = self._pubsub
+            self._pubsub = self.subscriber.pubsub()
+            if self._consumers:
+                await self._pubsub.subscribe(*self._consumers.keys())
+        if old is not None:
+            try:
+                await old.close()
+            except Exception:
+                pass
+
+    async def _reader_loop(self):
+        """Satu-satunya pembaca pesan Redis Pub/Sub di proses ini."""
+        while True:
+            try:
+                if not self._consumers:
+                    await asyncio.sleep(0.1)
+                    continue
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None or message.get("type") != "message":
+                    continue
+                channel = message.get("channel")
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8")
+                self._dispatch(channel, message.get("data", b""))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error di reader Pub/Sub bersama: {e}", exc_info=True)
+                await asyncio.sleep(1.0)
+                try:
+                    await self._resubscribe()
+                except Exception as re:
+                    logger.error(f"Gagal subscribe ulang channel Pub/Sub: {re}")
+
+    async def subscribe_frames(
+        self,
+        channel: str,
+        queue_size: Optional[int] = None,
+        slow_consumer_policy: Optional[str] = None,
+    ) -> AsyncGenerator[BroadcastFrame, None]:
         """
-        Men-subscribe ke channel dan menghasilkan (yield) pesan yang masuk.
+        Men-subscribe ke channel dan menghasilkan (yield) `BroadcastFrame`.
+
+        Dipakai oleh consumer yang meneruskan payload apa adanya (WebSocket
+        canvas) sehingga tidak perlu decode/encode JSON per socket.
+        Generator berhenti jika consumer diputus karena terlalu lambat.
         """
         if not self.subscriber:
             logger.error("Subscriber Redis tidak ada. Tidak bisa subscribe.")
             return
 
-        pubsub: PubSub = self.subscriber.pubsub()
-        await pubsub.subscribe(channel)
-        
-        logger.info(f"Berhasil subscribe ke channel: {channel}")
-        
+        consumer = await self._register(
+            channel,
+            queue_size or settings.PUBSUB_CONSUMER_QUEUE_SIZE,
+            slow_consumer_policy or settings.PUBSUB_SLOW_CONSUMER_POLICY,
+        )
         try:
-            async for message in pubsub.listen():
-                if message.get("type") == "message":
-                    try:
-                        data = json.loads(message.get("data", "{}"))
-                        yield data
-                    except json.JSONDecodeError:
-                        logger.warning(f"Menerima pesan non-JSON di channel {channel}")
+            while True:
+                message = await consumer.queue.get()
+                if message is _DISCONNECT:
+                    break
+                yield message
         except asyncio.CancelledError:
             logger.info(f"Unsubscribing dari channel {channel} (CancelledError)")
-        except Exception as e:
-            logger.error(f"Error saat listening ke channel {channel}: {e}", exc_info=True)
         finally:
-            logger.info(f"Proses subscribe ke {channel} berhenti.")
-            await pubsub.unsubscribe(channel)
-            await pubsub.close()
+            logger.debug(f"Consumer channel {channel} berhenti.")
+            await self._unregister(consumer)
+
+    async def subscribe(
+        self,
+        channel: str,
+        queue_size: Optional[int] = None,
+        slow_consumer_policy: Optional[str] = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Men-subscribe ke channel dan menghasilkan (yield) pesan sebagai dict.
+
+        Payload di-decode sekali per frame; dict yang di-yield DIBAGI dengan
+        consumer lain di channel yang sama, jadi TIDAK boleh dimodifikasi.
+        """
+        async for frame in self.subscribe_frames(channel, queue_size, slow_consumer_policy):
+            yield frame.data
+
+    async def close(self):
+        if self._reader_task and not self._reader_task.done():
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+        self._reader_task = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+        self._consumers.clear()
+        self._update_gauges()
 
 # Buat instance singleton untuk digunakan di seluruh aplikasi
 redis_pubsub_manager = RedisPubSubManager(settings.REDIS_URL)
@@ -86,8 +344,9 @@ async def connect_redis_pubsub():
     await redis_pubsub_manager.connect()
 
 async def disconnect_redis_pubsub():
+    await redis_pubsub_manager.close()
     if redis_pubsub_manager.publisher:
         await redis_pubsub_manager.publisher.close()
     if redis_pubsub_manager.subscriber:
         await redis_pubsub_manager.subscriber.close()
-    logger.info("Koneksi Redis Pub/Sub ditutup.")
\ No newline at end of file
+    logger.info("Koneksi Redis Pub/Sub ditutup.")
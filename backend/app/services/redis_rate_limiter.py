@@ -76,9 +76,10 @@ class RedisRateLimiter:
             logger.error(f"Error getting keys from Redis: {e}", exc_info=True)
             return []
 
-    async def _is_allowed(self, key: str, limit: int, period_seconds: int) -> Tuple[bool, int]:
+    async def _is_allowed(self, key: str, limit: int, period_seconds: int, cost: int = 1) -> Tuple[bool, int]:
         """
         Logika inti rate limiting (algoritma sliding window log).
+        `cost` > 1 mencatat beberapa entri sekaligus (mis. satu pesan berisi N op).
         """
         if not self.redis_available:
             return True, 0 # Gagal terbuka (fail-open) jika Redis mati
@@ -92,7 +93,10 @@ class RedisRateLimiter:
                 # 1. Hapus log lama (di luar jendela waktu)
                 pipe.zremrangebyscore(key, 0, window_start)
                 # 2. Tambahkan log saat ini
-                pipe.zadd(key, {str(now): now})
+                if cost == 1:
+                    pipe.zadd(key, {str(now): now})
+                else:
+                    pipe.zadd(key, {f"{now}:{i}": now for i in range(cost)})
                 # 3. Hitung jumlah log dalam jendela
                 pipe.zcard(key)
                 # 4. Set kadaluwarsa (expire) untuk key
@@ -126,6 +130,20 @@ class RedisRateLimiter:
         allowed, _ = await self._is_allowed(key, 100, 600)
         return allowed
 
+    async def check_socket_limit(self, user_id: UUID, cost: int = 1) -> bool:
+        """
+        Limit pesan WebSocket canvas, dihitung per op: 'mutation_batch'
+        berisi N op dikenai biaya N (bukan 1 per pesan).
+        """
+        key = f"limit:socket:{str(user_id)}"
+        allowed, _ = await self._is_allowed(
+            key,
+            settings.CANVAS_WS_RATE_LIMIT_OPS,
+            settings.CANVAS_WS_RATE_LIMIT_WINDOW_SECONDS,
+            cost=max(1, cost)
+        )
+        return allowed
+
     async def check_invite_limit(self, user_id: UUID) -> bool:
         """Limit undangan (5 undangan per jam)."""
         key = f"limit:invite:{str(user_id)}"
@@ -10,6 +10,7 @@ from app.db.queries.schedule_queries import create_schedule_legacy
 from app.db.queries.block_queries.create_block_and_embedding import create_block_and_embedding
 # -----------------------------------
 from app.services.audit_service import log_action
+from app.services.semantic_response_cache import semantic_response_cache
 # --- PERBAIKAN: Impor AsyncClient dan EmbeddingService ---
 from supabase.client import AsyncClient
 from app.services.interfaces import IEmbeddingService
@@ -75,5 +76,6 @@ async def create_schedule_from_ai(
             )
             # 'log_action' sudah async
             await log_action(creator_id, "schedule.create", {"schedule_id": new_schedule['schedule_id']})
+            await semantic_response_cache.invalidate_user(creator_id)
             return new_schedule
     return None
\ No newline at end of file
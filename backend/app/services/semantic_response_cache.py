@@ -0,0 +1,305 @@
+# File: backend/app/services/semantic_response_cache.py
+# (FILE BARU - Cache respons semantik di depan agent_node)
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from uuid import UUID, uuid4
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+from app.core.utils.ttl_cache import TTLCache
+from app.db.queries.canvas.canvas_member_queries import list_canvas_user_ids_db
+from app.db.supabase_client import get_supabase_admin_async_client
+from app.services.redis_rate_limiter import redis_client
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    "chat_semantic_cache_lookups_total",
+    "Total lookup cache respons semantik",
+    ["intent", "outcome"]  # outcome: 'hit' | 'miss' | 'error'
+)
+SEMANTIC_CACHE_LOOKUP_SECONDS = Histogram(
+    "chat_semantic_cache_lookup_seconds",
+    "Durasi vector range query cache respons semantik"
+)
+
+# v2: skema menambah tag `context` (index/prefix lama habis sendiri oleh TTL)
+_INDEX_NAME = "chat_semantic_cache_v2"
+_KEY_PREFIX = "chat:semcache:v2:entry"
+
+
+@dataclass
+class CachedResponse:
+    response: str
+    model: str
+    distance: float
+
+
+class SemanticResponseCache:
+    """
+    Cache respons LLM per user, dicari berdasarkan kemiripan embedding
+    kueri (pesan user untuk 'simple_chat', `rag_query` untuk 'rag_query')
+    dan dibatasi oleh sidik `context` percakapan (lihat
+    nodes/semantic_cache.py) agar pertanyaan lanjutan tidak mendapat
+    jawaban dari percakapan lain.
+
+    - Index vektor RediSearch via redisvl (penyimpanan JSON), dibuat lazy.
+    - TTL per intent; intent lain (mis. 'agentic_request') tidak di-cache
+      karena punya efek samping tool.
+    - Invalidasi per user memakai counter generasi
+      `chat:semcache:gen:{user_id}`: entri menyimpan generasinya dan lookup
+      hanya mencocokkan generasi saat ini, sehingga invalidasi cukup satu
+      INCR (entri lama habis sendiri oleh TTL). Perubahan canvas
+      menaikkan generasi semua user yang dapat membaca canvas tersebut.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        vector_dims: int,
+        distance_threshold: float,
+        intent_ttls: Dict[str, int],
+        canvas_members_ttl_seconds: float,
+    ):
+        self.enabled = enabled and redis_client is not None
+        self.vector_dims = vector_dims
+        self.distance_threshold = distance_threshold
+        self.intent_ttls = intent_ttls
+        self._index = None
+        self._index_lock = asyncio.Lock()
+        self._pending_writes: Set[asyncio.Task] = set()
+        # Mutasi canvas beruntun tidak perlu query anggota canvas setiap kali
+        self._canvas_members: TTLCache[List[str]] = TTLCache(
+            max_size=10000, ttl_seconds=canvas_members_ttl_seconds
+        )
+
+    def is_cacheable(self, intent: Optional[str]) -> bool:
+        return self.enabled and intent in self.intent_ttls
+
+    @staticmethod
+    def _generation_key(user_id: Union[str, UUID]) -> str:
+        return f"chat:semcache:gen:{user_id}"
+
+    async def _get_index(self):
+        if self._index is not None:
+            return self._index
+        async with self._index_lock:
+            if self._index is None:
+                from redisvl.index import AsyncSearchIndex
+                from redisvl.schema import IndexSchema
+
+                schema = IndexSchema.from_dict({
+                    "index": {"name": _INDEX_NAME, "prefix": _KEY_PREFIX, "storage_type": "json"},
+                    "fields": [
+                        {"name": "user_id", "type": "tag"},
+                        {"name": "intent", "type": "tag"},
+                        {"name": "model", "type": "tag"},
+                        {"name": "generation", "type": "tag"},
+                        {"name": "context", "type": "tag"},
+                        {"name": "response", "type": "text"},
+                        {
+                            "name": "embedding",
+                            "type": "vector",
+                            "attrs": {
+                                "dims": self.vector_dims,
+                                "distance_metric": "cosine",
+                                "algorithm": "hnsw",
+                                "datatype": "float32",
+                            },
+                        },
+                    ],
+                })
+                index = AsyncSearchIndex(schema, redis_client=redis_client)
+                await index.create(overwrite=False)
+                self._index = index
+                logger.info(f"Index cache respons semantik '{_INDEX_NAME}' siap.")
+        return self._index
+
+    async def _current_generation(self, user_id: Union[str, UUID]) -> str:
+        return str(await redis_client.get(self._generation_key(user_id)) or 0)
+
+    async def lookup(
+        self,
+        user_id: Union[str, UUID],
+        intent: str,
+        model: str,
+        context: str,
+        embedding: List[float],
+    ) -> Tuple[Optional[CachedResponse], Optional[str]]:
+        """
+        Mengembalikan (respons ter-cache terdekat <= distance_threshold atau
+        None, generasi user saat lookup). Generasi diteruskan ke `store` agar
+        respons yang dihasilkan saat invalidasi terjadi tidak tersimpan
+        sebagai generasi baru.
+        """
+        if not self.is_cacheable(intent):
+            return None, None
+
+        from redisvl.query import VectorRangeQuery
+        from redisvl.query.filter import Tag
+
+        start = time.perf_counter()
+        generation = None
+        try:
+            index = await self._get_index()
+            generation = await self._current_generation(user_id)
+            query = VectorRangeQuery(
+                vector=embedding,
+                vector_field_name="embedding",
+                return_fields=["response", "model"],
+                distance_threshold=self.distance_threshold,
+                num_results=1,
+                filter_expression=(
+                    (Tag("user_id") == str(user_id))
+                    & (Tag("intent") == intent)
+                    & (Tag("model") == model)
+                    & (Tag("generation") == generation)
+                    & (Tag("context") == context)
+                ),
+            )
+            results = await index.query(query)
+        except Exception as e:
+            logger.warning(f"Lookup cache respons semantik gagal (diabaikan): {e}")
+            SEMANTIC_CACHE_LOOKUPS.labels(intent=intent, outcome="error").inc()
+            return None, generation
+        finally:
+            SEMANTIC_CACHE_LOOKUP_SECONDS.observe(time.perf_counter() - start)
+
+        if not results:
+            SEMANTIC_CACHE_LOOKUPS.labels(intent=intent, outcome="miss").inc()
+            return None, generation
+
+        SEMANTIC_CACHE_LOOKUPS.labels(intent=intent, outcome="hit").inc()
+        best = results[0]
+        return CachedResponse(
+            response=best["response"],
+            model=best.get("model") or model,
+            distance=float(best.get("vector_distance", 0.0)),
+        ), generation
+
+    async def store(
+        self,
+        user_id: Union[str, UUID],
+        intent: str,
+        model: str,
+        context: str,
+        embedding: List[float],
+        response: str,
+        generation: str,
+    ) -> None:
+        if not self.is_cacheable(intent) or not response:
+            return
+        try:
+            index = await self._get_index()
+            await index.load(
+                [{
+                    "user_id": str(user_id),
+                    "intent": intent,
+                    "model": model,
+                    "generation": generation,
+                    "context": context,
+                    "response": response,
+                    "embedding": embedding,
+                }],
+                keys=[f"{_KEY_PREFIX}:{user_id}:{uuid4().hex}"],
+                ttl=self.intent_ttls[intent],
+            )
+        except Exception as e:
+            logger.warning(f"Gagal menyimpan cache respons semantik: {e}")
+
+    def schedule_store(
+        self,
+        user_id: Union[str, UUID],
+        intent: str,
+        model: str,
+        context: str,
+        embedding: List[float],
+        response: str,
+        generation: str,
+    ) -> None:
+        """Menyimpan di background agar tidak menunda akhir stream."""
+        if not self.is_cacheable(intent):
+            return
+        task = asyncio.create_task(self.store(user_id, intent, model, context, embedding, response, generation))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def invalidate_users(self, user_ids: Iterable[Union[str, UUID]]) -> None:
+        """
+        Membuang semua respons ter-cache milik user-user ini. Setiap
+        perubahan langsung menaikkan generasi (tanpa debounce: INCR yang
+        terlewat berarti jawaban basi sampai TTL).
+        """
+        if not self.enabled:
+            return
+        keys = {self._generation_key(user_id) for user_id in user_ids}
+        if not keys:
+            return
+        try:
+            # Tanpa TTL: jika counter hilang lalu dibuat ulang, generasi lama
+            # yang entrinya masih hidup bisa cocok kembali.
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(key)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Gagal invalidasi cache respons semantik untuk {len(keys)} user: {e}")
+
+    async def invalidate_user(self, user_id: Union[str, UUID]) -> None:
+        """Dipanggil setelah data pribadi user (mis. jadwal) berubah."""
+        await self.invalidate_users([user_id])
+
+    async def canvas_user_ids(self, canvas_id: Union[str, UUID]) -> List[str]:
+        """User yang dapat membaca canvas (di-cache singkat). [] jika gagal."""
+        if not self.enabled:
+            return []
+        key = str(canvas_id)
+        user_ids = self._canvas_members.get(key)
+        if user_ids is not None:
+            return user_ids
+        try:
+            admin_client = await get_supabase_admin_async_client()
+            user_ids = await list_canvas_user_ids_db(admin_client, canvas_id)
+        except Exception as e:
+            logger.warning(f"Gagal mengambil anggota canvas {canvas_id} untuk invalidasi cache: {e}")
+            return []
+        self._canvas_members.set(key, user_ids)
+        return user_ids
+
+    async def invalidate_canvas(
+        self,
+        canvas_id: Union[str, UUID],
+        editor_id: Optional[Union[str, UUID]] = None,
+        user_ids: Optional[Iterable[Union[str, UUID]]] = None,
+    ) -> None:
+        """
+        Membuang respons ter-cache semua user yang dapat membaca canvas
+        (jawaban RAG mereka bisa memuat isi canvas ini). `editor_id` selalu
+        ikut diinvalidasi walaupun daftar anggota gagal diambil. `user_ids`
+        dipakai jika daftar anggota sudah diambil sebelumnya (mis. sebelum
+        canvas dihapus).
+        """
+        if not self.enabled:
+            return
+        targets = set(user_ids) if user_ids is not None else set(await self.canvas_user_ids(canvas_id))
+        if editor_id is not None:
+            targets.add(str(editor_id))
+        await self.invalidate_users(targets)
+
+
+# Instance singleton
+semantic_response_cache = SemanticResponseCache(
+    enabled=settings.CHAT_SEMANTIC_CACHE_ENABLED,
+    vector_dims=settings.CHAT_SEMANTIC_CACHE_VECTOR_DIMS,
+    distance_threshold=settings.CHAT_SEMANTIC_CACHE_DISTANCE_THRESHOLD,
+    intent_ttls={
+        "simple_chat": settings.CHAT_SEMANTIC_CACHE_TTL_SIMPLE_CHAT_SECONDS,
+        "rag_query": settings.CHAT_SEMANTIC_CACHE_TTL_RAG_QUERY_SECONDS,
+    },
+    canvas_members_ttl_seconds=settings.CHAT_SEMANTIC_CACHE_CANVAS_MEMBERS_TTL_SECONDS,
+)
@@ -0,0 +1,140 @@
+# File: backend/app/services/user/profile_cache.py
+# (FILE BARU - Cache 2-tier untuk profil `users` pada setiap request terotentikasi)
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Union
+from uuid import UUID
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.core.utils.ttl_cache import TTLCache
+from app.services.redis_pubsub import redis_pubsub_manager
+from app.services.redis_rate_limiter import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Channel Pub/Sub untuk invalidasi lintas worker
+PROFILE_INVALIDATION_CHANNEL = "user_profile:invalidate"
+
+# Metrik Prometheus
+USER_PROFILE_CACHE_HITS = Counter(
+    "user_profile_cache_hits_total",
+    "Total cache hit profil user",
+    ["layer"]  # 'local' | 'redis'
+)
+USER_PROFILE_CACHE_MISSES = Counter(
+    "user_profile_cache_misses_total",
+    "Total cache miss profil user (harus query ke tabel users)"
+)
+
+
+class UserProfileCache:
+    """
+    Cache profil user 2 tingkat:
+    1. In-process TTL/LRU (paling cepat, per worker).
+    2. Redis HASH `user:profile:{user_id}` (dibagi semua worker).
+
+    Invalidasi dikirim via `redis_pubsub_manager` agar cache lokal di
+    semua worker ikut dibuang saat profil / subscription tier berubah.
+    """
+
+    def __init__(
+        self,
+        local_ttl_seconds: int,
+        redis_ttl_seconds: int,
+        max_size: int,
+    ):
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._local: TTLCache[Dict[str, Any]] = TTLCache(max_size=max_size, ttl_seconds=local_ttl_seconds)
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _redis_key(user_id: str) -> str:
+        return f"user:profile:{user_id}"
+
+    async def get(self, user_id: Union[str, UUID]) -> Optional[Dict[str, Any]]:
+        user_id = str(user_id)
+
+        profile = self._local.get(user_id)
+        if profile is not None:
+            USER_PROFILE_CACHE_HITS.labels(layer="local").inc()
+            return profile
+
+        if redis_client is not None:
+            try:
+                raw = await redis_client.hgetall(self._redis_key(user_id))
+                if raw:
+                    profile = {field: json.loads(value) for field, value in raw.items()}
+                    self._local.set(user_id, profile)
+                    USER_PROFILE_CACHE_HITS.labels(layer="redis").inc()
+                    return profile
+            except Exception as e:
+                logger.warning(f"Gagal membaca cache profil dari Redis untuk {user_id}: {e}")
+
+        USER_PROFILE_CACHE_MISSES.inc()
+        return None
+
+    async def set(self, user_id: Union[str, UUID], profile: Dict[str, Any]) -> None:
+        user_id = str(user_id)
+        self._local.set(user_id, profile)
+
+        if redis_client is None:
+            return
+        try:
+            key = self._redis_key(user_id)
+            mapping = {field: json.dumps(value, default=str) for field, value in profile.items()}
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.redis_ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Gagal menulis cache profil ke Redis untuk {user_id}: {e}")
+
+    async def invalidate(self, user_id: Union[str, UUID]) -> None:
+        """
+        Dipanggil setiap kali profil atau subscription tier user berubah.
+        Menghapus entri Redis dan memberi tahu semua worker via Pub/Sub.
+        """
+        user_id = str(user_id)
+        self._local.pop(user_id)
+        if redis_client is not None:
+            try:
+                await redis_client.delete(self._redis_key(user_id))
+            except Exception as e:
+                logger.warning(f"Gagal menghapus cache profil Redis untuk {user_id}: {e}")
+        await redis_pubsub_manager.publish(PROFILE_INVALIDATION_CHANNEL, {"user_id": user_id})
+
+    # --- Listener invalidasi (per worker) ---
+
+    async def _invalidation_listener(self):
+        async for message in redis_pubsub_manager.subscribe(PROFILE_INVALIDATION_CHANNEL):
+            user_id = message.get("user_id")
+            if user_id:
+                self._local.pop(user_id)
+                logger.debug(f"Cache profil lokal di-invalidate untuk user {user_id}")
+
+    def start_invalidation_listener(self):
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._invalidation_listener())
+            logger.info("Listener invalidasi cache profil user dimulai.")
+
+    async def stop_invalidation_listener(self):
+        if self._listener_task and not self._listener_task.done():
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+        self._listener_task = None
+
+
+# Instance singleton
+user_profile_cache = UserProfileCache(
+    local_ttl_seconds=settings.USER_PROFILE_CACHE_LOCAL_TTL_SECONDS,
+    redis_ttl_seconds=settings.USER_PROFILE_CACHE_REDIS_TTL_SECONDS,
+    max_size=settings.USER_PROFILE_CACHE_MAX_SIZE,
+)
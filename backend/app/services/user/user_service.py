@@ -8,6 +8,7 @@ from typing import Dict, Any, Optional
 from supabase.client import AsyncClient
 from app.models.user import User, UserUpdate
 from app.core.exceptions import DatabaseError, NotFoundError
+from app.services.user.profile_cache import user_profile_cache
 # (Kita tidak lagi membutuhkan get_supabase_client di sini)
 
 logger = logging.getLogger(__name__)
@@ -97,6 +98,8 @@ class UserService:
         try:
             # --- PERBAIKAN: Hapus 'asyncio.to_thread' ---
             updated_user_data = await self._async_db_calls(auth_kwargs, public_payload)
+            # [BARU] Buang cache profil di semua worker
+            await user_profile_cache.invalidate(self.user.id)
             logger.info(f"Profil untuk user {self.user.id} berhasil diperbarui.")
             return updated_user_data
 
@@ -21,6 +21,7 @@ from app.models.workspace import (
     PaginatedWorkspaceListResponse
 )
 from app.core.exceptions import DatabaseError, NotFoundError
+from app.services.access_cache import access_cache
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +47,8 @@ class WorkspaceService:
                 user_id=self.user.id, 
                 role=MemberRole.admin
             )
+            # [BARU] Buang keputusan 'bukan anggota' yang mungkin ter-cache
+            await access_cache.invalidate_workspace_member(new_workspace["workspace_id"], self.user.id)
         # ---------------------------------------------
         return new_workspace
 
@@ -97,6 +100,10 @@ class WorkspaceService:
     async def delete_workspace(self, workspace_id: UUID) -> bool:
         """(Async Native) Menghapus workspace."""
         # --- PERBAIKAN: Panggilan 'await' langsung ---
-        return await delete_workspace(
+        deleted = await delete_workspace(
             self.client, workspace_id, self.user.id
-        )
\ No newline at end of file
+        )
+        if deleted:
+            # [BARU] Keanggotaan semua user di workspace ini tidak berlaku lagi
+            await access_cache.invalidate_workspace_member(workspace_id)
+        return deleted
\ No newline at end of file
@@ -5,12 +5,12 @@ import asyncio
 import logging
 from typing import Dict, Any, List
 from uuid import UUID
-import json
 
 import redis.asyncio as redis
 
 from app.core.config import settings #
 from app.db.supabase_client import get_supabase_admin_async_client
+from app.workers.embedding import push_embedding_job
 
 logger = logging.getLogger(__name__)
 
@@ -91,14 +91,13 @@ class CleanupWorker:
                     .eq("queue_id", job_id) \
                     .execute()
                 
-                await self.redis_client.lpush(
-                    "embedding_jobs",
-                    json.dumps({
-                        "job_id": str(job_id),
-                        "entity_id": job["fk_id"],
-                        "table_destination": job["table_destination"]
-                    })
-                )
+                await push_embedding_job(self.redis_client, {
+                    "job_id": str(job_id),
+                    "entity_id": job["fk_id"],
+                    "table_destination": job["table_destination"],
+                    # Kunci penjadwalan adil di worker embedding
+                    "user_id": job.get("user_id")
+                })
                 logger.info(f"Retrying embedding job {job_id}")
             
             if failed_jobs:
@@ -2,20 +2,26 @@
 # (DIREFACTOR - Implementasi Circuit Breaker & Logika Job Penuh)
 
 import asyncio
+import contextlib
+import hashlib
 import json
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional, Tuple, Union
 from uuid import UUID
 
 import redis.asyncio as redis
 import pybreaker # <-- [BARU] Impor Circuit Breaker
 from supabase.client import AsyncClient
 from postgrest import APIResponse
+from prometheus_client import Gauge, Histogram
 
 from app.services.embedding_service import GeminiEmbeddingService #
 from app.db.supabase_client import get_supabase_admin_async_client
 from app.core.config import settings #
-from app.core.exceptions import DatabaseError
+from app.core.exceptions import DatabaseError, NotFoundError
+from app.db.queries.canvas import block_queries
+from app.core.utils.fair_queue import FairQueue
 
 logger = logging.getLogger(__name__)
 
@@ -30,15 +36,132 @@ gemini_breaker = pybreaker.CircuitBreaker(
     reset_timeout=reset_timeout
 )
 
+# Antrian adil di Redis: satu list per kunci fairness (canvas/user) dan satu
+# list "ready" berisi kunci yang punya job, dipakai sebagai ring round-robin.
+# Invarian (dijaga skrip Lua): kunci ada di ready <=> list-nya tidak kosong.
+EMBEDDING_QUEUE_PREFIX = "embedding_jobs:q:"
+EMBEDDING_READY_KEY = "embedding_jobs:ready"
+EMBEDDING_PENDING_KEY = "embedding_jobs:pending"   # counter total job menunggu
+# List tunggal lama: masih dikuras agar job sebelum migrasi tetap diproses
+EMBEDDING_JOBS_KEY = "embedding_jobs"
+
+# KEYS: list kunci, ready, pending | ARGV: job, kunci fairness, 'LPUSH' (baru) / 'RPUSH' (kembali ke depan)
+_PUSH_JOB_SCRIPT = """
+if redis.call(ARGV[3], KEYS[1], ARGV[1]) == 1 then
+  redis.call('LPUSH', KEYS[2], ARGV[2])
+end
+redis.call('INCR', KEYS[3])
+"""
+
+# Ambil hingga ARGV[2] job, satu job per kunci per putaran ring. Kunci yang
+# masih punya job dikembalikan ke ujung ring.
+# KEYS: ready, pending | ARGV: prefix list kunci, limit
+# Butuh Redis single-node: nama list per kunci dibentuk di dalam skrip
+# (ARGV[1] .. key), tidak dideklarasikan di KEYS, sehingga tidak valid di
+# Redis Cluster.
+_POP_FAIR_SCRIPT = """
+local jobs = {}
+local limit = tonumber(ARGV[2])
+while #jobs < limit do
+  local key = redis.call('RPOP', KEYS[1])
+  if not key then break end
+  local queue_key = ARGV[1] .. key
+  local job = redis.call('RPOP', queue_key)
+  if job then jobs[#jobs + 1] = job end
+  if redis.call('LLEN', queue_key) > 0 then
+    redis.call('LPUSH', KEYS[1], key)
+  end
+end
+if #jobs > 0 then
+  redis.call('DECRBY', KEYS[2], #jobs)
+end
+return jobs
+"""
+
+EMBEDDING_QUEUE_DEPTH = Gauge(
+    "embedding_queue_depth",
+    "Jumlah job embedding yang menunggu",
+    ["queue"]  # 'redis' (list embedding_jobs) | 'local' (sudah diambil, menunggu consumer)
+)
+EMBEDDING_PROVIDER_IN_FLIGHT = Gauge(
+    "embedding_provider_in_flight",
+    "Jumlah panggilan provider embedding yang sedang berjalan"
+)
+EMBEDDING_JOB_SECONDS = Histogram(
+    "embedding_job_duration_seconds",
+    "Latensi per job embedding",
+    ["stage"]  # 'wait' (antri lokal) | 'process' (diproses consumer)
+)
+
+
+def content_hash(content: Any) -> str:
+    """Hash konten yang dinormalisasi (spasi berlebih tidak dianggap perubahan)."""
+    normalized = " ".join(str(content or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def embedding_content_hash_key(block_id: Union[str, UUID]) -> str:
+    """Hash konten yang vektornya terakhir ditulis worker (dedup di debouncer)."""
+    return f"embedding:content_hash:{block_id}"
+
+
+def _fairness_key(job_info: Dict[str, Any]) -> str:
+    """Kunci penjadwalan adil: canvas, lalu user; job lama tanpa keduanya berbagi satu antrian."""
+    return str(job_info.get("canvas_id") or job_info.get("user_id") or "_default")
+
+
+def push_embedding_job(client, job_info: Dict[str, Any], front: bool = False):
+    """
+    Mengantrikan satu job ke list kunci fairness-nya (dan ke ring ready jika
+    list itu sebelumnya kosong). `client` boleh klien Redis (hasilnya
+    di-await) atau pipeline. `front=True` mengembalikan job ke depan antrian.
+    """
+    key = _fairness_key(job_info)
+    return client.eval(
+        _PUSH_JOB_SCRIPT, 3,
+        EMBEDDING_QUEUE_PREFIX + key, EMBEDDING_READY_KEY, EMBEDDING_PENDING_KEY,
+        json.dumps(job_info), key, "RPUSH" if front else "LPUSH"
+    )
+
+
 class EmbeddingWorker:
     """
     Worker untuk menangani proses embedding dengan Circuit Breaker.
     (Lifecycle diperbaiki, Logika Job Penuh)
+
+    [BARU] Mode batch (EMBEDDING_WORKER_BATCH_MAX_JOBS > 1): mengambil hingga
+    N job atau menunggu hingga T ms, lalu 1 query konten, 1 panggilan batch
+    embedding, 1 RPC tulis vektor dan update status job secara bulk.
+
+    [BARU] Pool: satu dispatcher memindahkan job dari Redis ke `FairQueue`
+    lokal (round-robin per canvas/user), lalu EMBEDDING_WORKER_CONCURRENCY
+    consumer memprosesnya paralel. Giliran antar canvas sudah berlaku di
+    sumbernya (list per canvas + ring ready di Redis, lihat
+    `push_embedding_job`), sehingga canvas dengan ribuan job tidak menahan
+    canvas lain di belakangnya di Redis, bukan hanya di jendela prefetch. Panggilan provider dibatasi semaphore
+    EMBEDDING_WORKER_MAX_IN_FLIGHT; `gemini_breaker` dipakai bersama.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        batch_max_jobs: Optional[int] = None,
+        batch_wait_ms: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        max_in_flight: Optional[int] = None
+    ):
         self.redis_client = redis.from_url(settings.REDIS_URL)
         self.embedding_service = GeminiEmbeddingService()
+        self.batch_max_jobs = batch_max_jobs or settings.EMBEDDING_WORKER_BATCH_MAX_JOBS
+        self.batch_wait_ms = settings.EMBEDDING_WORKER_BATCH_WAIT_MS if batch_wait_ms is None else batch_wait_ms
+        self.concurrency = concurrency or settings.EMBEDDING_WORKER_CONCURRENCY
+        self.poll_interval_seconds = settings.EMBEDDING_WORKER_POLL_INTERVAL_MS / 1000
+        self._pop_fair = self.redis_client.register_script(_POP_FAIR_SCRIPT)
+        self._provider_semaphore = asyncio.Semaphore(max_in_flight or settings.EMBEDDING_WORKER_MAX_IN_FLIGHT)
+        # Job lokal maksimum: cukup untuk satu batch per consumer + satu batch cadangan
+        self.prefetch = self.batch_max_jobs * (self.concurrency + 1)
+        self._queue: FairQueue[Tuple[float, Dict[str, Any]]] = FairQueue()
+        # Job yang sedang dipegang tiap consumer (sudah keluar dari `_queue`)
+        self._in_hand: Dict[int, List[Dict[str, Any]]] = {}
         self.running = False
         self.task: Optional[asyncio.Task] = None
     
@@ -62,11 +185,10 @@ class EmbeddingWorker:
         except Exception as e:
             logger.error(f"FATAL: Gagal update status job {job_id}: {e}", exc_info=True)
 
-    @gemini_breaker
     async def _call_embedding_service(self, text: str) -> Optional[list[float]]:
         """
         [BARU] Wrapper untuk memanggil service embedding.
-        Wrapper @gemini_breaker akan melempar CircuitBreakerError jika sirkuit terbuka.
+        gemini_breaker akan melempar CircuitBreakerError jika sirkuit terbuka.
         """
         if not text or text.isspace():
             logger.debug("Teks kosong, embedding dilewati.")
@@ -74,10 +196,32 @@ class EmbeddingWorker:
             
         # Panggil service (text-embedding-004)
         # task_type 'retrieval_document' untuk menyimpan ke DB
-        return await self.embedding_service.generate_embedding(
-            text,
-            task_type="retrieval_document" 
-        )
+        # `calling()` (bukan dekorator) agar kegagalan coroutine ikut dihitung
+        async with self._provider_slot():
+            with gemini_breaker.calling():
+                return await self.embedding_service.generate_embedding(
+                    text,
+                    task_type="retrieval_document" 
+                )
+
+    async def _call_embedding_service_batch(self, texts: List[str]) -> List[list[float]]:
+        """Satu panggilan batch = satu percobaan bagi gemini_breaker."""
+        async with self._provider_slot():
+            with gemini_breaker.calling():
+                return await self.embedding_service.generate_embeddings(
+                    texts,
+                    task_type="retrieval_document"
+                )
+
+    @contextlib.asynccontextmanager
+    async def _provider_slot(self):
+        """Membatasi jumlah panggilan provider paralel di semua consumer."""
+        async with self._provider_semaphore:
+            EMBEDDING_PROVIDER_IN_FLIGHT.inc()
+            try:
+                yield
+            finally:
+                EMBEDDING_PROVIDER_IN_FLIGHT.dec()
 
     async def _process_job(self, job_info: Dict[str, Any]):
         """
@@ -122,6 +266,7 @@ class EmbeddingWorker:
                     .update({"vector": vector}) \
                     .eq("block_id", entity_id) \
                     .execute()
+                await self._record_content_hashes({str(entity_id): content_text})
             
             # 4. Tandai Job Selesai
             await self._update_job_status(admin_client, job_id, "completed")
@@ -147,6 +292,154 @@ class EmbeddingWorker:
                  pass
 
 
+    async def _pop_jobs(self, limit: int) -> List[bytes]:
+        """Mengambil hingga `limit` job bergiliran antar kunci (lalu sisa list lama)."""
+        raws = await self._pop_fair(
+            keys=[EMBEDDING_READY_KEY, EMBEDDING_PENDING_KEY],
+            args=[EMBEDDING_QUEUE_PREFIX, limit]
+        )
+        raws = list(raws or [])
+        if len(raws) < limit:
+            legacy = await self.redis_client.rpop(EMBEDDING_JOBS_KEY, limit - len(raws))
+            if legacy:
+                raws.extend(legacy)
+        return raws
+
+    async def _collect_batch(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Mengambil job pertama yang tersedia (polling setiap
+        EMBEDDING_WORKER_POLL_INTERVAL_MS), lalu mengumpulkan job berikutnya
+        hingga `limit` (default `batch_max_jobs`) atau sampai `batch_wait_ms`
+        sejak job pertama.
+        """
+        limit = limit or self.batch_max_jobs
+        raws = await self._pop_jobs(limit)
+        if not raws:
+            await asyncio.sleep(self.poll_interval_seconds)
+            return []
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait_ms / 1000
+
+        while len(raws) < limit:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, self.poll_interval_seconds))
+            raws.extend(await self._pop_jobs(limit - len(raws)))
+
+        jobs = []
+        for raw in raws:
+            try:
+                jobs.append(json.loads(raw))
+            except ValueError as e:
+                logger.error(f"Job embedding tidak bisa di-decode, dibuang: {e}")
+        return jobs
+
+    async def _mark_jobs(
+        self,
+        admin_client: AsyncClient,
+        job_ids: List[str],
+        status: str,
+        error_message: Optional[str] = None
+    ):
+        try:
+            await block_queries.update_embedding_jobs_status_db(admin_client, job_ids, status, error_message)
+        except DatabaseError as e:
+            logger.error(f"FATAL: Gagal update status {len(job_ids)} job embedding: {e}", exc_info=True)
+
+    async def _process_batch(self, jobs: List[Dict[str, Any]]):
+        """
+        Memproses banyak job sekaligus. Job yang gagal validasi/datanya tidak
+        ada ditandai 'failed' sendiri-sendiri; kegagalan embedding atau tulis
+        vektor menandai seluruh sisa batch 'failed'.
+        """
+        admin_client: AsyncClient = await get_supabase_admin_async_client()
+        failed: Dict[str, List[str]] = {}
+        block_jobs: Dict[str, List[str]] = {}
+
+        for job_info in jobs:
+            job_id = job_info.get("job_id")
+            entity_id = job_info.get("entity_id")
+            table_dest = job_info.get("table_destination")
+            if not all([job_id, entity_id, table_dest]):
+                logger.error(f"Job tidak valid, data hilang: {job_info}")
+                if job_id:
+                    failed.setdefault("Job tidak valid, data hilang.", []).append(job_id)
+            elif table_dest != "blocks":
+                failed.setdefault(f"Table destination '{table_dest}' tidak didukung.", []).append(job_id)
+            else:
+                block_jobs.setdefault(str(entity_id), []).append(job_id)
+
+        completed: List[str] = []
+        if block_jobs:
+            try:
+                contents = await block_queries.get_block_contents_db(admin_client, list(block_jobs))
+
+                texts: Dict[str, str] = {}
+                for block_id, job_ids in block_jobs.items():
+                    if block_id not in contents:
+                        failed.setdefault("Block tidak ditemukan.", []).extend(job_ids)
+                        continue
+                    content = contents[block_id]
+                    if not content or content.isspace():
+                        completed.extend(job_ids)  # Teks kosong: tidak ada yang di-embed
+                    else:
+                        texts[block_id] = content
+
+                if texts:
+                    vectors = await self._call_embedding_service_batch(list(texts.values()))
+                    await block_queries.update_block_vectors_bulk_db(
+                        admin_client, dict(zip(texts.keys(), vectors))
+                    )
+                    await self._record_content_hashes(texts)
+                    for block_id in texts:
+                        completed.extend(block_jobs[block_id])
+
+            except pybreaker.CircuitBreakerError as e:
+                logger.warning(f"Circuit Breaker Terbuka. Batch {len(jobs)} job gagal: {e}")
+                self._fail_remaining(failed, block_jobs, completed, str(e))
+            except Exception as e:
+                logger.error(f"Batch embedding ({len(jobs)} job) gagal: {e}", exc_info=True)
+                self._fail_remaining(failed, block_jobs, completed, str(e))
+
+        await self._mark_jobs(admin_client, completed, "completed")
+        for error_message, job_ids in failed.items():
+            await self._mark_jobs(admin_client, job_ids, "failed", error_message)
+        logger.info(
+            f"Batch embedding selesai: {len(completed)} completed, "
+            f"{sum(len(ids) for ids in failed.values())} failed."
+        )
+
+    async def _record_content_hashes(self, contents: Dict[str, str]):
+        """
+        Mencatat hash konten yang BENAR-BENAR dibaca & di-embed (bukan konten
+        saat job diantrikan), agar debouncer tidak membatalkan job untuk
+        konten yang vektornya belum pernah ditulis.
+        """
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for block_id, content in contents.items():
+                    pipe.set(
+                        embedding_content_hash_key(block_id),
+                        content_hash(content),
+                        ex=settings.EMBEDDING_CONTENT_HASH_TTL_SECONDS
+                    )
+                await pipe.execute()
+        except Exception as e:
+            # Tanpa hash, mutasi berikutnya hanya tidak di-dedup (job ekstra)
+            logger.warning(f"Gagal mencatat hash konten {len(contents)} block: {e}")
+
+    @staticmethod
+    def _fail_remaining(
+        failed: Dict[str, List[str]],
+        block_jobs: Dict[str, List[str]],
+        completed: List[str],
+        error_message: str
+    ):
+        already = set(completed).union(*failed.values())
+        remaining = [j for ids in block_jobs.values() for j in ids if j not in already]
+        failed.setdefault(error_message, []).extend(remaining)
+
     async def start(self):
         """
         Memulai worker. (Logika lifecycle tidak berubah dari refactor terakhir)
@@ -159,28 +452,94 @@ class EmbeddingWorker:
         logger.info("Embedding worker (dengan Circuit Breaker) started")
         self.task = asyncio.create_task(self._run_loop())
     
+    async def _dispatch_loop(self):
+        """Memindahkan job dari Redis ke antrian adil lokal (dengan backpressure)."""
+        while self.running:
+            try:
+                await self._queue.wait_for_space(self.prefetch)
+                jobs = await self._collect_batch(limit=self.prefetch - len(self._queue))
+                now = time.perf_counter()
+                for job_info in jobs:
+                    await self._queue.put(_fairness_key(job_info), (now, job_info))
+                EMBEDDING_QUEUE_DEPTH.labels(queue="local").set(len(self._queue))
+                pending = await self.redis_client.get(EMBEDDING_PENDING_KEY)
+                EMBEDDING_QUEUE_DEPTH.labels(queue="redis").set(int(pending or 0))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error di embedding dispatcher: {e}", exc_info=True)
+                await asyncio.sleep(5)
+
+    async def _consume_loop(self, consumer_id: int):
+        """Satu consumer: ambil job bergiliran antar canvas, proses batch/satuan."""
+        while self.running:
+            items = await self._queue.get_many(self.batch_max_jobs)
+            EMBEDDING_QUEUE_DEPTH.labels(queue="local").set(len(self._queue))
+            started_at = time.perf_counter()
+            for queued_at, _ in items:
+                EMBEDDING_JOB_SECONDS.labels(stage="wait").observe(started_at - queued_at)
+            jobs = [job_info for _, job_info in items]
+            self._in_hand[consumer_id] = jobs
+            try:
+                if self.batch_max_jobs > 1:
+                    await self._process_batch(jobs)
+                else:
+                    await self._process_job(jobs[0])
+            except asyncio.CancelledError:
+                # Dibatalkan di tengah proses: job tetap di `_in_hand` agar
+                # dikembalikan ke Redis oleh `_requeue_local_jobs`
+                raise
+            except Exception as e:
+                logger.error(f"Error di embedding consumer #{consumer_id}: {e}", exc_info=True)
+            finally:
+                duration = time.perf_counter() - started_at
+                for _ in jobs:
+                    EMBEDDING_JOB_SECONDS.labels(stage="process").observe(duration)
+            self._in_hand.pop(consumer_id, None)
+
+    async def _requeue_local_jobs(self):
+        """
+        Saat berhenti, kembalikan ke depan antrian Redis job lokal yang belum
+        selesai: job yang dipegang consumer saat dibatalkan (baris
+        `embedding_job_queue`-nya masih 'pending', tidak diambil retry
+        cleanup), lalu job yang masih di `_queue`.
+        """
+        leftovers = [job_info for jobs in self._in_hand.values() for job_info in jobs]
+        self._in_hand.clear()
+        leftovers += [job_info for _, job_info in self._queue.drain()]
+        if not leftovers:
+            return
+        try:
+            # Job diambil dari kanan: RPUSH (urutan terbalik) = diproses lebih dulu
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for job_info in reversed(leftovers):
+                    push_embedding_job(pipe, job_info, front=True)
+                await pipe.execute()
+            logger.info(f"{len(leftovers)} job embedding lokal dikembalikan ke Redis.")
+        except Exception as e:
+            logger.error(f"Gagal mengembalikan {len(leftovers)} job embedding ke Redis: {e}", exc_info=True)
+
     async def _run_loop(self):
         """
-        Loop utama worker. (Logika lifecycle tidak berubah dari refactor terakhir)
+        Loop utama worker: 1 dispatcher + `concurrency` consumer.
         """
+        tasks = [asyncio.create_task(self._dispatch_loop())] + [
+            asyncio.create_task(self._consume_loop(i)) for i in range(self.concurrency)
+        ]
+        logger.info(
+            f"Embedding worker pool: {self.concurrency} consumer, "
+            f"batch={self.batch_max_jobs}, prefetch={self.prefetch}"
+        )
         try:
-            while self.running:
-                try:
-                    # Ambil job dari Redis
-                    job_data = await self.redis_client.brpop("embedding_jobs", timeout=5)
-                    
-                    if job_data:
-                        job_json = job_data[1]
-                        job_info = json.loads(job_json)
-                        await self._process_job(job_info)
-                    
-                except asyncio.CancelledError:
-                    logger.info("Embedding worker loop dibatalkan.")
-                    break
-                except Exception as e:
-                    logger.error(f"Error di embedding worker loop: {e}", exc_info=True)
-                    await asyncio.sleep(5)
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            logger.info("Embedding worker loop dibatalkan.")
         finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._requeue_local_jobs()
+            EMBEDDING_QUEUE_DEPTH.labels(queue="local").set(0)
             self.running = False
             self.task = None
             logger.info("Embedding worker loop stopped.")
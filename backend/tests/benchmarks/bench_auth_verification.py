@@ -0,0 +1,113 @@
+# File: backend/tests/benchmarks/bench_auth_verification.py
+#
+# Microbenchmark overhead autentikasi per request:
+#   - mode "remote": round trip ke /auth/v1/user via klien httpx sinkron
+#                    di dalam asyncio.to_thread (perilaku lama)
+#   - mode "local" : verifikasi JWT in-process (SupabaseJWTVerifier)
+#
+# Jalankan dari folder backend:
+#   python -m tests.benchmarks.bench_auth_verification --requests 2000 --rtt-ms 40
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+from jose import jwt
+
+from app.core.jwt_verifier import SupabaseJWTVerifier
+
+JWT_SECRET = "benchmark-secret-benchmark-secret-benchmark"
+
+
+def make_token(user_id: str) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": user_id,
+        "aud": "authenticated",
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm="HS256")
+
+
+def make_remote_client(rtt_ms: float, user_id: str) -> httpx.Client:
+    """Klien sinkron dengan transport palsu yang mensimulasikan RTT ke Supabase."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(rtt_ms / 1000)
+        return httpx.Response(200, json={"id": user_id})
+    return httpx.Client(base_url="http://supabase.local/auth/v1", transport=httpx.MockTransport(handler))
+
+
+async def bench_remote(token: str, n: int, concurrency: int, rtt_ms: float, user_id: str) -> list:
+    client = make_remote_client(rtt_ms, user_id)
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    def sync_validate():
+        response = client.get("/user", headers={"Authorization": f"Bearer {token}"})
+        response.raise_for_status()
+        return response.json()
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            data = await asyncio.to_thread(sync_validate)
+            assert data["id"] == user_id
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(n)))
+    client.close()
+    return latencies
+
+
+async def bench_local(token: str, n: int, concurrency: int, user_id: str) -> list:
+    verifier = SupabaseJWTVerifier(jwt_secret=JWT_SECRET, jwks_url=None)
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            claims = await verifier.verify(token)
+            assert claims["sub"] == user_id
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(n)))
+    return latencies
+
+
+def report(name: str, latencies: list, wall: float):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<7} n={len(latencies):<6} wall={wall:8.3f}s "
+        f"mean={statistics.mean(latencies) * 1000:8.3f}ms "
+        f"p95={p95 * 1000:8.3f}ms throughput={len(latencies) / wall:10.1f} req/s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    user_id = str(uuid.uuid4())
+    token = make_token(user_id)
+
+    start = time.perf_counter()
+    remote = await bench_remote(token, args.requests, args.concurrency, args.rtt_ms, user_id)
+    report("remote", remote, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    local = await bench_local(token, args.requests, args.concurrency, user_id)
+    report("local", local, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+# File: backend/tests/benchmarks/bench_broadcast_frames.py
+#
+# Microbenchmark fan-out broadcast canvas ke banyak socket di satu worker:
+#   - mode "dict" : json.loads sekali, lalu per socket buang `_exclude_user_id`
+#                   dan json.dumps ulang (perilaku lama _pubsub_listener)
+#   - mode "frame": parse header BroadcastFrame sekali, per socket kirim
+#                   payload yang sudah di-serialize apa adanya
+#
+# Jalankan dari folder backend:
+#   python -m tests.benchmarks.bench_broadcast_frames --subscribers 500 --messages 200
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from app.services.broadcast_frame import BroadcastFrame
+
+
+class FakeWebSocket:
+    """Socket palsu; hanya menghitung byte yang dikirim."""
+
+    def __init__(self):
+        self.sent_bytes = 0
+
+    async def send_text(self, data: str):
+        self.sent_bytes += len(data)
+
+
+def make_message(block_size: int) -> dict:
+    return {
+        "type": "mutation",
+        "payload": {
+            "action": "update",
+            "block_id": str(uuid.uuid4()),
+            "block": {
+                "block_id": str(uuid.uuid4()),
+                "type": "text",
+                "content": "x" * block_size,
+                "y_order": "0|hzzzzz:",
+                "version": 12,
+                "metadata": {"tags": ["a", "b"], "color": "blue"},
+            },
+            "server_seq": 1234,
+            "client_op_id": str(uuid.uuid4()),
+        },
+    }
+
+
+async def fanout_dict(raw: bytes, sockets, user_ids):
+    message = json.loads(raw)
+    for user_id, ws in zip(user_ids, sockets):
+        exclude_user_id = message.get("_exclude_user_id")
+        if exclude_user_id:
+            if user_id == exclude_user_id:
+                continue
+            out = {k: v for k, v in message.items() if k != "_exclude_user_id"}
+        else:
+            out = message
+        await ws.send_text(json.dumps(out))
+
+
+async def fanout_frame(raw: bytes, sockets, user_ids):
+    frame = BroadcastFrame.decode(raw)
+    for user_id, ws in zip(user_ids, sockets):
+        if frame.is_excluded(user_id):
+            continue
+        await ws.send_text(frame.payload)
+
+
+async def run(mode: str, subscribers: int, messages: int, block_size: int):
+    user_ids = [str(uuid.uuid4()) for _ in range(subscribers)]
+    sockets = [FakeWebSocket() for _ in range(subscribers)]
+    sender = user_ids[0]
+
+    if mode == "dict":
+        raws = [
+            json.dumps({**make_message(block_size), "_exclude_user_id": sender}).encode()
+            for _ in range(messages)
+        ]
+        fanout = fanout_dict
+    else:
+        raws = [
+            BroadcastFrame.from_message(make_message(block_size), [sender], origin="bench").encode().encode()
+            for _ in range(messages)
+        ]
+        fanout = fanout_frame
+
+    latencies = []
+    start = time.perf_counter()
+    for raw in raws:
+        t0 = time.perf_counter()
+        await fanout(raw, sockets, user_ids)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    sent = sum(ws.sent_bytes for ws in sockets)
+    print(
+        f"[{mode:5}] {messages} pesan x {subscribers} socket dalam {elapsed:.3f}s | "
+        f"per pesan p50={p50:.3f}ms p99={p99:.3f}ms | "
+        f"{sent / 1024 / 1024:.1f} MiB terkirim"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--block-size", type=int, default=512, help="Panjang konten block (karakter)")
+    parser.add_argument("--mode", choices=["dict", "frame", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["dict", "frame"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        asyncio.run(run(mode, args.subscribers, args.messages, args.block_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# File: backend/tests/benchmarks/bench_checkpointer.py
+#
+# Latensi aput/aget_tuple + byte yang ditulis per checkpoint:
+#   - "to_thread": AsyncCompatibleRedisSaver (klien sync + asyncio.to_thread,
+#                  snapshot penuh via lc_dumps JSON)
+#   - "async"    : AsyncRedisCheckpointSaver (redis.asyncio, pipeline,
+#                  delta channel msgpack)
+#
+# Mensimulasikan satu giliran chat: N checkpoint berurutan di mana hanya
+# sebagian kecil channel berubah, sementara chat_history tetap besar.
+# Butuh Redis di REDIS_URL (data ditulis di bawah thread_id acak lalu dihapus).
+#
+# Jalankan dari folder backend:
+#   python -m tests.benchmarks.bench_checkpointer --steps 200 --history 40
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import redis.asyncio as redis
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.base.id import uuid6
+
+from app.core.config import settings
+from app.services.chat_engine.checkpoint import AsyncCompatibleRedisSaver, AsyncRedisCheckpointSaver
+
+
+def make_history(n: int):
+    return [
+        HumanMessage(content=f"pesan {i} " * 40) if i % 2 == 0 else AIMessage(content=f"jawaban {i} " * 40)
+        for i in range(n)
+    ]
+
+
+async def run(mode: str, args):
+    client = redis.from_url(settings.REDIS_URL, decode_responses=False)
+    if mode == "async":
+        saver = AsyncRedisCheckpointSaver(client, key_prefix=f"bench:{uuid.uuid4().hex[:8]}")
+    else:
+        saver = AsyncCompatibleRedisSaver(redis_client=client)
+        await asyncio.to_thread(saver.setup)
+
+    thread_id = f"bench-{uuid.uuid4()}"
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"chat_history": make_history(args.history), "user_message": "halo"}
+    checkpoint["channel_versions"] = {"chat_history": 1, "user_message": 1}
+    used_before = (await client.info("memory"))["used_memory"]
+
+    put_ms, get_ms = [], []
+    for step in range(args.steps):
+        checkpoint = saver_next(checkpoint, step)
+        new_versions = {"step": checkpoint["channel_versions"]["step"]}
+
+        start = time.perf_counter()
+        config = await saver.aput(config, checkpoint, {"source": "loop", "step": step}, new_versions)
+        put_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await saver.aget_tuple(config)
+        get_ms.append((time.perf_counter() - start) * 1000)
+
+    used_after = (await client.info("memory"))["used_memory"]
+    print(
+        f"{mode:>9}: aput p50 {statistics.median(put_ms):6.2f}ms | aget_tuple p50 {statistics.median(get_ms):6.2f}ms | "
+        f"~{(used_after - used_before) / args.steps / 1024:7.1f} KiB/checkpoint"
+    )
+    if mode == "async":
+        await saver.adelete_thread(thread_id)
+    await client.aclose()
+
+
+def saver_next(checkpoint, step: int):
+    """Checkpoint berikutnya: id baru (monoton), hanya channel 'step' yang berubah."""
+    versions = dict(checkpoint["channel_versions"])
+    versions["step"] = versions.get("step", 0) + 1
+    values = dict(checkpoint["channel_values"])
+    values["step"] = step
+    return {**checkpoint, "id": str(uuid6(clock_seq=step)), "channel_versions": versions, "channel_values": values}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--history", type=int, default=40)
+    args = parser.parse_args()
+
+    for mode in ("to_thread", "async"):
+        asyncio.run(run(mode, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# File: backend/tests/benchmarks/bench_embedding_worker.py
+#
+# Throughput worker embedding (jobs/detik) terhadap backend palsu:
+#   - mode "single": _process_job per job (1 SELECT, 1 panggilan embedding,
+#                    1 UPDATE vektor, 1 UPDATE status per job)
+#   - mode "batch" : _process_batch per N job (1 SELECT in_, 1 panggilan
+#                    batch embedding, 1 RPC vektor, update status bulk)
+#
+# Latensi backend disimulasikan dengan asyncio.sleep: --db-ms per round trip
+# DB, --embed-ms per request embedding + --embed-per-text-ms per teks.
+# Tidak butuh Gemini / Supabase / Redis.
+#
+# Jalankan dari folder backend:
+#   python -m tests.benchmarks.bench_embedding_worker --jobs 500 --batch-size 32
+
+import argparse
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import app.workers.embedding as embedding_worker_module
+from app.workers.embedding import EmbeddingWorker
+
+VECTOR_DIMS = 768
+
+
+class FakeEmbeddingService:
+    def __init__(self, request_ms: float, per_text_ms: float):
+        self.request_s = request_ms / 1000
+        self.per_text_s = per_text_ms / 1000
+        self.requests = 0
+
+    async def generate_embedding(self, text, task_type="retrieval_query"):
+        self.requests += 1
+        await asyncio.sleep(self.request_s + self.per_text_s)
+        return [0.1] * VECTOR_DIMS
+
+    async def generate_embeddings(self, texts, task_type="retrieval_document"):
+        self.requests += 1
+        await asyncio.sleep(self.request_s + self.per_text_s * len(texts))
+        return [[0.1] * VECTOR_DIMS for _ in texts]
+
+
+class FakeQuery:
+    """Query builder Supabase palsu; setiap execute() = 1 round trip."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.ids = None
+        self.single = False
+        self.is_update = False
+
+    def select(self, *_):
+        return self
+
+    def update(self, _):
+        self.is_update = True
+        return self
+
+    def eq(self, _column, value):
+        self.ids = [value]
+        return self
+
+    def in_(self, _column, values):
+        self.ids = list(values)
+        return self
+
+    def maybe_single(self):
+        self.single = True
+        return self
+
+    async def execute(self):
+        await self.client.round_trip()
+        if self.is_update or self.table != "blocks":
+            return SimpleNamespace(data=[])
+        rows = [{"block_id": i, "content": self.client.contents[i]} for i in self.ids]
+        return SimpleNamespace(data=rows[0] if self.single else rows)
+
+
+class FakeAdminClient:
+    def __init__(self, db_ms: float, contents: dict):
+        self.db_s = db_ms / 1000
+        self.contents = contents
+        self.round_trips = 0
+
+    async def round_trip(self):
+        self.round_trips += 1
+        await asyncio.sleep(self.db_s)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, _name, params):
+        async def execute():
+            await self.round_trip()
+            return SimpleNamespace(data=len(params["p_items"]))
+        return SimpleNamespace(execute=execute)
+
+
+def make_jobs(n: int, content_size: int):
+    contents = {}
+    jobs = []
+    for _ in range(n):
+        block_id = str(uuid.uuid4())
+        contents[block_id] = "x" * content_size
+        jobs.append({"job_id": str(uuid.uuid4()), "entity_id": block_id, "table_destination": "blocks"})
+    return jobs, contents
+
+
+async def run(mode: str, args):
+    jobs, contents = make_jobs(args.jobs, args.content_size)
+    admin = FakeAdminClient(args.db_ms, contents)
+
+    async def _get_admin():
+        return admin
+    embedding_worker_module.get_supabase_admin_async_client = _get_admin
+
+    worker = EmbeddingWorker(batch_max_jobs=args.batch_size)
+    fake_embedding = FakeEmbeddingService(args.embed_ms, args.embed_per_text_ms)
+    worker.embedding_service = fake_embedding
+
+    start = time.perf_counter()
+    if mode == "single":
+        for job in jobs:
+            await worker._process_job(job)
+    else:
+        for i in range(0, len(jobs), args.batch_size):
+            await worker._process_batch(jobs[i:i + args.batch_size])
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{mode:>6}: {len(jobs) / elapsed:8.1f} jobs/s | {elapsed:6.2f}s total | "
+        f"{fake_embedding.requests} embed requests | {admin.round_trips} DB round trips"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--content-size", type=int, default=400)
+    parser.add_argument("--db-ms", type=float, default=3.0)
+    parser.add_argument("--embed-ms", type=float, default=80.0)
+    parser.add_argument("--embed-per-text-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    for mode in ("single", "batch"):
+        asyncio.run(run(mode, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# File: backend/tests/benchmarks/bench_provider_router.py
+#
+# Simulasi routing provider LLM terhadap provider palsu lokal:
+#   - "naive"  : selalu panggil model yang diminta; fallback ke DEFAULT_MODEL
+#                hanya setelah stream gagal (perilaku lama agent_node)
+#   - "router" : ProviderRouter.plan + stream (circuit per model/provider,
+#                failover sebelum token pertama)
+#   - "hedged" : seperti "router" + hedging setelah deadline p95 TTFT
+#
+# Model yang diminta (--model) mengalami error 429 dengan peluang
+# --error-rate dan ekor latensi first token (--slow-rate x --slow-ms).
+# Model backup (DEFAULT_MODEL) stabil di --backup-ms. Tidak butuh API key.
+#
+# Jalankan dari folder backend:
+#   python -m tests.benchmarks.bench_provider_router --requests 300 --outage-after 100
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.core.config import settings
+from app.services.chat_engine.provider_router import ProviderRouter, is_provider_error
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class FakeChunk:
+    def __init__(self, content: str):
+        self.content = content
+
+    def __add__(self, other):
+        return FakeChunk(self.content + other.content)
+
+
+class FakeLLM:
+    """Provider palsu: astream() dengan TTFT acak, error opsional, lalu N chunk."""
+
+    def __init__(self, name, first_token_ms, error_rate=0.0, slow_rate=0.0, slow_ms=0.0, chunks=20, chunk_ms=5.0):
+        self.name = name
+        self.first_token_ms = first_token_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.chunks = chunks
+        self.chunk_ms = chunk_ms
+        self.calls = 0
+
+    async def astream(self, messages, config=None):
+        self.calls += 1
+        delay = self.first_token_ms
+        if random.random() < self.slow_rate:
+            delay += self.slow_ms
+        if random.random() < self.error_rate:
+            await asyncio.sleep(delay / 1000 / 2)
+            raise FakeRateLimitError("429 rate limit")
+        await asyncio.sleep(delay / 1000)
+        for i in range(self.chunks):
+            yield FakeChunk(f"{self.name}:{i} ")
+            await asyncio.sleep(self.chunk_ms / 1000)
+
+
+def make_router(hedge: bool, args) -> ProviderRouter:
+    return ProviderRouter(
+        fallback_models=[],
+        failure_threshold=3,
+        error_rate_threshold=0.5,
+        min_samples=10,
+        open_seconds=args.open_seconds,
+        degraded_ttft_seconds=15.0,
+        hedge_enabled=hedge,
+        hedge_min_delay_seconds=0.2,
+        hedge_max_delay_seconds=1.5,
+    )
+
+
+async def naive_request(model, llms):
+    start = time.perf_counter()
+    try:
+        stream = llms[model].astream([])
+        first = await stream.__anext__()
+    except Exception as e:
+        if not is_provider_error(e) or model == settings.DEFAULT_MODEL:
+            return None
+        stream = llms[settings.DEFAULT_MODEL].astream([])
+        first = await stream.__anext__()
+    ttft = time.perf_counter() - start
+    async for _ in stream:
+        pass
+    return ttft, first
+
+
+async def routed_request(router, model, llms):
+    start = time.perf_counter()
+    primary, backup_model, _ = router.plan(model)
+    backup = (backup_model, llms[backup_model]) if backup_model else None
+    try:
+        _, stream = await router.stream(primary, llms[primary], [], None, backup=backup)
+        first = None
+        async for chunk in stream:
+            if first is None:
+                first = chunk
+                ttft = time.perf_counter() - start
+        return ttft, first
+    except Exception:
+        return None
+
+
+async def run(mode: str, args):
+    random.seed(args.seed)
+    requested = args.model
+    healthy = FakeLLM(settings.DEFAULT_MODEL, args.backup_ms)
+    flaky = FakeLLM(requested, args.primary_ms, slow_rate=args.slow_rate, slow_ms=args.slow_ms)
+    llms = {requested: flaky, settings.DEFAULT_MODEL: healthy}
+    router = make_router(mode == "hedged", args)
+
+    ttfts, failures = [], 0
+    start = time.perf_counter()
+    for i in range(args.requests):
+        # Outage: setelah --outage-after request, model yang diminta mulai error
+        flaky.error_rate = args.error_rate if i >= args.outage_after else 0.0
+        if mode == "naive":
+            result = await naive_request(requested, llms)
+        else:
+            result = await routed_request(router, requested, llms)
+        if result is None:
+            failures += 1
+        else:
+            ttfts.append(result[0])
+    elapsed = time.perf_counter() - start
+
+    ttfts.sort()
+    p95 = ttfts[int(len(ttfts) * 0.95) - 1] if ttfts else 0.0
+    print(
+        f"{mode:>6}: p50 TTFT {statistics.median(ttfts) * 1000:7.1f}ms | p95 {p95 * 1000:7.1f}ms | "
+        f"gagal {failures:3d} | panggilan {requested}={flaky.calls} {settings.DEFAULT_MODEL}={healthy.calls} | "
+        f"{elapsed:5.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--outage-after", type=int, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.6)
+    parser.add_argument("--primary-ms", type=float, default=120.0)
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--slow-ms", type=float, default=2500.0)
+    parser.add_argument("--backup-ms", type=float, default=250.0)
+    parser.add_argument("--open-seconds", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for mode in ("naive", "router", "hedged"):
+        asyncio.run(run(mode, args))
+
+
+if __name__ == "__main__":
+    main()
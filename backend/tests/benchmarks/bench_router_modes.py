@@ -0,0 +1,122 @@
+# File: backend/tests/benchmarks/bench_router_modes.py
+#
+# Harness regresi + latensi router chat pada percakapan terekam:
+#   - "split"   : classify_intent -> query_transform (hanya untuk rag_query),
+#                 2 panggilan LLM pada giliran RAG (CHAT_ROUTER_MODE=split)
+#   - "combined": route_and_transform, 1 panggilan LLM structured output
+#                 untuk intent + kueri RAG (CHAT_ROUTER_MODE=combined)
+#
+# Memanggil LLM sungguhan (butuh GEMINI_API_KEY di .env). Setiap baris
+# fixture JSONL: {"id", "chat_history": [[role, content], ...],
+# "user_message", "expected_intent"}.
+#
+# Jalankan dari folder backend:
+#   python -m tests.benchmarks.bench_router_modes --repeat 3
+#   python -m tests.benchmarks.bench_router_modes --data path/ke/rekaman.jsonl
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.services.chat_engine.nodes.intent import classify_intent, route_and_transform
+from app.services.chat_engine.nodes.rag import query_transform
+
+DEFAULT_DATA = Path(__file__).parent / "data" / "router_conversations.jsonl"
+
+
+def load_conversations(path: Path):
+    conversations = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                conversations.append(json.loads(line))
+    return conversations
+
+
+def make_state(conversation: dict) -> dict:
+    history = [
+        HumanMessage(content=content) if role == "user" else AIMessage(content=content)
+        for role, content in conversation.get("chat_history", [])
+    ]
+    return {
+        "request_id": f"bench-{conversation['id']}",
+        "user_message": conversation["user_message"],
+        "chat_history": history,
+        "errors": [],
+        "api_call_count": 0,
+        "input_token_count": 0,
+        "output_token_count": 0,
+        "cost_estimate": 0.0,
+    }
+
+
+async def run_split(state: dict, config: dict) -> dict:
+    result = {**state, **await classify_intent(state, config)}
+    if not result.get("errors") and result.get("intent") == "rag_query":
+        result = {**result, **await query_transform(result, config)}
+    return result
+
+
+async def run_combined(state: dict, config: dict) -> dict:
+    return {**state, **await route_and_transform(state, config)}
+
+
+async def run_mode(name, runner, conversations, repeat):
+    config = {"configurable": {}}
+    latencies, calls, results = [], [], {}
+    for _ in range(repeat):
+        for conversation in conversations:
+            t0 = time.perf_counter()
+            result = await runner(make_state(conversation), config)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            calls.append(result.get("api_call_count", 0))
+            # Simpan hasil putaran terakhir untuk perbandingan intent
+            results[conversation["id"]] = result
+
+    correct = sum(
+        1 for c in conversations if results[c["id"]].get("intent") == c.get("expected_intent")
+    )
+    p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) >= 2 else latencies[0]
+    print(
+        f"[{name:8}] p50={statistics.median(latencies):8.1f}ms p95={p95:8.1f}ms | "
+        f"panggilan LLM rata-rata={statistics.mean(calls):.2f} | "
+        f"akurasi intent={correct}/{len(conversations)}"
+    )
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", type=Path, default=DEFAULT_DATA)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.data)
+    split = await run_mode("split", run_split, conversations, args.repeat)
+    combined = await run_mode("combined", run_combined, conversations, args.repeat)
+
+    agree = 0
+    for c in conversations:
+        a, b = split[c["id"]], combined[c["id"]]
+        if a.get("intent") == b.get("intent"):
+            agree += 1
+            continue
+        print(
+            f"  BEDA {c['id']}: split={a.get('intent')} combined={b.get('intent')} "
+            f"(expected={c.get('expected_intent')})"
+        )
+    print(f"Kesepakatan intent split vs combined: {agree}/{len(conversations)}")
+
+    for c in conversations:
+        if combined[c["id"]].get("intent") == "rag_query":
+            print(f"  {c['id']}: split rag_query={split[c['id']].get('rag_query')!r}")
+            print(f"  {' ' * len(c['id'])}  combined rag_query={combined[c['id']].get('rag_query')!r}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+# File: backend/tests/benchmarks/bench_serialization.py
+#
+# Microbenchmark biaya encode/decode per event pada stream token SSE:
+#   - "stdlib": json.dumps per event + json.loads di ChatService (perilaku lama)
+#   - "fast"  : app.core.utils.serialization (orjson jika terpasang)
+#
+# Jalankan dari folder backend:
+#   python -m tests.benchmarks.bench_serialization --tokens 20000
+
+import argparse
+import json
+import random
+import statistics
+import string
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.core.utils import serialization
+
+
+def make_tokens(count: int):
+    rng = random.Random(42)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(500)]
+    # Sebagian token berisi karakter non-ASCII / markdown seperti output LLM
+    words += ["é", "—", "**", "```", "\n", "Ringkasan:", "🙂"]
+    return [rng.choice(words) + " " for _ in range(count)]
+
+
+def run(name, dumps, loads, tokens, repeat):
+    encode_ns, decode_ns = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        events = [dumps({"type": "token_chunk", "payload": tok}) + "\n" for tok in tokens]
+        t1 = time.perf_counter_ns()
+        for ev in events:
+            loads(ev)
+        t2 = time.perf_counter_ns()
+        encode_ns.append((t1 - t0) / len(tokens))
+        decode_ns.append((t2 - t1) / len(tokens))
+
+    # Payload metadata dengan UUID/datetime (socket & pub/sub)
+    meta = {
+        "type": "mutation",
+        "payload": {
+            "block_id": uuid.uuid4(),
+            "updated_at": datetime.now(timezone.utc),
+            "content": "x" * 256,
+        },
+    }
+    t0 = time.perf_counter_ns()
+    for _ in range(len(tokens)):
+        dumps(meta)
+    meta_ns = (time.perf_counter_ns() - t0) / len(tokens)
+
+    print(
+        f"[{name:6}] token_chunk encode={statistics.median(encode_ns):7.0f}ns/event "
+        f"decode={statistics.median(decode_ns):7.0f}ns/event | "
+        f"mutation+UUID/datetime encode={meta_ns:7.0f}ns/event"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.tokens)
+    run("stdlib", lambda o: json.dumps(o, default=str), json.loads, tokens, args.repeat)
+    run("fast", serialization.dumps, serialization.loads, tokens, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# File: backend/tests/benchmarks/bench_stream_modes.py
+#
+# CPU per respons ter-stream untuk StreamingService.stream_agent_response:
+#   - "events_v1": astream_events(version="v1") (semua event start/end
+#                  chain/LLM dengan input & output lengkap)
+#   - "lean"     : stream_mode messages + updates + custom
+#
+# Graph tiruan berbentuk seperti agent chat (beberapa node pra-proses yang
+# membawa chat_history panjang, lalu agent_node yang men-stream token dari
+# fake chat model). Tidak butuh API key / Redis / Supabase.
+#
+# Jalankan dari folder backend:
+#   python -m tests.benchmarks.bench_stream_modes --responses 50 --tokens 400 --history 40
+
+import argparse
+import asyncio
+import time
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.graph import END, StateGraph
+
+from app.core.config import settings
+from app.services.chat_engine.agent_state import AgentState
+from app.services.chat_engine.streaming_service import StreamingService
+from app.services.chat_engine.langgraph_agent import _add_node
+
+
+def build_graph(tokens: int):
+    reply = " ".join(f"token{i}" for i in range(tokens))
+
+    async def preprocess(state: AgentState):
+        return {"intent": "simple_chat", "chat_history": state["chat_history"]}
+
+    async def compress(state: AgentState):
+        return {"compressed_context": "(Tidak ada konteks RAG)"}
+
+    async def agent_node(state: AgentState, config):
+        # Model baru per respons: GenericFakeChatModel mengonsumsi iterator pesan
+        llm = GenericFakeChatModel(messages=iter([AIMessage(content=reply)]))
+        messages = [SystemMessage(content="prompt " * 500)] + state["chat_history"]
+        final = None
+        async for chunk in llm.astream(messages, config=config):
+            final = chunk if final is None else final + chunk
+        return {
+            "chat_history": state["chat_history"] + [final],
+            "final_response": final.content,
+            "input_token_count": 1000,
+            "output_token_count": tokens,
+            "api_call_count": 1,
+            "model_used": settings.DEFAULT_MODEL,
+        }
+
+    workflow = StateGraph(AgentState)
+    for name, node in (
+        ("sanitize_input", preprocess),
+        ("classify_intent", preprocess),
+        ("context_compression", compress),
+        ("agent_node", agent_node),
+    ):
+        _add_node(workflow, name, node)
+    workflow.set_entry_point("sanitize_input")
+    workflow.add_edge("sanitize_input", "classify_intent")
+    workflow.add_edge("classify_intent", "context_compression")
+    workflow.add_edge("context_compression", "agent_node")
+    workflow.add_edge("agent_node", END)
+    return workflow.compile()
+
+
+async def run(mode: str, args):
+    settings.CHAT_STREAM_MODE = mode
+    graph = build_graph(args.tokens)
+    history = [
+        HumanMessage(content=f"pesan riwayat {i} " * 40) if i % 2 == 0 else AIMessage(content=f"jawaban {i} " * 40)
+        for i in range(args.history)
+    ]
+
+    frames = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for i in range(args.responses):
+        async for _ in StreamingService.stream_agent_response(
+            langgraph_agent=graph,
+            request_id=f"bench-{i}",
+            user_id="bench-user",
+            conversation_id="bench-conversation",
+            user_message="halo",
+            chat_history=history,
+            permissions=[],
+            auth_info={},
+            embedding_service=None,
+            background_tasks=None,
+            llm_config={"model": settings.DEFAULT_MODEL},
+        ):
+            frames += 1
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    print(
+        f"{mode:>9}: CPU {cpu / args.responses * 1000:7.2f}ms/respons | "
+        f"wall {wall / args.responses * 1000:7.2f}ms/respons | {frames // args.responses} frame/respons"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--responses", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--history", type=int, default=40)
+    args = parser.parse_args()
+
+    for mode in ("events_v1", "lean"):
+        asyncio.run(run(mode, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# File: backend/tests/benchmarks/bench_token_counting.py
+#
+# Microbenchmark token counting untuk satu giliran pada percakapan 500 pesan:
+#   - "legacy": setiap node memanggil tiktoken.get_encoding(...) lalu encode
+#               ulang seluruh riwayat (context_management, intent, agent, streaming)
+#   - "cached": TokenCounter bersama dengan LRU per hash konten; giliran
+#               berikutnya hanya men-tokenisasi pesan baru
+#
+# Jalankan dari folder backend:
+#   python -m tests.benchmarks.bench_token_counting --messages 500 --turns 5
+
+import argparse
+import random
+import string
+import time
+
+from app.services.chat_engine.helpers.token_counter import TokenCounter
+
+# Jumlah tempat yang menghitung ulang riwayat dalam satu giliran
+COUNTING_SITES = 4
+
+
+def make_conversation(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(2000)]
+    return [" ".join(rng.choices(words, k=rng.randint(20, 200))) for _ in range(count)]
+
+
+def legacy_count(text: str) -> int:
+    if not text:
+        return 0
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def run_turns(name, count_fn, history, new_messages, turns):
+    timings = []
+    history = list(history)
+    for turn in range(turns):
+        history.append(new_messages[turn])
+        t0 = time.perf_counter()
+        total = 0
+        for _ in range(COUNTING_SITES):
+            total = sum(count_fn(m) for m in history)
+        timings.append((time.perf_counter() - t0) * 1000)
+    first, rest = timings[0], timings[1:]
+    avg_rest = sum(rest) / len(rest) if rest else 0.0
+    print(
+        f"[{name:6}] {len(history)} pesan, {total} token | "
+        f"giliran pertama={first:8.2f}ms, rata-rata giliran berikutnya={avg_rest:8.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+
+    if TokenCounter._get_tokenizer() is False:
+        print("PERINGATAN: tiktoken tidak tersedia, angka memakai estimasi len/4.")
+
+    conversation = make_conversation(args.messages + args.turns)
+    history, new_messages = conversation[:args.messages], conversation[args.messages:]
+
+    run_turns("legacy", legacy_count, history, new_messages, args.turns)
+    TokenCounter.clear_cache()
+    run_turns("cached", TokenCounter.count_tokens, history, new_messages, args.turns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# File: backend/tests/canvas/test_embedding_debouncer_revert.py
+#
+# Dedup hash konten di debouncer embedding harus mengikuti konten yang
+# BENAR-BENAR di-embed worker, bukan konten saat job diantrikan: job untuk
+# konten B yang baru dijalankan setelah user mengedit ke C meng-embed C,
+# sehingga revert ke B harus menjadwalkan job baru.
+#
+# Butuh fakeredis[lua] (Redis di-mock in-process).
+#
+# Jalankan dari folder backend:
+#   python -m pytest -q tests/canvas/test_embedding_debouncer_revert.py
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+import app.services.canvas.embedding_debouncer as debouncer_module
+import app.workers.embedding as worker_module
+
+BLOCK_ID = str(uuid4())
+
+
+def _patch_db(monkeypatch, blocks, vectors):
+    """`blocks`: konten block di "DB"; `vectors`: block_id -> konten yang vektornya ditulis."""
+
+    async def admin_client():
+        return None
+
+    async def queue_jobs(_client, block_ids, table_name, user_ids=None):
+        return [
+            {"queue_id": str(uuid4()), "fk_id": str(block_id), "table_destination": table_name}
+            for block_id in block_ids
+        ]
+
+    async def get_contents(_client, block_ids):
+        return {block_id: blocks[block_id] for block_id in block_ids if block_id in blocks}
+
+    async def write_vectors(_client, new_vectors):
+        vectors.update(new_vectors)
+        return len(new_vectors)
+
+    async def mark_jobs(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(debouncer_module, "get_supabase_admin_async_client", admin_client)
+    monkeypatch.setattr(worker_module, "get_supabase_admin_async_client", admin_client)
+    monkeypatch.setattr(debouncer_module.block_queries, "queue_embedding_jobs_bulk_db", queue_jobs)
+    monkeypatch.setattr(worker_module.block_queries, "get_block_contents_db", get_contents)
+    monkeypatch.setattr(worker_module.block_queries, "update_block_vectors_bulk_db", write_vectors)
+    monkeypatch.setattr(worker_module.block_queries, "update_embedding_jobs_status_db", mark_jobs)
+
+
+def test_revert_after_stale_job_reschedules_embedding(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(debouncer_module, "redis_client", redis)
+    blocks, vectors = {}, {}
+    _patch_db(monkeypatch, blocks, vectors)
+
+    debouncer = debouncer_module.EmbeddingJobDebouncer(
+        delay_seconds=0.0, poll_interval_seconds=0.1, max_flush=100, lease_seconds=60.0
+    )
+    worker = worker_module.EmbeddingWorker(batch_max_jobs=8, batch_wait_ms=0)
+    worker.redis_client = redis
+    worker._pop_fair = redis.register_script(worker_module._POP_FAIR_SCRIPT)
+
+    async def embed(texts):
+        # "Vektor" = konten itu sendiri, agar terlihat konten mana yang di-embed
+        return list(texts)
+
+    worker._call_embedding_service_batch = embed
+
+    async def run_worker():
+        jobs = await worker._collect_batch()
+        if jobs:
+            await worker._process_batch(jobs)
+
+    async def scenario():
+        # 1. Konten B: job diantrikan, tapi worker belum jalan
+        blocks[BLOCK_ID] = "B"
+        await debouncer.schedule("canvas", str(uuid4()), {BLOCK_ID: "B"})
+        assert await debouncer.flush_due() == 1
+
+        # 2. User mengedit ke C sebelum worker mengambil job B
+        blocks[BLOCK_ID] = "C"
+        await debouncer.schedule("canvas", str(uuid4()), {BLOCK_ID: "C"})
+
+        # 3. Worker menjalankan job B, tapi membaca (dan meng-embed) C
+        await run_worker()
+        assert vectors[BLOCK_ID] == "C"
+
+        # 4. User revert ke B: vektor masih C, jadi job baru wajib dibuat
+        blocks[BLOCK_ID] = "B"
+        await debouncer.schedule("canvas", str(uuid4()), {BLOCK_ID: "B"})
+        await debouncer.flush_due()
+        await run_worker()
+
+    asyncio.run(scenario())
+
+    assert vectors[BLOCK_ID] == blocks[BLOCK_ID] == "B"
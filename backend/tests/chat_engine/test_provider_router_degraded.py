@@ -0,0 +1,85 @@
+# File: backend/tests/chat_engine/test_provider_router_degraded.py
+#
+# Model yang diminta dialihkan saat TTFT-nya terdegradasi, tetapi harus bisa
+# pulih: setelah cooldown (open_seconds) satu request percobaan dikirim ke
+# model itu, dan jika cepat lagi routing kembali ke model yang diminta.
+#
+# Jalankan dari folder backend:
+#   python -m pytest -q tests/chat_engine/test_provider_router_degraded.py
+
+import asyncio
+
+from app.core.config import settings
+from app.services.chat_engine.provider_router import ProviderRouter
+
+REQUESTED = "gpt-4o-mini"
+FAST_SECONDS = 0.01
+SLOW_SECONDS = 0.15
+DEGRADED_TTFT_SECONDS = 0.08
+OPEN_SECONDS = 0.3
+
+
+class DelayedLLM:
+    """Provider palsu: chunk pertama setelah `first_token_delay` detik."""
+
+    def __init__(self, first_token_delay: float):
+        self.first_token_delay = first_token_delay
+
+    async def astream(self, messages, config=None):
+        await asyncio.sleep(self.first_token_delay)
+        for i in range(3):
+            yield f"chunk{i}"
+
+
+async def _request(router: ProviderRouter, llms) -> str:
+    primary, backup_model, _ = router.plan(REQUESTED)
+    backup = (backup_model, llms[backup_model]) if backup_model else None
+    _, stream = await router.stream(primary, llms[primary], [], None, backup=backup)
+    async for _ in stream:
+        pass
+    return primary
+
+
+def test_slow_requested_model_is_probed_and_recovers():
+    assert REQUESTED != settings.DEFAULT_MODEL
+    router = ProviderRouter(
+        fallback_models=[],
+        failure_threshold=3,
+        error_rate_threshold=0.5,
+        min_samples=3,
+        open_seconds=OPEN_SECONDS,
+        degraded_ttft_seconds=DEGRADED_TTFT_SECONDS,
+        hedge_enabled=False,
+        hedge_min_delay_seconds=0.2,
+        hedge_max_delay_seconds=1.5,
+    )
+    requested_llm = DelayedLLM(FAST_SECONDS)
+    llms = {REQUESTED: requested_llm, settings.DEFAULT_MODEL: DelayedLLM(FAST_SECONDS)}
+
+    async def scenario():
+        for _ in range(3):
+            assert await _request(router, llms) == REQUESTED
+
+        # Model yang diminta melambat sampai terdegradasi lalu dialihkan
+        requested_llm.first_token_delay = SLOW_SECONDS
+        for _ in range(20):
+            if await _request(router, llms) != REQUESTED:
+                break
+        assert router.is_degraded(REQUESTED)
+        assert await _request(router, llms) == settings.DEFAULT_MODEL
+
+        # Setelah cooldown: tepat satu percobaan; masih lambat -> tetap dialihkan
+        await asyncio.sleep(OPEN_SECONDS)
+        assert await _request(router, llms) == REQUESTED
+        assert await _request(router, llms) == settings.DEFAULT_MODEL
+
+        # Model pulih: percobaan berikutnya cepat dan routing kembali normal
+        requested_llm.first_token_delay = FAST_SECONDS
+        assert await _request(router, llms) == settings.DEFAULT_MODEL
+        await asyncio.sleep(OPEN_SECONDS)
+        assert await _request(router, llms) == REQUESTED
+        assert not router.is_degraded(REQUESTED)
+        for _ in range(3):
+            assert await _request(router, llms) == REQUESTED
+
+    asyncio.run(scenario())
@@ -0,0 +1,121 @@
+# File: backend/tests/chat_engine/test_provider_router_hedging.py
+#
+# Hedging di ProviderRouter: token dari contender yang kalah tidak boleh
+# sampai ke stream LangGraph (stream_mode "messages" dan astream_events v1)
+# yang diteruskan StreamingService ke klien.
+#
+# Jalankan dari folder backend:
+#   python -m pytest -q tests/chat_engine/test_provider_router_hedging.py
+
+import asyncio
+from typing import TypedDict
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, StateGraph
+
+from app.services.chat_engine.provider_router import ProviderRouter
+
+
+class SlowStartChatModel(BaseChatModel):
+    """Chat model palsu: menunggu `first_token_delay` lalu men-stream `tokens`."""
+    name_prefix: str
+    first_token_delay: float
+    tokens: int = 5
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-start-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_delay)
+        for i in range(self.tokens):
+            generation = ChatGenerationChunk(message=AIMessageChunk(content=f"{self.name_prefix}{i} "))
+            if run_manager:
+                await run_manager.on_llm_new_token(generation.text, chunk=generation)
+            yield generation
+            await asyncio.sleep(0.01)
+
+
+class State(TypedDict, total=False):
+    final_response: str
+    model_used: str
+
+
+def build_graph(router: ProviderRouter):
+    # Backup dimulai pada deadline hedge (0.05s) dan memberi token pertama
+    # bersamaan dengan primary (~0.1s): kedua contender sempat men-stream
+    # sebelum yang kalah dibatalkan.
+    primary = SlowStartChatModel(name_prefix="primary", first_token_delay=0.1)
+    backup = SlowStartChatModel(name_prefix="backup", first_token_delay=0.05)
+
+    async def agent_node(state: State, config: RunnableConfig):
+        used_model, stream = await router.stream(
+            "gpt-4o-mini", primary, [HumanMessage(content="halo")], config,
+            backup=("gemini-2.5-flash", backup),
+        )
+        final = None
+        async for chunk in stream:
+            final = chunk if final is None else final + chunk
+        return {"final_response": final.content, "model_used": used_model}
+
+    workflow = StateGraph(State)
+    workflow.add_node("agent_node", agent_node)
+    workflow.set_entry_point("agent_node")
+    workflow.add_edge("agent_node", END)
+    return workflow.compile()
+
+
+def make_router() -> ProviderRouter:
+    return ProviderRouter(
+        fallback_models=[],
+        failure_threshold=3,
+        error_rate_threshold=0.5,
+        min_samples=10,
+        open_seconds=30.0,
+        degraded_ttft_seconds=15.0,
+        hedge_enabled=True,
+        hedge_min_delay_seconds=0.05,
+        hedge_max_delay_seconds=0.05,
+    )
+
+
+def test_messages_stream_only_contains_winner_tokens():
+    graph = build_graph(make_router())
+
+    async def collect():
+        streamed, final_state = [], None
+        async for mode, chunk in graph.astream({}, stream_mode=["messages", "values"]):
+            if mode == "messages" and chunk[0].content:
+                streamed.append(chunk[0].content)
+            else:
+                final_state = chunk
+        return streamed, final_state
+
+    streamed, final_state = asyncio.run(collect())
+
+    winner_prefix = "primary" if final_state["model_used"] == "gpt-4o-mini" else "backup"
+    assert streamed and all(token.startswith(winner_prefix) for token in streamed), streamed
+    assert "".join(streamed) == final_state["final_response"]
+
+
+def test_astream_events_v1_only_contains_winner_tokens():
+    graph = build_graph(make_router())
+
+    async def collect():
+        return [
+            event["data"]["chunk"].content
+            async for event in graph.astream_events({}, version="v1")
+            if event["event"] == "on_chat_model_stream" and event["data"]["chunk"].content
+        ]
+
+    streamed = asyncio.run(collect())
+
+    assert streamed
+    winner_prefix = streamed[0].rstrip("0123456789 ")
+    assert all(token.startswith(winner_prefix) for token in streamed), streamed
@@ -0,0 +1,56 @@
+# File: backend/tests/chat_engine/test_stream_coalescing.py
+#
+# Batas waktu coalescing token SSE (CHAT_STREAM_FRAME_MAX_DELAY_MS) harus
+# berlaku walaupun sumber token macet setelah token terakhir: token yang
+# tertahan di buffer tidak boleh menunggu token berikutnya.
+#
+# Jalankan dari folder backend:
+#   python -m pytest -q tests/chat_engine/test_stream_coalescing.py
+
+import asyncio
+import json
+import time
+
+from app.core.config import settings
+from app.services.chat_engine.streaming_service import StreamingService, _TokenChunk
+
+STALL_SECONDS = 1.0
+
+
+async def _stalled_source(**kwargs):
+    yield _TokenChunk("a")          # token pertama: dikirim langsung
+    await asyncio.sleep(0.05)
+    yield _TokenChunk("b")          # masuk buffer, harus keluar setelah max_delay
+    await asyncio.sleep(STALL_SECONDS)
+    yield _TokenChunk("c")
+
+
+async def _collect_frames():
+    start = time.monotonic()
+    received = []
+    async for frame in StreamingService.stream_agent_response(
+        langgraph_agent=None,
+        request_id="test-stall",
+        user_id="test-user",
+        conversation_id="test-conversation",
+        user_message="halo",
+        chat_history=[],
+        permissions=[],
+        auth_info={},
+        embedding_service=None,
+        background_tasks=None,
+    ):
+        received.append((time.monotonic() - start, json.loads(frame)["payload"]))
+    return received
+
+
+def test_buffered_token_flushed_while_source_stalls(monkeypatch):
+    monkeypatch.setattr(StreamingService, "_stream_events", staticmethod(_stalled_source))
+    monkeypatch.setattr(settings, "CHAT_STREAM_FRAME_MAX_CHARS", 64)
+    monkeypatch.setattr(settings, "CHAT_STREAM_FRAME_MAX_DELAY_MS", 20.0)
+
+    received = asyncio.run(_collect_frames())
+
+    assert [payload for _, payload in received] == ["a", "b", "c"]
+    b_sent_at = received[1][0]
+    assert b_sent_at < 0.05 + STALL_SECONDS / 2, f"token 'b' tertahan sampai {b_sent_at:.2f}s"